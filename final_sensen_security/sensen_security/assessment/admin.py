@@ -1,11 +1,12 @@
-from django.contrib import admin
-from .models import Assessment, Question, UserAssessmentAttempt, UserAnswer, Tutorial
+from django.contrib import admin, messages
+from .models import Assessment, Question, UserAssessmentAttempt, UserAnswer, Tutorial, TutorialProgress, ImportJob, OutboxEmail
 from .models import Profile
+from .images import InvalidImage, build_renditions
 
 
 @admin.register(Assessment)
 class AssessmentAdmin(admin.ModelAdmin):
-    list_display = ('title', 'total_questions', 'pass_score', 'time_limit', 'is_active', 'created_at')
+    list_display = ('title', 'question_count', 'pass_score', 'time_limit', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at')
     search_fields = ('title', 'description')
 
@@ -28,11 +29,39 @@ class TutorialAdmin(admin.ModelAdmin):
     list_filter = ('category', 'is_active')
     search_fields = ('title', 'description')
 
+@admin.register(TutorialProgress)
+class TutorialProgressAdmin(admin.ModelAdmin):
+    list_display = ('user', 'tutorial', 'max_progress', 'completed_at', 'updated_at')
+    list_filter = ('tutorial',)
+    search_fields = ('user__username', 'tutorial__title')
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'rows_processed', 'created_count', 'skipped_count', 'failed_count', 'created_by', 'created_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('started_at', 'finished_at', 'attempts', 'claimed_by', 'lease_expires_at')
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    readonly_fields = ('claimed_by', 'last_error', 'sent_at')
+
 @admin.register(Profile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'email', 'phone_number', 'gender', 'address')
     search_fields = ('user__username', 'user__email')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Saving a new picture cleared the old renditions; build its own
+        if 'profile_image' in form.changed_data and obj.profile_image:
+            try:
+                build_renditions(obj)
+            except InvalidImage as e:
+                self.message_user(request, f'Renditions could not be built: {e}', messages.WARNING)
+
     @admin.display(ordering='user__email', description='Email')
     def email(self, obj):
         return obj.user.email
@@ -0,0 +1,95 @@
+"""Read routing for analytics views.
+
+Views wrapped in analytics_reads() (the admin dashboard, its charts and
+user lists, and the leaderboards) send their ORM reads to the 'analytics'
+database when settings.ANALYTICS_DATABASE configures one:
+
+    'readonly'  a second, read-only connection to the main database file;
+                with the production profile (WAL) its long reads never
+                block submissions
+    'snapshot'  a copy of the database refreshed with
+                "manage.py refresh_analytics_snapshot --loop"; reports
+                lag by up to the refresh interval but never touch the
+                main file
+
+Writes always go to 'default'. Without an analytics database, or outside
+those views, nothing changes.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+ANALYTICS_DB_ALIAS = 'analytics'
+
+_analytics_reads = ContextVar('analytics_reads', default=False)
+
+
+def analytics_mode():
+    return getattr(settings, 'ANALYTICS_DATABASE', '')
+
+
+def analytics_enabled():
+    mode = analytics_mode()
+    # Until the first refresh there is no snapshot to read
+    return mode == 'readonly' or (mode == 'snapshot' and snapshot_version() != 0)
+
+
+@contextmanager
+def analytics_reads():
+    """Send reads to the analytics database; also usable as a view decorator"""
+    token = _analytics_reads.set(True)
+    try:
+        yield
+    finally:
+        _analytics_reads.reset(token)
+
+
+class AnalyticsRouter:
+    def db_for_read(self, model, **hints):
+        if _analytics_reads.get() and analytics_enabled():
+            return ANALYTICS_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, otherwise objects read from the analytics database
+        # would be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ANALYTICS_DB_ALIAS:
+            return False
+        return None
+
+
+def snapshot_version():
+    """Changes whenever the snapshot is refreshed; part of cached analytics keys"""
+    if analytics_mode() != 'snapshot':
+        return 0
+    try:
+        return os.stat(settings.ANALYTICS_SNAPSHOT_PATH).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def refresh_snapshot(source=None):
+    """Copy the main database (or `source`) to the snapshot file with SQLite's online backup"""
+    target = settings.ANALYTICS_SNAPSHOT_PATH
+    partial = f'{target}.partial'
+    # A consistent copy taken in one step; in WAL mode writers carry on meanwhile
+    source = sqlite3.connect(str(source or settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']), timeout=20)
+    copy = sqlite3.connect(partial)
+    try:
+        source.backup(copy)
+        # Nothing writes to the copy; a rollback journal leaves no -wal file
+        # behind that could be paired with the next copy
+        copy.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        copy.close()
+        source.close()
+    # Requests that already opened the old file finish reading it
+    os.replace(partial, target)
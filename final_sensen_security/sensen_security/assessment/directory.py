@@ -0,0 +1,99 @@
+"""Server-side data for the users page (jQuery DataTables "serverSide" mode).
+
+Each request carries draw, start, length, search[value] and order[0][...];
+the response holds one page of rows plus the total and filtered counts.
+
+Search terms are matched as prefixes (case-insensitive) of the first
+name, last name, email, emp_id or user_code; every term must match one of
+them. Prefix matches are answered from the NOCASE indexes added in
+migration 0015 instead of scanning every row.
+"""
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+from .models import Profile
+
+
+PAGE_SIZES = (10, 25, 50, 100)
+DEFAULT_PAGE_SIZE = 10
+MAX_SEARCH_TERMS = 5
+
+# DataTables column index -> ordering fields (None: not sortable)
+COLUMN_ORDERING = [
+    ('emp_id',),
+    ('user__email',),
+    ('user__first_name', 'user__last_name'),
+    ('phone_number',),
+    None,
+    ('user__date_joined',),
+    ('user__last_login',),
+    None,
+    None,
+]
+
+
+def _int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def search_filter(search):
+    condition = Q()
+    for term in search.split()[:MAX_SEARCH_TERMS]:
+        matching_users = User.objects.filter(
+            Q(first_name__istartswith=term) | Q(last_name__istartswith=term) | Q(email__istartswith=term)
+        ).values('id')
+        condition &= (
+            Q(user__in=matching_users) | Q(emp_id__istartswith=term) | Q(user_code__istartswith=term)
+        )
+    return condition
+
+
+def ordering(params):
+    column = _int(params.get('order[0][column]'), 0)
+    fields = COLUMN_ORDERING[column] if 0 <= column < len(COLUMN_ORDERING) else None
+    fields = fields or COLUMN_ORDERING[0]
+    prefix = '-' if params.get('order[0][dir]') == 'desc' else ''
+    # pk keeps pages stable when the sorted values tie
+    return [f'{prefix}{field}' for field in fields] + [f'{prefix}pk']
+
+
+def user_row(profile):
+    user = profile.user
+    return {
+        'user_id': user.pk,
+        'emp_id': profile.emp_id or '',
+        'email': user.email,
+        'name': f'{user.first_name} {user.last_name}'.strip(),
+        'phone_number': profile.phone_number,
+        'thumbnail_url': profile.thumbnail_url,
+        'date_joined': user.date_joined.strftime('%Y-%m-%d %H:%M'),
+        'last_login': user.last_login.strftime('%Y-%m-%d %H:%M') if user.last_login else 'Never',
+    }
+
+
+def directory_page(params):
+    """Build the DataTables response for the query parameters of one request"""
+    start = max(_int(params.get('start'), 0), 0)
+    length = _int(params.get('length'), DEFAULT_PAGE_SIZE)
+    if length not in PAGE_SIZES:
+        length = DEFAULT_PAGE_SIZE
+
+    profiles = Profile.objects.all()
+    records_total = profiles.count()
+    search = (params.get('search[value]') or '').strip()
+    if search:
+        profiles = profiles.filter(search_filter(search))
+        records_filtered = profiles.count()
+    else:
+        records_filtered = records_total
+
+    page = profiles.select_related('user').order_by(*ordering(params))[start:start + length]
+    return {
+        'draw': _int(params.get('draw'), 0),
+        'recordsTotal': records_total,
+        'recordsFiltered': records_filtered,
+        'data': [user_row(profile) for profile in page],
+    }
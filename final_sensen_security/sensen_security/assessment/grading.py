@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Question, UserAnswer
+
+
+# Cached keys are named after Assessment.answer_key_version, which the
+# question signals in models.py bump, so an edited question is never graded
+# with an old key in any process; old versions simply expire.
+ANSWER_KEY_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def normalize_answer(value):
+    """Normalize an answer the same way for the key and the submission"""
+    return str(value).strip().lower()
+
+
+def answer_key_cache_key(assessment):
+    return f'assessment:{assessment.id}:answer_key:{assessment.answer_key_version}'
+
+
+def load_answer_key(assessment):
+    """Return {question_id: normalized correct answer} using a single query"""
+    rows = Question.objects.filter(assessment=assessment).values_list('id', 'correct_answer')
+    return {question_id: normalize_answer(correct) for question_id, correct in rows}
+
+
+def get_answer_key(assessment):
+    """Return the compiled answer key for an assessment, building it on a cache miss.
+
+    The key is a dict with 'answers' ({question_id: normalized answer}) and
+    'total_questions'.
+    """
+    cache_key = answer_key_cache_key(assessment)
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answers = load_answer_key(assessment)
+        answer_key = {
+            'answers': answers,
+            'total_questions': len(answers),
+        }
+        cache.set(cache_key, answer_key, ANSWER_KEY_CACHE_TIMEOUT)
+    return answer_key
+
+
+def grade_answers(answer_key, answers):
+    """Grade a submitted {question_id: answer} dict in memory.
+
+    Returns (graded, correct_count) where graded is a list of
+    (question_id, user_answer, is_correct) tuples.
+    """
+    graded = []
+    correct_count = 0
+    for question_id, user_answer in answers.items():
+        question_id = int(question_id)
+        if question_id not in answer_key:
+            raise Question.DoesNotExist("Question matching query does not exist.")
+
+        is_correct = normalize_answer(user_answer) == answer_key[question_id]
+        graded.append((question_id, user_answer, is_correct))
+        if is_correct:
+            correct_count += 1
+    return graded, correct_count
+
+
+def grade_attempt(attempt, assessment, answers):
+    """Grade and persist a submission for an attempt.
+
+    Must be called inside a transaction. Existing answers are replaced with a
+    single bulk insert and the attempt is updated with one save.
+    """
+    answer_key = get_answer_key(assessment)
+    total_questions = answer_key['total_questions']
+    graded, correct_count = grade_answers(answer_key['answers'], answers)
+
+    UserAnswer.objects.filter(attempt=attempt).delete()
+    UserAnswer.objects.bulk_create([
+        UserAnswer(
+            attempt=attempt,
+            question_id=question_id,
+            user_answer=user_answer,
+            is_correct=is_correct,
+        )
+        for question_id, user_answer, is_correct in graded
+    ])
+
+    score = (correct_count / total_questions * 100) if total_questions > 0 else 0
+    attempt.score = round(score)
+    attempt.correct_answers = correct_count
+    attempt.is_completed = True
+    attempt.is_passed = score >= assessment.pass_score
+    attempt.completed_at = timezone.now()
+    attempt.save()
+
+    return total_questions
@@ -0,0 +1,154 @@
+"""In-process write-behind buffering for high-frequency heartbeats.
+
+A WriteBehindBuffer keeps the latest update per key in memory, merging
+repeated updates for the same key, and hands everything to a flush
+function in one call:
+
+    - every `interval` seconds, from a daemon thread started on first use;
+    - as soon as `max_pending` keys are waiting;
+    - when the process exits (atexit).
+
+If flushing keeps failing the buffer stops growing at `max_buffered` keys
+and further new keys are dropped. Updates that were lost are counted in
+the stats, as are those that were buffered, merged and flushed.
+
+Each process has its own buffer, so the flush function must be safe to
+run from several processes (tutorial progress upserts are monotonic).
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(self, flush_func, merge_func, interval=5.0, max_pending=500, max_buffered=5000, name='buffer'):
+        self.flush_func = flush_func
+        self.merge_func = merge_func
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        self.name = name
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so a failed batch is merged back before the next one
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._counters = dict.fromkeys(
+            ('buffered', 'merged', 'flushed', 'dropped', 'flushes', 'flush_errors'), 0
+        )
+        atexit.register(self.flush)
+
+    def add(self, key, value):
+        """Queue an update; returns False if it was dropped"""
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = self.merge_func(self._pending[key], value)
+                self._counters['merged'] += 1
+            elif len(self._pending) >= self.max_buffered:
+                self._counters['dropped'] += 1
+                return False
+            else:
+                self._pending[key] = value
+            self._counters['buffered'] += 1
+            full = len(self._pending) >= self.max_pending
+
+        if self.interval:
+            self._ensure_thread()
+            if full:
+                self._wake.set()
+        elif full:
+            self.flush()
+        return True
+
+    def pending(self, predicate=None):
+        """A copy of the waiting updates, optionally only the keys matching `predicate`"""
+        with self._lock:
+            return {key: value for key, value in self._pending.items() if predicate is None or predicate(key)}
+
+    def flush(self):
+        """Write everything waiting in one flush_func call; returns how many keys were flushed"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self.flush_func(batch)
+            except Exception:
+                logger.exception('Flushing %s failed; %d update(s) kept for the next attempt', self.name, len(batch))
+                self._requeue(batch)
+                return 0
+            with self._lock:
+                self._counters['flushed'] += len(batch)
+                self._counters['flushes'] += 1
+            return len(batch)
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._counters['flush_errors'] += 1
+            for key, value in batch.items():
+                if key in self._pending:
+                    self._pending[key] = self.merge_func(value, self._pending[key])
+                elif len(self._pending) < self.max_buffered:
+                    self._pending[key] = value
+                else:
+                    self._counters['dropped'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'pending': len(self._pending)}
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'{self.name}-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                # Don't keep a broken connection around after a failed flush
+                if connection.connection is not None and not connection.is_usable():
+                    connection.close()
+            except Exception:
+                # The thread must outlive any error, or heartbeats pile up unwritten
+                logger.exception('The %s flusher failed; it will try again', self.name)
+
+
+# =========================
+# Tutorial progress
+# =========================
+
+_progress_buffer = None
+
+
+def progress_buffer_enabled():
+    return getattr(settings, 'TUTORIAL_PROGRESS_BUFFER', True)
+
+
+def get_progress_buffer():
+    """The process-wide buffer for tutorial progress, keyed by (user_id, tutorial_id)"""
+    global _progress_buffer
+    if _progress_buffer is None:
+        from .tutorial_progress import apply_progress, merge_update
+        _progress_buffer = WriteBehindBuffer(
+            apply_progress, merge_update,
+            interval=getattr(settings, 'TUTORIAL_PROGRESS_FLUSH_INTERVAL', 5.0),
+            max_pending=getattr(settings, 'TUTORIAL_PROGRESS_FLUSH_SIZE', 500),
+            max_buffered=getattr(settings, 'TUTORIAL_PROGRESS_MAX_BUFFERED', 5000),
+            name='tutorial-progress',
+        )
+    return _progress_buffer
@@ -0,0 +1,103 @@
+"""Profile image renditions.
+
+Uploads are decoded once with Pillow and written as three fixed-size
+renditions next to the original:
+
+    thumbnail   96x96 square crop   user lists (shown at 50x50)
+    card        300x300 square crop profile page (shown at 150x150)
+    full        fits in 1024x1024   anything larger
+
+Renditions are WebP when Pillow supports it and JPEG otherwise
+(settings.PROFILE_IMAGE_FORMAT overrides the choice).
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+
+# name -> (field, size, crop to the exact size)
+RENDITIONS = {
+    'thumbnail': ('image_thumbnail', (96, 96), True),
+    'card': ('image_card', (300, 300), True),
+    'full': ('image_full', (1024, 1024), False),
+}
+
+QUALITY = 82
+
+# Refuse to decode images that would take an unreasonable amount of memory
+MAX_PIXELS = 40_000_000
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def rendition_format():
+    configured = getattr(settings, 'PROFILE_IMAGE_FORMAT', None)
+    if configured:
+        return configured.upper()
+    return 'WEBP' if features.check('webp') else 'JPEG'
+
+
+def open_image(file):
+    """Decode an uploaded image, upright and in a mode the encoders accept"""
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        if image.width * image.height > MAX_PIXELS:
+            raise InvalidImage('Image is too large.')
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidImage('Upload a valid image file.')
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image
+
+
+def render(image, size, crop, image_format):
+    if crop:
+        rendition = ImageOps.fit(image, size, Image.LANCZOS)
+    else:
+        rendition = image.copy()
+        rendition.thumbnail(size, Image.LANCZOS)
+    if image_format == 'JPEG' and rendition.mode == 'RGBA':
+        background = Image.new('RGB', rendition.size, (255, 255, 255))
+        background.paste(rendition, mask=rendition.getchannel('A'))
+        rendition = background
+
+    output = io.BytesIO()
+    rendition.save(output, image_format, quality=QUALITY, optimize=image_format == 'JPEG', method=4)
+    return output.getvalue()
+
+
+def build_renditions(profile, image=None, save=True):
+    """(Re)write the renditions of profile.profile_image; raises InvalidImage"""
+    if image is None:
+        image = open_image(profile.profile_image)
+    image_format = rendition_format()
+    extension = 'webp' if image_format == 'WEBP' else 'jpg'
+    stem = os.path.splitext(os.path.basename(profile.profile_image.name))[0]
+
+    fields = []
+    for name, (field, size, crop) in RENDITIONS.items():
+        current = getattr(profile, field)
+        if current:
+            current.delete(save=False)
+        content = ContentFile(render(image, size, crop, image_format))
+        current.save(f'{profile.pk}-{stem}-{name}.{extension}', content, save=False)
+        fields.append(field)
+    if save:
+        profile.save(update_fields=fields)
+
+
+def set_profile_image(profile, upload):
+    """Store a new upload and its renditions on the profile; raises InvalidImage"""
+    image = open_image(upload)
+    upload.seek(0)
+    profile.profile_image = upload
+    profile.save()
+    build_renditions(profile, image)
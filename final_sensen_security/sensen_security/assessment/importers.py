@@ -0,0 +1,335 @@
+"""Streaming CSV importers.
+
+Uploads are decoded incrementally with io.TextIOWrapper, so a large file is
+never held in memory as one string. Rows are validated as they are read and
+written with bulk_create in batches; the result is an ImportReport with
+counts and a capped list of row errors rather than one message per row.
+
+Both importers accept a `progress` callable, called with the report after
+each batch; the background jobs in jobs.py use it to publish progress.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from .grading import normalize_answer
+from .models import Assessment, Question, Tutorial
+
+
+IMPORT_BATCH_SIZE = 1000
+
+# Only the first few bad rows are listed in the report
+MAX_REPORTED_ERRORS = 20
+
+
+class CSVImportError(ValueError):
+    """The file as a whole cannot be imported (wrong columns, bad encoding)"""
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.assessments = []
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+        self._reported = 0
+
+    def _report(self, line, reason):
+        self._reported += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'Line {line}: {reason}')
+
+    def reject(self, line, reason):
+        self.invalid += 1
+        self._report(line, reason)
+
+    def skip_duplicate(self, line, reason):
+        """Count a duplicate and list it with the errors"""
+        self.duplicates += 1
+        self._report(line, reason)
+
+    @property
+    def unlisted_errors(self):
+        return self._reported - len(self.errors)
+
+    def summary(self):
+        return f'{self.created} created, {self.duplicates} duplicates skipped, {self.invalid} invalid rows.'
+
+
+def open_csv(uploaded_file, required_columns):
+    """Return a DictReader that decodes the upload as it is read"""
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    try:
+        fieldnames = [name.strip() for name in reader.fieldnames or []]
+    except UnicodeDecodeError:
+        raise CSVImportError('CSV file must be UTF-8 encoded.')
+    if not all(column in fieldnames for column in required_columns):
+        raise CSVImportError(f'CSV must contain columns: {", ".join(required_columns)}')
+    reader.fieldnames = fieldnames
+    return reader
+
+
+def column_values(uploaded_file, column):
+    """The non-empty values of one column, read in a separate pass before the rows are imported"""
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(text)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+        values = {_cell(row, column) for row in reader}
+    except UnicodeDecodeError:
+        raise CSVImportError('CSV file must be UTF-8 encoded.')
+    finally:
+        # Hand the upload back open and rewound for open_csv
+        text.detach()
+    uploaded_file.seek(0)
+    values.discard('')
+    return values
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _cell(row, column):
+    return (row.get(column) or '').strip()
+
+
+def _text_cell(row, column, max_length):
+    value = _cell(row, column)
+    if len(value) > max_length:
+        raise ValueError(f'{column} is longer than {max_length} characters')
+    return value
+
+
+def _int_cell(row, column, default, low=None, high=None):
+    value = _cell(row, column)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f'{column} must be a whole number')
+    if low is not None and number < low:
+        raise ValueError(f'{column} must be at least {low}')
+    if high is not None and number > high:
+        raise ValueError(f'{column} must be at most {high}')
+    return number
+
+
+# =========================
+# Tutorials
+# =========================
+
+def _youtube_tutorial(row):
+    name, link = _text_cell(row, 'name', 200), _text_cell(row, 'link', 200)
+    if not name or not link:
+        raise ValueError('missing name or link')
+    if 'youtube.com' not in link and 'youtu.be' not in link:
+        raise ValueError('not a valid YouTube URL')
+    return link, Tutorial(
+        title=name,
+        description=f'YouTube tutorial: {name}',
+        video_type='youtube',
+        video_url=link,
+    )
+
+
+def _local_tutorial(row):
+    name, file_path = _text_cell(row, 'name', 200), _text_cell(row, 'file_path', 500)
+    if not name or not file_path:
+        raise ValueError('missing name or file path')
+    if not file_path.lower().endswith('.mp4'):
+        raise ValueError('file must be an MP4')
+    return file_path, Tutorial(
+        title=name,
+        description=_cell(row, 'description') or f'Local MP4 tutorial: {name}',
+        video_type='local',
+        local_file_path=file_path,
+    )
+
+
+# csv type -> (required columns, row parser, field the duplicates are matched on)
+TUTORIAL_SOURCES = {
+    'url': (['name', 'link'], _youtube_tutorial, 'video_url'),
+    'mp4': (['name', 'file_path'], _local_tutorial, 'local_file_path'),
+}
+
+
+def _parsed_rows(reader, parse, report):
+    """Yield (dedupe key, unsaved Tutorial) for the valid rows, rejecting the rest"""
+    try:
+        for row in reader:
+            if not any(row.values()):
+                continue
+            report.processed += 1
+            try:
+                yield parse(row)
+            except ValueError as e:
+                report.reject(reader.line_num, e)
+    except UnicodeDecodeError:
+        raise CSVImportError('CSV file must be UTF-8 encoded.')
+
+
+def import_tutorials(uploaded_file, csv_type, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Create tutorials from an uploaded CSV, skipping ones that already exist.
+
+    Duplicates are found with one lookup per chunk against the source field
+    (video_url or local_file_path) plus a set of the keys seen in this file.
+    Each chunk is committed on its own, so progress is visible while a large
+    file is imported and a re-run skips the rows that already made it in.
+    """
+    if csv_type not in TUTORIAL_SOURCES:
+        raise CSVImportError('Invalid CSV type selected.')
+    required_columns, parse, field = TUTORIAL_SOURCES[csv_type]
+
+    reader = open_csv(uploaded_file, required_columns)
+    report = ImportReport()
+    seen = set()
+    for chunk in chunked(_parsed_rows(reader, parse, report), batch_size):
+        keys = {key for key, _ in chunk}
+        seen.update(
+            Tutorial.objects.filter(**{f'{field}__in': keys - seen}).values_list(field, flat=True)
+        )
+        new_tutorials = []
+        for key, tutorial in chunk:
+            if key in seen:
+                report.duplicates += 1
+                continue
+            seen.add(key)
+            new_tutorials.append(tutorial)
+        Tutorial.objects.bulk_create(new_tutorials)
+        report.created += len(new_tutorials)
+        if progress:
+            progress(report)
+    return report
+
+
+# =========================
+# Question banks
+# =========================
+
+QUESTION_TYPES = {value for value, _ in Question.QUESTION_TYPES}
+
+TRUE_FALSE_OPTIONS = ['True', 'False']
+
+
+def _parse_options(value):
+    """Options as a JSON list or separated by "|" """
+    if value.startswith('['):
+        try:
+            options = json.loads(value)
+        except ValueError:
+            raise ValueError('options is not a valid JSON list')
+        if not isinstance(options, list):
+            raise ValueError('options is not a valid JSON list')
+        options = [str(option).strip() for option in options]
+    else:
+        options = [option.strip() for option in value.split('|')]
+    return [option for option in options if option]
+
+
+def _question(row):
+    question_text, correct_answer = _cell(row, 'question_text'), _cell(row, 'correct_answer')
+    if not question_text or not correct_answer:
+        raise ValueError('missing question_text or correct_answer')
+    if len(correct_answer) > 200:
+        raise ValueError('correct_answer is longer than 200 characters')
+
+    question_type = _cell(row, 'question_type') or 'multiple_choice'
+    if question_type not in QUESTION_TYPES:
+        raise ValueError(f'unknown question_type "{question_type}"')
+
+    if question_type == 'true_false':
+        options = TRUE_FALSE_OPTIONS
+    else:
+        options = _parse_options(_cell(row, 'options'))
+        if len(options) < 2:
+            raise ValueError('multiple choice questions need at least two options')
+    if normalize_answer(correct_answer) not in {normalize_answer(option) for option in options}:
+        raise ValueError('correct_answer is not one of the options')
+
+    return Question(
+        question_text=question_text,
+        question_type=question_type,
+        options=options if question_type == 'multiple_choice' else [],
+        correct_answer=correct_answer,
+        explanation=_cell(row, 'explanation') or None,
+        order=_int_cell(row, 'order', None),
+    )
+
+
+def _assessment(title, row):
+    return Assessment(
+        title=title[:200],
+        description=_cell(row, 'description') or f'{title} assessment',
+        time_limit=_int_cell(row, 'time_limit', 30, low=1),
+        pass_score=_int_cell(row, 'pass_score', 70, low=0, high=100),
+    )
+
+
+def import_question_bank(uploaded_file, assessment_name=None, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Create assessments and their questions from an uploaded CSV.
+
+    With `assessment_name` every row goes into one new assessment; otherwise
+    rows are grouped by their assessment_title column. The whole file is
+    validated first and nothing is written if any row is invalid; a valid
+    file is written in one transaction.
+    """
+    assessment_name = (assessment_name or '').strip()
+    required_columns = ['question_text', 'correct_answer']
+    if not assessment_name:
+        required_columns.insert(0, 'assessment_title')
+
+    reader = open_csv(uploaded_file, required_columns)
+    report = ImportReport()
+    # title -> (unsaved Assessment, [unsaved Question])
+    banks = {}
+    try:
+        for row in reader:
+            if not any(row.values()):
+                continue
+            report.processed += 1
+            if progress and report.processed % batch_size == 0:
+                progress(report)
+            try:
+                title = assessment_name or _cell(row, 'assessment_title')
+                if not title:
+                    raise ValueError('missing assessment_title')
+                if title not in banks:
+                    banks[title] = (_assessment(title, row), [])
+                questions = banks[title][1]
+                question = _question(row)
+                if question.order is None:
+                    question.order = len(questions) + 1
+                questions.append(question)
+            except ValueError as e:
+                report.reject(reader.line_num, e)
+    except UnicodeDecodeError:
+        raise CSVImportError('CSV file must be UTF-8 encoded.')
+
+    if report.invalid or not banks:
+        return report
+
+    with transaction.atomic():
+        for assessment, questions in banks.values():
+            assessment.save()
+            for question in questions:
+                question.assessment = assessment
+            Question.objects.bulk_create(questions, batch_size=batch_size)
+            report.created += len(questions)
+            report.assessments.append(assessment)
+        # bulk_create skips the signals that maintain the stored counts
+        Assessment.update_question_counts([assessment.pk for assessment in report.assessments])
+    return report
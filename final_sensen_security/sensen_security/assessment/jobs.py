@@ -0,0 +1,232 @@
+"""Background processing of CSV imports.
+
+upload_assessment stores the file and an ImportJob row and returns at once.
+The job is then run by one of two workers, picked with
+settings.IMPORT_JOBS_RUNNER:
+
+    'thread'   a small thread pool inside the web process starts working
+               through the queue as soon as the upload is committed (the
+               default); polling a job's status wakes it up again, so jobs
+               left behind by a restart are picked up
+    'command'  "manage.py process_import_jobs" picks up pending jobs, e.g.
+               from cron or a supervised loop with --loop
+
+Either way a job is claimed with a conditional UPDATE that writes a claim
+token and a lease, so a job is never run by two workers at once. The lease
+is renewed after every batch; a job whose worker died (the lease ran out)
+is claimed again, up to MAX_ATTEMPTS times, and the importers skip the
+rows an interrupted run already wrote. Counters are written after every
+batch for the import_job_status endpoint to report, and the uploaded file
+is deleted once the job is done or has failed.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .importers import CSVImportError, import_question_bank, import_tutorials
+from .models import ImportJob
+from .provisioning import provision_users
+
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may go without reporting progress before its job is
+# considered abandoned and handed to another worker
+LEASE = timedelta(minutes=15)
+
+# Claims of one job before it is failed instead of retried
+MAX_ATTEMPTS = 3
+
+_executor = None
+_lock = threading.Lock()
+_drain_queued = False
+
+
+def import_runner():
+    return getattr(settings, 'IMPORT_JOBS_RUNNER', 'thread')
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMPORT_WORKER_THREADS', 1),
+            thread_name_prefix='csv-import',
+        )
+    return _executor
+
+
+def count_rows(field_file):
+    """Data rows in the file, estimated from its line count"""
+    lines = 0
+    last = b''
+    with field_file.open('rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            lines += block.count(b'\n')
+            last = block
+    if last and not last.endswith(b'\n'):
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def enqueue_import(uploaded_file, kind, user=None, **options):
+    """Store the upload as a pending job and hand it to the configured worker"""
+    job = ImportJob(kind=kind, options=options, created_by=user)
+    job.file.save(uploaded_file.name, uploaded_file, save=False)
+    job.save()
+    transaction.on_commit(schedule_jobs)
+    return job
+
+
+def schedule_jobs():
+    """Have the thread worker run what is due; a no-op with the 'command' runner.
+
+    At most one run waits in the pool at a time: a queued run sees every job
+    committed before it starts.
+    """
+    global _drain_queued
+    if import_runner() != 'thread':
+        return
+    with _lock:
+        if _drain_queued:
+            return
+        _drain_queued = True
+    _get_executor().submit(_run_in_thread)
+
+
+def _run_in_thread():
+    global _drain_queued
+    with _lock:
+        _drain_queued = False
+    try:
+        process_pending_jobs()
+    except Exception:
+        logger.exception('Background import worker failed')
+    finally:
+        # Worker threads get their own connection; don't leave it open
+        connection.close()
+
+
+def _available(now):
+    """Jobs waiting for a worker: pending, or running with a lapsed lease"""
+    return Q(status='pending') | Q(status='running', lease_expires_at__lt=now)
+
+
+def claim_job(job_id):
+    """Claim a job for this worker; returns the claim token, or None if it isn't available"""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    claimed = ImportJob.objects.filter(_available(now), pk=job_id, attempts__lt=MAX_ATTEMPTS).update(
+        status='running', claimed_by=token, lease_expires_at=now + LEASE,
+        attempts=F('attempts') + 1, started_at=now,
+    )
+    return token if claimed else None
+
+
+def _counters(report):
+    return {
+        'rows_processed': report.processed,
+        'created_count': report.created,
+        'skipped_count': report.duplicates,
+        'failed_count': report.invalid,
+        'errors': report.errors,
+    }
+
+
+def _save_progress(job_id, token, report):
+    """Write the counters and renew the lease"""
+    ImportJob.objects.filter(pk=job_id, claimed_by=token).update(
+        lease_expires_at=timezone.now() + LEASE, **_counters(report),
+    )
+
+
+def _delete_upload(job):
+    if job.file:
+        job.file.delete(save=False)
+        ImportJob.objects.filter(pk=job.pk).update(file='')
+
+
+def fail_abandoned_jobs():
+    """Fail jobs whose workers died MAX_ATTEMPTS times, e.g. a file that crashes the process"""
+    abandoned = ImportJob.objects.filter(status='running', lease_expires_at__lt=timezone.now(),
+                                         attempts__gte=MAX_ATTEMPTS)
+    for job in abandoned:
+        failed = ImportJob.objects.filter(pk=job.pk, claimed_by=job.claimed_by, status='running').update(
+            status='failed', finished_at=timezone.now(),
+            message=f'The import was interrupted {job.attempts} times and has been stopped.',
+        )
+        if failed:
+            _delete_upload(job)
+
+
+def result_message(job, report):
+    if job.kind == 'assessment':
+        if report.invalid:
+            return f'No questions were imported: {report.invalid} invalid row(s). Fix them and upload again.'
+        if report.assessments:
+            titles = ', '.join(assessment.title for assessment in report.assessments)
+            return f'Imported {report.created} question(s) into {titles}.'
+        return 'No questions found in CSV.'
+    if job.kind == 'users':
+        return f'User provisioning finished: {report.summary()}'
+    if report.created or report.duplicates:
+        return f'Tutorial import finished: {report.summary()}'
+    return f'No tutorials were imported: {report.summary()}'
+
+
+def run_import_job(job_id):
+    """Run one available job to completion; returns False if someone else claimed it"""
+    token = claim_job(job_id)
+    if token is None:
+        return False
+    job = ImportJob.objects.get(pk=job_id)
+    ImportJob.objects.filter(pk=job_id, claimed_by=token).update(total_rows=count_rows(job.file))
+
+    def progress(report):
+        _save_progress(job_id, token, report)
+
+    def finish(**fields):
+        finished = ImportJob.objects.filter(pk=job_id, claimed_by=token).update(
+            finished_at=timezone.now(), **fields,
+        )
+        if finished:
+            _delete_upload(job)
+
+    try:
+        with job.file.open('rb') as f:
+            if job.kind == 'assessment':
+                report = import_question_bank(f, job.options.get('assessment_name'), progress=progress)
+            elif job.kind == 'users':
+                report = provision_users(f, progress=progress)
+            else:
+                report = import_tutorials(f, job.kind, progress=progress)
+    except CSVImportError as e:
+        finish(status='failed', message=str(e))
+    except Exception as e:
+        logger.exception('CSV import job %s failed', job_id)
+        finish(status='failed', message=f'Error processing CSV file: {e}')
+    else:
+        finish(status='done', message=result_message(job, report), **_counters(report))
+    return True
+
+
+def process_pending_jobs(limit=None):
+    """Run available jobs oldest first; returns how many this worker ran"""
+    processed = 0
+    while limit is None or processed < limit:
+        close_old_connections()
+        fail_abandoned_jobs()
+        job_id = ImportJob.objects.filter(_available(timezone.now()), attempts__lt=MAX_ATTEMPTS)\
+            .order_by('created_at').values_list('pk', flat=True).first()
+        if job_id is None:
+            break
+        if run_import_job(job_id):
+            processed += 1
+    return processed
@@ -0,0 +1,164 @@
+"""Materialized leaderboards.
+
+Each board is a set of LeaderboardEntry rows sharing a `board` key:
+
+    'all'                  every completed attempt
+    'assessment:<id>'      one assessment
+    'week:2026-W42'        attempts completed in that ISO week
+    'month:2026-10'        attempts completed in that month
+
+Rows are adjusted incrementally by stats.apply_attempt_change whenever an
+attempt is completed, retaken or deleted. Which boards are maintained is
+controlled by settings.LEADERBOARD_BOARDS.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import LeaderboardEntry, UserAssessmentAttempt
+
+
+DEFAULT_BOARDS = ('all', 'assessment', 'week', 'month')
+
+
+def enabled_boards():
+    return getattr(settings, 'LEADERBOARD_BOARDS', DEFAULT_BOARDS)
+
+
+def week_key(moment):
+    year, week, _ = timezone.localtime(moment).isocalendar()
+    return f'week:{year}-W{week:02}'
+
+
+def month_key(moment):
+    return f"month:{timezone.localtime(moment):%Y-%m}"
+
+
+def board_keys(assessment_id, completed_at):
+    """Keys of the enabled boards an attempt completed at `completed_at` counts towards"""
+    boards = enabled_boards()
+    keys = []
+    if 'all' in boards:
+        keys.append('all')
+    if 'assessment' in boards:
+        keys.append(f'assessment:{assessment_id}')
+    if completed_at is not None:
+        if 'week' in boards:
+            keys.append(week_key(completed_at))
+        if 'month' in boards:
+            keys.append(month_key(completed_at))
+    return keys
+
+
+def resolve_board(name):
+    """Map 'week'/'month' to the current period; other keys are used as given"""
+    if name == 'week':
+        return week_key(timezone.now())
+    if name == 'month':
+        return month_key(timezone.now())
+    return name or 'all'
+
+
+def apply_entry_delta(board, user_id, attempts, passes, score_sum):
+    """Add a delta to one user's entry on a board (call inside a transaction)"""
+    entries = LeaderboardEntry.objects.select_for_update()
+    if attempts > 0:
+        entry = entries.get_or_create(board=board, user_id=user_id)[0]
+    else:
+        entry = entries.filter(board=board, user_id=user_id).first()
+        if entry is None:
+            return
+
+    entry.attempts += attempts
+    entry.passes += passes
+    entry.score_sum += score_sum
+    if entry.attempts <= 0:
+        entry.delete()
+        return
+    entry.avg_score = entry.score_sum / entry.attempts
+    entry.save()
+
+
+def ranked(board='all'):
+    return LeaderboardEntry.objects.filter(board=board).order_by('-avg_score', '-attempts', 'user_id')
+
+
+def top_entries(board='all', limit=10):
+    """The top `limit` entries of a board, read straight off the board index"""
+    return list(ranked(board).select_related('user')[:limit])
+
+
+def user_rank(user, board='all'):
+    """Return (rank, entry) for a user on a board, or (None, None) if absent.
+
+    The rank is one plus the number of entries ordered ahead of the user's.
+    They are counted over one range of leaderboard_rank_idx (board, then
+    avg_score at or above the user's), with the tie-breaks on attempts and
+    user checked on the index entries. Finding the entry and the start of
+    the range is O(log n), but the count walks every entry ahead, so the
+    lookup is O(rank): a B-tree index keeps no subtree counts to skip them.
+    A user near the bottom of a board of 100,000 learners reads about that
+    many index entries. The home page caches the result per data version
+    (progress.home_rank), so this runs at most once per user per change to
+    the board.
+    """
+    entry = LeaderboardEntry.objects.filter(board=board, user=user).first()
+    if entry is None:
+        return None, None
+    ahead = LeaderboardEntry.objects.filter(board=board, avg_score__gte=entry.avg_score).filter(
+        Q(avg_score__gt=entry.avg_score)
+        | Q(attempts__gt=entry.attempts)
+        | Q(attempts=entry.attempts, user_id__lt=entry.user_id)
+    ).count()
+    return ahead + 1, entry
+
+
+def _entries(rows, board_for_row):
+    return [
+        LeaderboardEntry(
+            board=board_for_row(row),
+            user_id=row['user'],
+            attempts=row['attempts'],
+            passes=row['passes'],
+            score_sum=row['score_sum'],
+            avg_score=row['score_sum'] / row['attempts'],
+        )
+        for row in rows
+    ]
+
+
+@transaction.atomic
+def rebuild_leaderboards():
+    """Recompute every enabled board from the completed attempts"""
+    completed = UserAssessmentAttempt.objects.filter(is_completed=True).order_by()
+    aggregates = {
+        'attempts': Count('id'),
+        'passes': Count('id', filter=Q(is_passed=True)),
+        'score_sum': Sum('score'),
+    }
+    boards = enabled_boards()
+
+    LeaderboardEntry.objects.all().delete()
+
+    entries = []
+    if 'all' in boards:
+        entries += _entries(completed.values('user').annotate(**aggregates), lambda row: 'all')
+    if 'assessment' in boards:
+        entries += _entries(
+            completed.values('user', 'assessment').annotate(**aggregates),
+            lambda row: f"assessment:{row['assessment']}",
+        )
+    if 'week' in boards:
+        entries += _entries(
+            completed.annotate(period=TruncWeek('completed_at')).values('user', 'period').annotate(**aggregates),
+            lambda row: week_key(row['period']),
+        )
+    if 'month' in boards:
+        entries += _entries(
+            completed.annotate(period=TruncMonth('completed_at')).values('user', 'period').annotate(**aggregates),
+            lambda row: month_key(row['period']),
+        )
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
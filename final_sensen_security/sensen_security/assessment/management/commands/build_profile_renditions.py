@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from assessment.images import InvalidImage, build_renditions
+from assessment.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Build the thumbnail/card/full renditions of existing profile images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild profiles that already have renditions")
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(profile_image='').exclude(profile_image__isnull=True)
+        if not options['force']:
+            profiles = profiles.filter(image_thumbnail='') | profiles.filter(image_thumbnail__isnull=True)
+
+        built = failed = 0
+        for profile in profiles.order_by('pk').iterator(chunk_size=200):
+            try:
+                build_renditions(profile)
+            except (InvalidImage, FileNotFoundError) as e:
+                failed += 1
+                self.stderr.write(f"{profile.user_id}: {profile.profile_image.name}: {e}")
+            else:
+                built += 1
+        self.stdout.write(self.style.SUCCESS(f"Built renditions for {built} profile(s), {failed} failed."))
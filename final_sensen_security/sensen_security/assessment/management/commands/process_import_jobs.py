@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assessment.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Run pending CSV import jobs (use with IMPORT_JOBS_RUNNER = 'command')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs instead of exiting")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls with --loop")
+        parser.add_argument('--limit', type=int, help="Stop after this many jobs")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            limit = None if options['limit'] is None else options['limit'] - total
+            total += process_pending_jobs(limit)
+            if not options['loop'] or (options['limit'] is not None and total >= options['limit']):
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} import job(s)."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assessment.importers import CSVImportError
+from assessment.provisioning import PROVISION_BATCH_SIZE, provision_users
+
+
+class Command(BaseCommand):
+    help = "Create users and profiles in bulk from a CSV (email, first_name, last_name, emp_id, phone_number, password)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path to the CSV file")
+        parser.add_argument('--batch-size', type=int, default=PROVISION_BATCH_SIZE, help="Users written per batch")
+
+    def handle(self, *args, **options):
+        def progress(report):
+            self.stdout.write(f"{report.processed} row(s) read, {report.created} user(s) created")
+
+        try:
+            with open(options['csv_file'], 'rb') as f:
+                report = provision_users(f, batch_size=options['batch_size'], progress=progress)
+        except (OSError, CSVImportError) as e:
+            raise CommandError(e)
+
+        for error in report.errors:
+            self.stderr.write(error)
+        if report.unlisted_errors:
+            self.stderr.write(f"... and {report.unlisted_errors} more")
+        self.stdout.write(self.style.SUCCESS(report.summary()))
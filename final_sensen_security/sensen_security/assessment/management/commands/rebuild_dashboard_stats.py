@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from assessment.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the admin dashboard statistics and leaderboards from the completed attempts"
+
+    def handle(self, *args, **options):
+        assessment_count, entry_count = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt stats for {assessment_count} assessment(s) and {entry_count} leaderboard entries."
+        ))
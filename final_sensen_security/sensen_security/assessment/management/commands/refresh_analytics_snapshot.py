@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assessment.analytics import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = "Copy the database to the analytics snapshot (ANALYTICS_DATABASE = 'snapshot')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep refreshing instead of exiting")
+        parser.add_argument('--interval', type=float, default=300.0, help="Seconds between refreshes with --loop")
+
+    def handle(self, *args, **options):
+        if getattr(settings, 'ANALYTICS_DATABASE', '') != 'snapshot':
+            raise CommandError("ANALYTICS_DATABASE is not set to 'snapshot'.")
+        while True:
+            started = time.perf_counter()
+            refresh_snapshot()
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed {settings.ANALYTICS_SNAPSHOT_PATH} in {time.perf_counter() - started:.1f}s."
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from assessment.models import Assessment
+
+
+class Command(BaseCommand):
+    help = "Recount the stored question_count of every assessment"
+
+    def handle(self, *args, **options):
+        stale = list(
+            Assessment.objects.annotate(actual=Count('questions'))
+            .exclude(question_count=F('actual'))
+            .values_list('title', 'question_count', 'actual')
+        )
+        for title, stored, actual in stale:
+            self.stdout.write(f"{title}: {stored} -> {actual}")
+
+        Assessment.update_question_counts()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(stale)} assessment(s)."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assessment.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = "Send queued emails (use with EMAIL_OUTBOX_RUNNER = 'command')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new emails instead of exiting")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop")
+        parser.add_argument('--limit', type=int, help="Stop after this many emails")
+
+    def handle(self, *args, **options):
+        sent = failed = 0
+        while True:
+            limit = None if options['limit'] is None else options['limit'] - sent - failed
+            batch_sent, batch_failed = send_pending(limit)
+            sent += batch_sent
+            failed += batch_failed
+            if not options['loop'] or (options['limit'] is not None and sent + failed >= options['limit']):
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s), {failed} failed."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assessment.models import Assessment
+from assessment.reminders import send_reminders
+
+
+class Command(BaseCommand):
+    help = "Queue reminder emails for users who haven't completed the given assessments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('assessment_ids', nargs='*', type=int, help="Assessments to remind about")
+        parser.add_argument('--active', action='store_true', help="Remind about every active assessment")
+        parser.add_argument('--url', default='', help="Link to the assessments page included in the email")
+
+    def handle(self, *args, **options):
+        assessment_ids = list(options['assessment_ids'])
+        if options['active']:
+            assessment_ids += Assessment.objects.filter(is_active=True).values_list('id', flat=True)
+        if not assessment_ids:
+            raise CommandError("Give assessment ids or --active.")
+        queued = send_reminders(assessment_ids, options['url'])
+        self.stdout.write(self.style.SUCCESS(f"Queued reminders for {queued} user(s)."))
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_stats(apps, schema_editor):
+    UserAssessmentAttempt = apps.get_model('assessment', 'UserAssessmentAttempt')
+    AssessmentStats = apps.get_model('assessment', 'AssessmentStats')
+    UserStats = apps.get_model('assessment', 'UserStats')
+
+    completed = UserAssessmentAttempt.objects.filter(is_completed=True).order_by()
+    aggregates = {
+        'attempts': models.Count('id'),
+        'passes': models.Count('id', filter=models.Q(is_passed=True)),
+        'score_sum': models.Sum('score'),
+    }
+    AssessmentStats.objects.bulk_create([
+        AssessmentStats(assessment_id=row['assessment'], attempts=row['attempts'],
+                        passes=row['passes'], score_sum=row['score_sum'])
+        for row in completed.values('assessment').annotate(**aggregates)
+    ])
+    UserStats.objects.bulk_create([
+        UserStats(user_id=row['user'], attempts=row['attempts'], passes=row['passes'],
+                  score_sum=row['score_sum'], avg_score=row['score_sum'] / row['attempts'])
+        for row in completed.values('user').annotate(**aggregates)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assessment', '0006_alter_profile_emp_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('passes', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0)),
+                ('avg_score', models.FloatField(db_index=True, default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='assessment_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssessmentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('passes', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assessment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='assessment.assessment')),
+            ],
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:49
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_question_counts(apps, schema_editor):
+    Assessment = apps.get_model('assessment', 'Assessment')
+    Question = apps.get_model('assessment', 'Question')
+    counts = Question.objects.filter(assessment=models.OuterRef('pk'))\
+        .order_by()\
+        .values('assessment')\
+        .annotate(count=models.Count('id'))\
+        .values('count')
+    Assessment.objects.update(question_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0007_assessment_stats_user_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_question_counts, migrations.RunPython.noop),
+    ]
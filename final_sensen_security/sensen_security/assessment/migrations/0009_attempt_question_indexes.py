@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0008_assessment_question_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['assessment', 'order'], name='question_assessment_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userassessmentattempt',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['user', '-completed_at'], name='attempt_user_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userassessmentattempt',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['-completed_at'], name='attempt_recent_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userassessmentattempt',
+            index=models.Index(condition=models.Q(('is_completed', True), ('is_passed', True)), fields=['completed_at'], name='attempt_passed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userassessmentattempt',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['assessment', 'user'], name='attempt_assessment_done_idx'),
+        ),
+    ]
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def _week_key(period):
+    year, week, _ = timezone.localtime(period).isocalendar()
+    return f'week:{year}-W{week:02}'
+
+
+def _month_key(period):
+    return f"month:{timezone.localtime(period):%Y-%m}"
+
+
+def populate_boards(apps, schema_editor):
+    """Fill the per-assessment, week and month boards; 'all' is the renamed UserStats"""
+    UserAssessmentAttempt = apps.get_model('assessment', 'UserAssessmentAttempt')
+    LeaderboardEntry = apps.get_model('assessment', 'LeaderboardEntry')
+
+    boards = getattr(settings, 'LEADERBOARD_BOARDS', ('all', 'assessment', 'week', 'month'))
+    completed = UserAssessmentAttempt.objects.filter(is_completed=True).order_by()
+    aggregates = {
+        'attempts': models.Count('id'),
+        'passes': models.Count('id', filter=models.Q(is_passed=True)),
+        'score_sum': models.Sum('score'),
+    }
+    grouped = []
+    if 'assessment' in boards:
+        grouped.append((
+            completed.values('user', 'assessment'),
+            lambda row: f"assessment:{row['assessment']}",
+        ))
+    if 'week' in boards:
+        grouped.append((
+            completed.annotate(period=TruncWeek('completed_at')).values('user', 'period'),
+            lambda row: _week_key(row['period']),
+        ))
+    if 'month' in boards:
+        grouped.append((
+            completed.annotate(period=TruncMonth('completed_at')).values('user', 'period'),
+            lambda row: _month_key(row['period']),
+        ))
+
+    LeaderboardEntry.objects.exclude(board='all').delete()
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(
+            board=board_for_row(row), user_id=row['user'], attempts=row['attempts'], passes=row['passes'],
+            score_sum=row['score_sum'], avg_score=row['score_sum'] / row['attempts'],
+        )
+        for rows, board_for_row in grouped
+        for row in rows.annotate(**aggregates)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assessment', '0009_attempt_question_indexes'),
+    ]
+
+    operations = [
+        # The per-user stats rows become the 'all' board of the leaderboard
+        migrations.RenameModel(
+            old_name='UserStats',
+            new_name='LeaderboardEntry',
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='board',
+            field=models.CharField(default='all', max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='avg_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardentry',
+            unique_together={('board', 'user')},
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', '-avg_score', '-attempts', 'user'], name='leaderboard_rank_idx'),
+        ),
+        migrations.RunPython(populate_boards, migrations.RunPython.noop),
+    ]
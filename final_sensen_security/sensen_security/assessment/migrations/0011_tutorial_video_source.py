@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0010_leaderboard_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorial',
+            name='local_file_path',
+            field=models.CharField(blank=True, db_index=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='video_type',
+            field=models.CharField(choices=[('youtube', 'YouTube'), ('local', 'Local MP4')], default='youtube', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='tutorial',
+            name='video_url',
+            field=models.URLField(blank=True, db_index=True, help_text='YouTube or other video URL'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assessment', '0012_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorialProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_progress', models.FloatField(default=0)),
+                ('current_position', models.FloatField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tutorial', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='assessment.tutorial')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tutorial_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'tutorial')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0013_tutorial_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='image_card',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profiles/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='image_full',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profiles/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profiles/renditions/'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# Case-insensitive prefix searches (istartswith -> LIKE 'term%') can only use
+# an index built with the NOCASE collation on SQLite. auth_user belongs to
+# django.contrib.auth, so these indexes are managed here with raw SQL.
+INDEXES = [
+    ('auth_user_first_name_nocase_idx', 'auth_user', 'first_name COLLATE NOCASE'),
+    ('auth_user_last_name_nocase_idx', 'auth_user', 'last_name COLLATE NOCASE'),
+    ('auth_user_email_nocase_idx', 'auth_user', 'email COLLATE NOCASE'),
+    ('auth_user_date_joined_idx', 'auth_user', 'date_joined'),
+    ('auth_user_last_login_idx', 'auth_user', 'last_login'),
+    ('profile_emp_id_nocase_idx', 'assessment_profile', 'emp_id COLLATE NOCASE'),
+    ('profile_user_code_nocase_idx', 'assessment_profile', 'user_code COLLATE NOCASE'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, table, columns in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns})')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0014_profile_image_renditions'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
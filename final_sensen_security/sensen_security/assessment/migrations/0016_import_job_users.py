@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0015_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='kind',
+            field=models.CharField(choices=[('url', 'YouTube tutorials'), ('mp4', 'Local MP4 tutorials'), ('assessment', 'Question bank'), ('users', 'Users')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0017_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='answer_key_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
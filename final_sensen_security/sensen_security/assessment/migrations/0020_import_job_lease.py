@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:49
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def expire_running_jobs(apps, schema_editor):
+    # Jobs running before leases existed are handed to the next worker
+    ImportJob = apps.get_model('assessment', 'ImportJob')
+    ImportJob.objects.filter(status='running').update(lease_expires_at=timezone.now(), attempts=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0019_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(expire_running_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('assessment', '0020_import_job_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='reminderrecipient',
+            constraint=models.UniqueConstraint(fields=('campaign', 'user'), name='unique_reminder_recipient'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:20
+
+from django.db import migrations
+
+
+def clear_failed_bodies(apps, schema_editor):
+    # Failed emails used to keep their bodies, temporary passwords included
+    OutboxEmail = apps.get_model('assessment', 'OutboxEmail')
+    OutboxEmail.objects.filter(status='failed').update(body='', html_body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0021_reminder_recipient'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_failed_bodies, migrations.RunPython.noop),
+    ]
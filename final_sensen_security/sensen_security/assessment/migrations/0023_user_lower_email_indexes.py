@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:30
+
+from django.db import migrations
+
+
+# User provisioning looks up every email of a batch with Lower('email') and
+# Lower('username') IN (...); SQLite only serves that from an index on the
+# same expression. auth_user belongs to django.contrib.auth, so like the
+# indexes of 0015 these are managed here with raw SQL.
+INDEXES = [
+    ('auth_user_email_lower_idx', 'auth_user', 'LOWER("email")'),
+    ('auth_user_username_lower_idx', 'auth_user', 'LOWER("username")'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, table, columns in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns})')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0022_clear_failed_outbox_bodies'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -1,10 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
 from django.dispatch import receiver
 import os
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 # =========================
 # Assessment & Questions
@@ -17,13 +20,45 @@ class Assessment(models.Model):
     pass_score = models.IntegerField(default=70, validators=[MinValueValidator(0), MaxValueValidator(100)])
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped whenever a question changes; part of the cached answer key's name
+    answer_key_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Kept up to date with UPDATEs by the question signals below
+    MAINTAINED_FIELDS = ('question_count', 'answer_key_version')
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Don't write back a stale copy of the maintained columns
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def total_questions(self):
-        return self.questions.count()
+        return self.question_count
+
+    @classmethod
+    def update_question_counts(cls, assessment_ids=None):
+        """Recount stored question counts (all assessments when no ids are given)"""
+        counts = Question.objects.filter(assessment=OuterRef('pk'))\
+            .order_by()\
+            .values('assessment')\
+            .annotate(count=Count('id'))\
+            .values('count')
+        assessments = cls.objects.all()
+        if assessment_ids is not None:
+            assessments = assessments.filter(pk__in=assessment_ids)
+        return assessments.update(question_count=Coalesce(Subquery(counts), 0))
+
+    @classmethod
+    def bump_answer_key_versions(cls, assessment_ids):
+        return cls.objects.filter(pk__in=assessment_ids).update(answer_key_version=F('answer_key_version') + 1)
 
 
 class Question(models.Model):
@@ -42,10 +77,23 @@ class Question(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['assessment', 'order'], name='question_assessment_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.assessment.title} - Q{self.order}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded assessment so moving a question recounts both sides
+        instance._loaded_assessment_id = instance.__dict__.get('assessment_id')
+        return instance
+
+    def affected_assessment_ids(self):
+        return {self.assessment_id, getattr(self, '_loaded_assessment_id', None)} - {None}
+
 
 # =========================
 # User Attempts & Answers
@@ -64,6 +112,30 @@ class UserAssessmentAttempt(models.Model):
 
     class Meta:
         unique_together = ['user', 'assessment']
+        # Partial indexes: Django filters booleans as a bare "WHERE is_completed",
+        # which SQLite can only serve from an index with the same condition
+        indexes = [
+            # home: a user's completed count and most recent attempts
+            models.Index(
+                fields=['user', '-completed_at'], condition=Q(is_completed=True),
+                name='attempt_user_completed_idx',
+            ),
+            # admin_dashboard: completed counts and latest results, attempt timelines
+            models.Index(
+                fields=['-completed_at'], condition=Q(is_completed=True),
+                name='attempt_recent_completed_idx',
+            ),
+            # admin_dashboard: passed counts and pass-rate timelines
+            models.Index(
+                fields=['completed_at'], condition=Q(is_completed=True, is_passed=True),
+                name='attempt_passed_idx',
+            ),
+            # admin_dashboard overview: completed/pending users per assessment
+            models.Index(
+                fields=['assessment', 'user'], condition=Q(is_completed=True),
+                name='attempt_assessment_done_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.assessment.title} - {self.score}%"
@@ -79,14 +151,93 @@ class UserAnswer(models.Model):
         return f"{self.attempt.user.username} - Q{self.question.order}"
 
 
+# =========================
+# Dashboard Statistics
+# =========================
+
+class AssessmentStats(models.Model):
+    """Running totals of completed attempts for one assessment"""
+    assessment = models.OneToOneField(Assessment, on_delete=models.CASCADE, related_name='stats')
+    attempts = models.PositiveIntegerField(default=0)
+    passes = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.assessment.title} - {self.attempts} attempts"
+
+    @property
+    def failures(self):
+        return self.attempts - self.passes
+
+    @property
+    def avg_score(self):
+        return (self.score_sum / self.attempts) if self.attempts > 0 else 0
+
+
+class DataVersion(models.Model):
+    """A counter bumped whenever the data behind cached reports changes.
+
+    Kept in the database rather than the cache so a bump made by one worker
+    is seen by every other worker.
+    """
+    name = models.CharField(max_length=40, primary_key=True)
+    value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name} v{self.value}"
+
+    @classmethod
+    def current(cls, *names):
+        """Values of the named versions, read in one query; a version never bumped is 1"""
+        values = dict(cls.objects.filter(name__in=names).values_list('name', 'value'))
+        return [values.get(name, 1) for name in names]
+
+    @classmethod
+    def bump(cls, name):
+        versions = cls.objects.filter(name=name)
+        if not versions.update(value=F('value') + 1):
+            _, created = cls.objects.get_or_create(name=name, defaults={'value': 2})
+            if not created:
+                versions.update(value=F('value') + 1)
+
+
+class LeaderboardEntry(models.Model):
+    """Running totals of one user's completed attempts on one leaderboard"""
+    board = models.CharField(max_length=40, default='all')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    attempts = models.PositiveIntegerField(default=0)
+    passes = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0)
+    avg_score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['board', 'user']
+        indexes = [
+            models.Index(fields=['board', '-avg_score', '-attempts', 'user'], name='leaderboard_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.board} - {self.user.username} - {self.avg_score:.1f}%"
+
+
 # =========================
 # Tutorials
 # =========================
 
 class Tutorial(models.Model):
+    VIDEO_TYPES = [
+        ('youtube', 'YouTube'),
+        ('local', 'Local MP4'),
+    ]
+
     title = models.CharField(max_length=200)
     description = models.TextField()
-    video_url = models.URLField(help_text="YouTube or other video URL")
+    video_type = models.CharField(max_length=10, choices=VIDEO_TYPES, default='youtube')
+    # Both sources are indexed for the duplicate checks of the CSV importer
+    video_url = models.URLField(blank=True, db_index=True, help_text="YouTube or other video URL")
+    local_file_path = models.CharField(max_length=500, blank=True, db_index=True)
     thumbnail = models.ImageField(upload_to='tutorials/', blank=True, null=True)
     category = models.CharField(max_length=100, default='Security Awareness')
     is_active = models.BooleanField(default=True)
@@ -117,6 +268,130 @@ class Tutorial(models.Model):
         return True
 
 
+class TutorialProgress(models.Model):
+    """How far a user has watched a tutorial; max_progress only ever grows"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tutorial_progress')
+    tutorial = models.ForeignKey(Tutorial, on_delete=models.CASCADE, related_name='progress')
+    max_progress = models.FloatField(default=0)
+    current_position = models.FloatField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['user', 'tutorial']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.tutorial.title} - {self.max_progress:.0f}%"
+
+    @property
+    def completed(self):
+        return self.completed_at is not None
+
+
+# =========================
+# CSV Import Jobs
+# =========================
+
+class ImportJob(models.Model):
+    """An uploaded CSV waiting for, or being processed by, a background worker"""
+    KINDS = [
+        ('url', 'YouTube tutorials'),
+        ('mp4', 'Local MP4 tutorials'),
+        ('assessment', 'Question bank'),
+        ('users', 'Users'),
+    ]
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    file = models.FileField(upload_to='imports/')
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    total_rows = models.PositiveIntegerField(default=0, help_text="Estimated from the line count")
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Set by the worker running the job; an expired lease means it died
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest pending job
+            models.Index(fields=['status', 'created_at'], name='importjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} import #{self.pk} - {self.status}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+
+# =========================
+# Email Outbox
+# =========================
+
+class OutboxEmail(models.Model):
+    """A queued email, sent in batches by assessment/outbox.py"""
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Also pushed forward while a worker holds the email (see claim_batch)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers pick the pending emails that are due
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class ReminderRecipient(models.Model):
+    """A user already sent a reminder by a campaign (see assessment/reminders.py)"""
+    campaign = models.CharField(max_length=64)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'user'], name='unique_reminder_recipient'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign} -> {self.user}"
+
+
 # =========================
 # Profile & Admin Profile
 # =========================
@@ -124,16 +399,76 @@ class Tutorial(models.Model):
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     profile_image = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # Fixed-size renditions of profile_image, written by assessment/images.py
+    image_thumbnail = models.ImageField(upload_to='profiles/renditions/', blank=True, null=True, editable=False)
+    image_card = models.ImageField(upload_to='profiles/renditions/', blank=True, null=True, editable=False)
+    image_full = models.ImageField(upload_to='profiles/renditions/', blank=True, null=True, editable=False)
     phone_number = models.CharField(max_length=10, blank=True)
     gender = models.CharField(max_length=10, choices=[('Male', 'Male'), ('Female', 'Female')], blank=True)
     address = models.TextField(blank=True)
     emp_id = models.CharField(max_length=50, unique=True, blank=True, null=True)
     user_code = models.CharField(max_length=100, unique=True)
 
+    RENDITION_FIELDS = ('image_thumbnail', 'image_card', 'image_full')
 
     def __str__(self):
         return self.user.username
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and 'profile_image' in self.changed_fields():
+            # Renditions of the previous picture must not outlive it, however
+            # the picture was changed (set_profile_image, the Django admin)
+            self._clear_renditions()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.RENDITION_FIELDS}
+        super().save(*args, **kwargs)
+
+    def _clear_renditions(self):
+        stale = [
+            (getattr(self, field).storage, getattr(self, field).name)
+            for field in self.RENDITION_FIELDS if getattr(self, field)
+        ]
+        for field in self.RENDITION_FIELDS:
+            setattr(self, field, None)
+
+        def delete_stale_files():
+            for storage, name in stale:
+                storage.delete(name)
+
+        if stale:
+            transaction.on_commit(delete_stale_files)
+
+    def tracked_values(self):
+        deferred = self.get_deferred_fields()
+        return {
+            field.name: field.value_to_string(self)
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in deferred
+        }
+
+    def changed_fields(self):
+        """Names of the fields changed since the profile was loaded or last saved"""
+        saved = getattr(self, '_saved_values', {})
+        return [name for name, value in self.tracked_values().items() if saved.get(name) != value]
+
+    def _image_url(self, rendition):
+        # Fall back to the original until the renditions have been built
+        image = rendition or self.profile_image
+        return image.url if image else None
+
+    @property
+    def thumbnail_url(self):
+        return self._image_url(self.image_thumbnail)
+
+    @property
+    def card_url(self):
+        return self._image_url(self.image_card)
+
+    @property
+    def full_url(self):
+        return self._image_url(self.image_full)
+
 
 class AdminProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -165,7 +500,83 @@ def create_or_update_profile(sender, instance, created, **kwargs):
             )
         except IntegrityError as e:
             print("IntegrityError during profile creation:", e)
-    else:
-        # Avoid saving if profile doesn't exist
-        if hasattr(instance, 'profile'):
-            instance.profile.save()
\ No newline at end of file
+    elif User.profile.is_cached(instance):
+        # Only a profile that was loaded and changed alongside the user is
+        # saved; logins (last_login updates) don't touch it
+        changed = instance.profile.changed_fields()
+        if changed:
+            instance.profile.save(update_fields=changed)
+
+
+@receiver([post_init, post_save], sender=Profile)
+def remember_profile_values(sender, instance, **kwargs):
+    instance._saved_values = instance.tracked_values()
+
+
+# =========================
+# Signals for Answer Key Cache
+# =========================
+@receiver([post_save, post_delete], sender=Question)
+def bump_question_answer_key(sender, instance, **kwargs):
+    # Every process looks up the new version with the assessment it loads,
+    # so none of them grades against a key cached before this change
+    Assessment.bump_answer_key_versions(instance.affected_assessment_ids())
+
+
+# =========================
+# Signal for Stored Question Counts
+# =========================
+@receiver([post_save, post_delete], sender=Question)
+def update_assessment_question_count(sender, instance, **kwargs):
+    Assessment.update_question_counts(instance.affected_assessment_ids())
+    instance._loaded_assessment_id = instance.assessment_id
+
+
+# =========================
+# Signals for Dashboard Statistics
+# =========================
+@receiver(post_save, sender=User)
+def bump_dashboard_data_version(sender, instance, created, **kwargs):
+    # New users change the growth chart
+    if created:
+        from .stats import bump_data_version
+        bump_data_version()
+
+
+@receiver(pre_save, sender=UserAssessmentAttempt)
+def read_stored_attempt(sender, instance, **kwargs):
+    from .stats import stored_attempt
+    instance._stored_for_stats = None if instance._state.adding else stored_attempt(instance.pk)
+
+
+@receiver(post_save, sender=UserAssessmentAttempt)
+def record_saved_attempt(sender, instance, **kwargs):
+    # Submissions, retakes and admin edits all go through here
+    from .stats import record_attempt
+    record_attempt(instance, getattr(instance, '_stored_for_stats', None))
+
+
+@receiver(post_delete, sender=UserAssessmentAttempt)
+def forget_deleted_attempt(sender, instance, **kwargs):
+    from .stats import forget_attempt
+    forget_attempt(instance)
+
+
+# =========================
+# Signals for Home Progress Summaries
+# =========================
+@receiver([post_save, post_delete], sender=Assessment)
+def bump_active_assessments_version(sender, instance, **kwargs):
+    # Activation changes alter every user's progress percentage
+    from .progress import bump_active_assessments_version
+    bump_active_assessments_version()
+
+
+@receiver([post_save, post_delete], sender=UserAssessmentAttempt)
+def bump_attempt_progress_version(sender, instance, **kwargs):
+    # Submissions, admin edits and deletions all change the user's summary;
+    # an attempt moved to another user changes the previous owner's too
+    from .progress import bump_user_progress_version
+    stored = getattr(instance, '_stored_for_stats', None)
+    for user_id in {instance.user_id, stored[0] if stored else instance.user_id}:
+        bump_user_progress_version(user_id)
@@ -0,0 +1,240 @@
+"""Email outbox.
+
+Views queue emails with queue_email() and return at once; the emails are
+stored as OutboxEmail rows and sent by send_pending():
+
+    - due emails are claimed in batches (settings.EMAIL_OUTBOX_BATCH_SIZE)
+      by writing a claim token and pushing next_attempt_at forward, so two
+      workers never send the same email and a crashed worker's batch is
+      picked up again once the lease runs out;
+    - each batch goes out over one connection from get_connection(),
+      opened once and reused for every message;
+    - a failed email is retried with exponential backoff (RETRY_DELAY,
+      doubled per attempt) and marked failed after MAX_ATTEMPTS.
+
+Bodies can hold temporary passwords and reset links, so they are cleared
+once an email is sent or has failed for good; only the subject,
+recipients and last error are kept.
+
+Like CSV imports (see jobs.py), settings.EMAIL_OUTBOX_RUNNER picks the
+worker: 'thread' drains the outbox in a background thread once the
+queueing transaction commits, 'command' leaves it to
+"manage.py send_outbox --loop". After each drain the thread worker sets a
+timer for the earliest next_attempt_at still pending, so retries and
+batches whose lease ran out are sent without waiting for another email to
+be queued. Those timers live in the web process: emails left behind by a
+restart go out with the next queued email, so deployments that restart
+often or run several processes should use the 'command' runner.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .importers import chunked
+from .models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold a claimed batch before others may take it
+LEASE = timedelta(minutes=5)
+
+_executor = None
+_lock = threading.Lock()
+# The timer that wakes the thread worker for the next retry, and when it fires
+_timer = None
+_wake_at = None
+
+
+def outbox_runner():
+    return getattr(settings, 'EMAIL_OUTBOX_RUNNER', 'thread')
+
+
+def batch_size():
+    return getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+    return _executor
+
+
+def _run_in_thread(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background email task %s failed', func.__name__)
+    finally:
+        # Worker threads get their own connection; don't leave it open
+        connection.close()
+
+
+def run_in_background(func, *args):
+    """Run func on the outbox thread once the current transaction commits.
+
+    With the 'command' runner there is no such thread and func runs now.
+    """
+    if outbox_runner() == 'thread':
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, func, *args))
+    else:
+        func(*args)
+
+
+def schedule_drain():
+    """Have the thread worker send what is due once the current transaction commits"""
+    if outbox_runner() == 'thread':
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, _drain))
+
+
+def _drain():
+    send_pending()
+    _schedule_wakeup()
+
+
+def _schedule_wakeup():
+    """Set a timer for the next retry or lapsed lease, unless an earlier one is set"""
+    global _timer, _wake_at
+    due = OutboxEmail.objects.filter(status='pending').aggregate(at=Min('next_attempt_at'))['at']
+    if due is None:
+        return
+    with _lock:
+        if _timer is not None:
+            if _wake_at <= due:
+                return
+            _timer.cancel()
+        _wake_at = due
+        _timer = threading.Timer(max((due - timezone.now()).total_seconds(), 0), _wake)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _wake():
+    global _timer
+    with _lock:
+        _timer = None
+    _get_executor().submit(_run_in_thread, _drain)
+
+
+def queue_email(subject, body, recipients, from_email=None, html_body=''):
+    """Store an email for the outbox worker; returns the OutboxEmail"""
+    email = OutboxEmail.objects.create(
+        subject=subject[:255], body=body, html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '', to=list(recipients),
+    )
+    schedule_drain()
+    return email
+
+
+def queue_emails(messages, from_email=None, batch_size=1000):
+    """Store many emails with bulk inserts; `messages` yields (subject, body, recipients).
+
+    Returns how many were queued. Only `batch_size` emails are held in memory.
+    """
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL or ''
+    queued = 0
+    for chunk in chunked(messages, batch_size):
+        OutboxEmail.objects.bulk_create([
+            OutboxEmail(subject=subject[:255], body=body, from_email=from_email, to=list(recipients))
+            for subject, body, recipients in chunk
+        ])
+        queued += len(chunk)
+    if queued:
+        schedule_drain()
+    return queued
+
+
+def claim_batch(limit):
+    """Claim up to `limit` due emails for this worker"""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = OutboxEmail.objects.filter(status='pending', next_attempt_at__lte=now)\
+        .order_by('next_attempt_at', 'pk').values('pk')[:limit]
+    OutboxEmail.objects.filter(pk__in=due, status='pending', next_attempt_at__lte=now)\
+        .update(claimed_by=token, next_attempt_at=now + LEASE)
+    return list(OutboxEmail.objects.filter(claimed_by=token, status='pending').order_by('pk'))
+
+
+def _message(email, mail_connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email or None, email.to, connection=mail_connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _failed(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    if email.attempts >= getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5):
+        email.status = 'failed'
+        email.body = email.html_body = ''
+        logger.error('Giving up on email %s to %s: %s', email.pk, email.to, error)
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    email.claimed_by = ''
+    return email
+
+
+def send_batch(emails):
+    """Send claimed emails over one connection; returns (sent, failed)"""
+    sent, failed = [], []
+    now = timezone.now()
+    mail_connection = get_connection(fail_silently=False)
+    try:
+        mail_connection.open()
+    except Exception as e:
+        # Nothing could be sent; every email in the batch waits for a retry
+        failed = [_failed(email, e, now) for email in emails]
+    else:
+        try:
+            for email in emails:
+                try:
+                    mail_connection.send_messages([_message(email, mail_connection)])
+                except Exception as e:
+                    failed.append(_failed(email, e, now))
+                else:
+                    email.status, email.sent_at, email.claimed_by = 'sent', now, ''
+                    # Don't keep reset links or passwords around once delivered
+                    email.body = email.html_body = ''
+                    sent.append(email)
+        finally:
+            mail_connection.close()
+
+    OutboxEmail.objects.bulk_update(sent, ['status', 'sent_at', 'body', 'html_body', 'claimed_by'])
+    OutboxEmail.objects.bulk_update(
+        failed, ['status', 'attempts', 'last_error', 'next_attempt_at', 'claimed_by', 'body', 'html_body'],
+    )
+    return len(sent), len(failed)
+
+
+def send_pending(limit=None):
+    """Send due emails batch by batch; returns (sent, failed) totals"""
+    totals = [0, 0]
+    while limit is None or totals[0] + totals[1] < limit:
+        size = batch_size() if limit is None else min(batch_size(), limit - totals[0] - totals[1])
+        emails = claim_batch(size)
+        if not emails:
+            break
+        sent, failed = send_batch(emails)
+        totals[0] += sent
+        totals[1] += failed
+        if not sent:
+            # The mail server is down or refusing everything; retry later
+            break
+    return tuple(totals)
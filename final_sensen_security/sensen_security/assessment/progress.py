@@ -0,0 +1,120 @@
+"""Cached per-user progress summary for the home page.
+
+The summary (completed count, progress percentage and the last few
+completed attempts) is stored under a per-user key that also embeds two
+versions kept in the DataVersion table:
+
+    progress:<user id>:v<active assessments version>.<user version>
+
+Saving or deleting any of the user's attempts (a submission, an admin
+edit) bumps the user's version; saving or deleting an assessment bumps
+the active assessments version, so every user's summary is rebuilt on
+their next visit. Nothing is deleted from the cache: the versions live in
+the database, so a bump made by one worker changes the key in all of them
+and old entries simply expire.
+
+The home leaderboard and the user's rank change with everyone's
+submissions, so they are keyed on the dashboard data version instead. The
+home page reads all three versions with one query (home_versions).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .leaderboard import top_entries, user_rank
+from .models import Assessment, DataVersion, UserAssessmentAttempt
+from .stats import DATA_VERSION_NAME, data_version
+
+
+RECENT_ATTEMPTS = 5
+HOME_LEADERBOARD_SIZE = 10
+
+ACTIVE_VERSION_NAME = 'active_assessments'
+
+
+def summary_timeout():
+    return getattr(settings, 'PROGRESS_SUMMARY_TIMEOUT', 300)
+
+
+def user_version_name(user_id):
+    return f'progress:{user_id}'
+
+
+def bump_active_assessments_version():
+    DataVersion.bump(ACTIVE_VERSION_NAME)
+
+
+def bump_user_progress_version(user_id):
+    DataVersion.bump(user_version_name(user_id))
+
+
+def summary_version(user_id):
+    return '{}.{}'.format(*DataVersion.current(ACTIVE_VERSION_NAME, user_version_name(user_id)))
+
+
+def home_versions(user_id):
+    """(dashboard data version, summary version) for the user's home page, in one query"""
+    data, active, user = DataVersion.current(DATA_VERSION_NAME, ACTIVE_VERSION_NAME, user_version_name(user_id))
+    return data, f'{active}.{user}'
+
+
+def summary_cache_key(user_id, version=None):
+    return f'progress:{user_id}:v{version or summary_version(user_id)}'
+
+
+def build_progress_summary(user_id):
+    completed = UserAssessmentAttempt.objects.filter(user_id=user_id, is_completed=True)
+    completed_assessments = completed.count()
+    total_assessments = Assessment.objects.filter(is_active=True).count()
+    progress_percentage = (completed_assessments / total_assessments * 100) if total_assessments > 0 else 0
+
+    recent_attempts = list(
+        completed.order_by('-completed_at')
+        .annotate(title=F('assessment__title'))
+        .values('title', 'score', 'is_passed', 'completed_at')[:RECENT_ATTEMPTS]
+    )
+    return {
+        'completed_assessments': completed_assessments,
+        'total_assessments': total_assessments,
+        'progress_percentage': round(progress_percentage, 1),
+        'recent_attempts': recent_attempts,
+    }
+
+
+def get_progress_summary(user, version=None):
+    """Return the user's summary, building and caching it on a miss"""
+    key = summary_cache_key(user.pk, version)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_progress_summary(user.pk)
+        cache.set(key, summary, summary_timeout())
+    return summary
+
+
+def home_leaderboard(version=None):
+    key = f'progress:leaderboard:v{version or data_version()}'
+    leaderboard = cache.get(key)
+    if leaderboard is None:
+        leaderboard = [
+            {
+                'user__username': entry.user.username,
+                'user__first_name': entry.user.first_name,
+                'user__last_name': entry.user.last_name,
+                'avg_score': entry.avg_score,
+                'total_completed': entry.attempts,
+            }
+            for entry in top_entries('all', HOME_LEADERBOARD_SIZE)
+        ]
+        cache.set(key, leaderboard, summary_timeout())
+    return leaderboard
+
+
+def home_rank(user, version=None):
+    """The user's rank on the 'all' board, or None if they have no completed attempts"""
+    key = f'progress:{user.pk}:rank:v{version or data_version()}'
+    cached = cache.get(key)
+    if cached is None:
+        # Wrapped in a tuple so an unranked user is still a cache hit
+        cached = (user_rank(user)[0],)
+        cache.set(key, cached, summary_timeout())
+    return cached[0]
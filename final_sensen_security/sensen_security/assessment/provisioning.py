@@ -0,0 +1,227 @@
+"""Bulk user provisioning from an HR export.
+
+The CSV needs an `email` column; first_name, last_name, emp_id,
+phone_number and password are optional. Users without a password get a
+random one and can set their own with the password reset flow.
+
+Rows are handled in batches:
+
+    - duplicates (within the file, or an existing email/username/emp_id)
+      are found with one lookup per batch and listed in the report;
+    - passwords are hashed in a thread pool (the PBKDF2/argon2/bcrypt
+      hashers release the GIL while they run);
+    - users and profiles are written with two bulk_create calls in one
+      transaction, without going through the per-user post_save signal;
+    - emp_id (when the file has none) and user_code are numbered from one
+      range per batch, above the highest EMPnnn / SS-nnn in use, instead
+      of probing for a free number one query at a time; EMPnnn ids given
+      anywhere in the file (collected in a first pass) are skipped, so a
+      later row's own id is never taken by an earlier generated one.
+
+Existing users are looked up by Lower('email') / Lower('username'), served
+by the expression indexes of migration 0023.
+
+The highest number is read inside the batch's transaction. With the
+production SQLite profile (IMMEDIATE transactions) that transaction holds
+the write lock from its first statement, so no other writer can take the
+same numbers. Elsewhere (deferred transactions, other databases, a user
+added through the admin meanwhile) a collision rolls the batch back and it
+is renumbered and written again; rows whose email or emp_id was taken in
+the meantime are then reported as duplicates.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast, Lower, Substr
+from django.utils.crypto import get_random_string
+
+from .importers import CSVImportError, ImportReport, _cell, _text_cell, chunked, column_values, open_csv
+from .models import Profile
+
+
+PROVISION_BATCH_SIZE = 500
+
+# Times a batch is written before a collision with another writer fails the import
+BATCH_ATTEMPTS = 3
+
+REQUIRED_COLUMNS = ['email']
+
+
+def hash_workers():
+    return getattr(settings, 'PROVISIONING_HASH_WORKERS', None) or os.cpu_count() or 1
+
+
+def _parsed_rows(reader, report):
+    """Yield (line, fields) for the valid rows, rejecting the rest"""
+    try:
+        for row in reader:
+            if not any(row.values()):
+                continue
+            report.processed += 1
+            email = _cell(row, 'email')
+            try:
+                validate_email(email)
+            except ValidationError:
+                report.reject(reader.line_num, f'"{email}" is not a valid email address')
+                continue
+            try:
+                fields = {
+                    'first_name': _text_cell(row, 'first_name', 150),
+                    'last_name': _text_cell(row, 'last_name', 150),
+                    'emp_id': _text_cell(row, 'emp_id', 50) or None,
+                    'phone_number': _text_cell(row, 'phone_number', 10),
+                }
+            except ValueError as e:
+                report.reject(reader.line_num, e)
+                continue
+            yield reader.line_num, {
+                'email': User.objects.normalize_email(email),
+                **fields,
+                'password': _cell(row, 'password') or get_random_string(16),
+            }
+    except UnicodeDecodeError:
+        raise CSVImportError('CSV file must be UTF-8 encoded.')
+
+
+def _existing(chunk):
+    """Emails/usernames and emp_ids of the chunk that are already taken, lowercased / as stored"""
+    emails = {fields['email'].lower() for _, fields in chunk}
+    taken_emails = set(
+        User.objects.annotate(key=Lower('email')).filter(key__in=emails).values_list('key', flat=True)
+    )
+    taken_emails.update(
+        User.objects.annotate(key=Lower('username')).filter(key__in=emails).values_list('key', flat=True)
+    )
+    emp_ids = {fields['emp_id'] for _, fields in chunk if fields['emp_id']}
+    taken_emp_ids = set(Profile.objects.filter(emp_id__in=emp_ids).values_list('emp_id', flat=True))
+    return taken_emails, taken_emp_ids
+
+
+def _without_duplicates(chunk, seen_emails, seen_emp_ids, report):
+    taken_emails, taken_emp_ids = _existing(chunk)
+    unique = []
+    for line, fields in chunk:
+        email = fields['email'].lower()
+        if email in seen_emails:
+            report.skip_duplicate(line, f'{fields["email"]} appears earlier in the file')
+        elif email in taken_emails:
+            report.skip_duplicate(line, f'a user with email {fields["email"]} already exists')
+        elif fields['emp_id'] in seen_emp_ids:
+            report.skip_duplicate(line, f'emp_id {fields["emp_id"]} appears earlier in the file')
+        elif fields['emp_id'] in taken_emp_ids:
+            report.skip_duplicate(line, f'emp_id {fields["emp_id"]} is already in use')
+        else:
+            seen_emails.add(email)
+            if fields['emp_id']:
+                seen_emp_ids.add(fields['emp_id'])
+            unique.append((line, fields))
+    return unique
+
+
+def next_profile_number():
+    """One more than the highest number used by an EMPnnn emp_id or an SS-nnn user_code"""
+    highest_emp_id = Profile.objects.filter(emp_id__regex=r'^EMP[0-9]+$')\
+        .aggregate(n=Max(Cast(Substr('emp_id', 4), IntegerField())))['n']
+    highest_user_code = Profile.objects.filter(user_code__regex=r'^SS-[0-9]+$')\
+        .aggregate(n=Max(Cast(Substr('user_code', 4), IntegerField())))['n']
+    return max(highest_emp_id or 0, highest_user_code or 0) + 1
+
+
+def _create_batch(rows, passwords, start, file_emp_ids):
+    """Write one batch of users and profiles; returns the next free number"""
+    users = [
+        User(
+            username=fields['email'], email=fields['email'],
+            first_name=fields['first_name'], last_name=fields['last_name'],
+            password=password,
+        )
+        for fields, password in zip(rows, passwords)
+    ]
+    User.objects.bulk_create(users)
+    if any(user.pk is None for user in users):
+        # Backends that can't return the new primary keys from a bulk insert
+        ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'pk'))
+        for user in users:
+            user.pk = ids[user.username]
+
+    number = start
+    profiles = []
+    for user, fields in zip(users, rows):
+        emp_id = fields['emp_id']
+        if not emp_id:
+            # Skip numbers the file uses for its own emp_ids
+            while f'EMP{number:03}' in file_emp_ids:
+                number += 1
+            emp_id = f'EMP{number:03}'
+        profiles.append(Profile(
+            user=user, emp_id=emp_id, user_code=f'SS-{number:03}', phone_number=fields['phone_number'],
+        ))
+        number += 1
+    Profile.objects.bulk_create(profiles)
+    return number
+
+
+def _write_batch(rows, passwords, next_number, file_emp_ids, report):
+    """Write one batch, renumbering it after a collision; returns the next free number"""
+    for attempt in range(1, BATCH_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                # Other writers may have used numbers since the last batch
+                start = max(next_number, next_profile_number())
+                next_number = _create_batch([fields for _, fields in rows], passwords, start, file_emp_ids)
+        except IntegrityError:
+            if attempt == BATCH_ATTEMPTS:
+                raise
+        else:
+            report.created += len(rows)
+            return next_number
+
+        # Users may also have been created with the same email or emp_id
+        taken_emails, taken_emp_ids = _existing(rows)
+        kept = []
+        for (line, fields), password in zip(rows, passwords):
+            if fields['email'].lower() in taken_emails:
+                report.skip_duplicate(line, f'a user with email {fields["email"]} already exists')
+            elif fields['emp_id'] in taken_emp_ids:
+                report.skip_duplicate(line, f'emp_id {fields["emp_id"]} is already in use')
+            else:
+                kept.append(((line, fields), password))
+        if not kept:
+            return next_number
+        rows, passwords = (list(values) for values in zip(*kept))
+    return next_number
+
+
+def provision_users(uploaded_file, batch_size=PROVISION_BATCH_SIZE, progress=None):
+    """Create users and their profiles from an uploaded CSV, skipping duplicates.
+
+    Each batch is committed on its own, so progress is visible while a large
+    file is imported and a re-run skips the users that already made it in.
+    """
+    file_emp_ids = column_values(uploaded_file, 'emp_id')
+    reader = open_csv(uploaded_file, REQUIRED_COLUMNS)
+    report = ImportReport()
+    seen_emails, seen_emp_ids = set(), set()
+    next_number = 0
+
+    with ThreadPoolExecutor(max_workers=hash_workers(), thread_name_prefix='password-hash') as executor:
+        for chunk in chunked(_parsed_rows(reader, report), batch_size):
+            rows = _without_duplicates(chunk, seen_emails, seen_emp_ids, report)
+            if rows:
+                passwords = list(executor.map(make_password, [fields['password'] for _, fields in rows]))
+                next_number = _write_batch(rows, passwords, next_number, file_emp_ids, report)
+            if progress:
+                progress(report)
+
+    if report.created:
+        # bulk_create skips the post_save signal that keeps the growth chart fresh
+        from .stats import bump_data_version
+        bump_data_version()
+    return report
@@ -0,0 +1,113 @@
+"""Reminder emails for users who haven't completed selected assessments.
+
+"Pending" means what the dashboard overview counts (stats.learners()):
+active, non-staff users with an email address and no completed attempt
+for the assessment.
+
+Recipients come from one query: one EXISTS column per selected
+assessment, filtered to users with at least one of them missing. It is
+run in pk ranges of RECIPIENT_CHUNK_SIZE users, each fetched in full
+before its emails are written, so no cursor is left open across the
+inserts and tens of thousands of recipients are never held in memory at
+once. Each user gets one email listing all of their pending assessments,
+rendered from a template loaded and compiled once, and the emails are
+queued in the outbox with bulk inserts; the outbox worker sends them in
+batches over one connection per batch. Started from the dashboard, the
+queueing itself also runs on the outbox thread.
+
+A campaign is the selected assessments on one day. Every chunk records
+its recipients as ReminderRecipient rows in the same transaction as their
+emails, and users already recorded are left out of the query, so sending
+the same reminders twice (a double submit, a rerun after a crash) doesn't
+email anyone twice.
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import Assessment, ReminderRecipient, UserAssessmentAttempt
+from .outbox import queue_emails, run_in_background
+from .stats import learners
+
+
+REMINDER_SUBJECT = 'Reminder: assessments waiting for you'
+REMINDER_TEMPLATE = 'assessment/reminder_email.txt'
+
+RECIPIENT_CHUNK_SIZE = 2000
+
+
+def _completed_column(assessment_id):
+    return f'completed_{assessment_id}'
+
+
+def campaign_key(assessment_ids):
+    """The campaign of reminders for these assessments sent today"""
+    ids = ','.join(str(pk) for pk in sorted(set(assessment_ids)))
+    return f'{timezone.localdate():%Y-%m-%d}:{hashlib.sha1(ids.encode()).hexdigest()}'
+
+
+def pending_recipients(assessment_ids, campaign):
+    """Users with at least one of the assessments not completed and no reminder yet, one row each"""
+    completed = {
+        _completed_column(assessment_id): Exists(UserAssessmentAttempt.objects.filter(
+            user=OuterRef('pk'), assessment_id=assessment_id, is_completed=True,
+        ))
+        for assessment_id in assessment_ids
+    }
+    any_pending = Q()
+    for column in completed:
+        any_pending |= Q(**{column: False})
+    return learners()\
+        .annotate(**completed)\
+        .filter(any_pending)\
+        .exclude(Exists(ReminderRecipient.objects.filter(campaign=campaign, user=OuterRef('pk'))))\
+        .order_by('pk')\
+        .values('pk', 'email', 'username', 'first_name', *completed)
+
+
+def reminder_emails(rows, assessments, assessments_url, template):
+    """Yield (subject, body, recipients) for every row, rendered lazily"""
+    for row in rows:
+        pending = [assessment.title for assessment in assessments if not row[_completed_column(assessment.pk)]]
+        body = template.render({
+            'name': row['first_name'] or row['username'],
+            'assessments': pending,
+            'assessments_url': assessments_url,
+        })
+        yield REMINDER_SUBJECT, body, [row['email']]
+
+
+def send_reminders(assessment_ids, assessments_url, campaign=None):
+    """Queue one reminder per pending user not reminded yet; returns how many were queued"""
+    assessments = list(Assessment.objects.filter(pk__in=assessment_ids).order_by('title').only('id', 'title'))
+    if not assessments:
+        return 0
+    assessment_ids = [assessment.pk for assessment in assessments]
+    campaign = campaign or campaign_key(assessment_ids)
+    template = get_template(REMINDER_TEMPLATE)
+
+    queued = last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(pending_recipients(assessment_ids, campaign).filter(pk__gt=last_pk)[:RECIPIENT_CHUNK_SIZE])
+            queued += queue_emails(
+                reminder_emails(rows, assessments, assessments_url, template), batch_size=RECIPIENT_CHUNK_SIZE,
+            )
+            ReminderRecipient.objects.bulk_create([
+                ReminderRecipient(campaign=campaign, user_id=row['pk']) for row in rows
+            ])
+        if len(rows) < RECIPIENT_CHUNK_SIZE:
+            return queued
+        last_pk = rows[-1]['pk']
+
+
+def start_reminders(assessment_ids, assessments_url):
+    """Queue the reminders in the background; returns how many users will get one"""
+    campaign = campaign_key(assessment_ids)
+    recipients = pending_recipients(assessment_ids, campaign).count()
+    if recipients:
+        run_in_background(send_reminders, assessment_ids, assessments_url, campaign)
+    return recipients
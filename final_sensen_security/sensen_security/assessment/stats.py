@@ -0,0 +1,213 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from . import leaderboard
+from .models import Assessment, AssessmentStats, DataVersion, UserAssessmentAttempt
+
+
+NOT_COUNTED = (False, 0, False, None)
+
+DATA_VERSION_NAME = 'dashboard'
+
+
+def data_version():
+    """Version of the dashboard data; cached charts and home leaderboards are keyed on it"""
+    return DataVersion.current(DATA_VERSION_NAME)[0]
+
+
+def bump_data_version():
+    DataVersion.bump(DATA_VERSION_NAME)
+
+
+def attempt_snapshot(attempt):
+    """Return the (is_completed, score, is_passed, completed_at) state the stats count for an attempt"""
+    return (attempt.is_completed, attempt.score, attempt.is_passed, attempt.completed_at)
+
+
+def _contribution(snapshot):
+    is_completed, score, is_passed, _ = snapshot
+    if not is_completed:
+        return (0, 0, 0)
+    return (1, 1 if is_passed else 0, score)
+
+
+@transaction.atomic
+def apply_attempt_change(user_id, assessment_id, before, after):
+    """Move an attempt's contribution to the running totals from `before` to `after`"""
+    old = _contribution(before)
+    new = _contribution(after)
+    attempts, passes, score_sum = (n - o for n, o in zip(new, old))
+    changed = False
+    if attempts or passes or score_sum:
+        # Only a newly counted attempt may create the row; removals skip rows
+        # that are already gone (e.g. during a cascading delete).
+        stats = AssessmentStats.objects.select_for_update()
+        if attempts > 0:
+            assessment_stats = stats.get_or_create(assessment_id=assessment_id)[0]
+        else:
+            assessment_stats = stats.filter(assessment_id=assessment_id).first()
+        if assessment_stats is not None:
+            assessment_stats.attempts += attempts
+            assessment_stats.passes += passes
+            assessment_stats.score_sum += score_sum
+            assessment_stats.save()
+            changed = True
+
+    # A retake in another week or month moves between period boards, so the
+    # deltas are collected per board rather than per attempt
+    board_deltas = {}
+    for snapshot, contribution, sign in ((before, old, -1), (after, new, 1)):
+        if not contribution[0]:
+            continue
+        for board in leaderboard.board_keys(assessment_id, snapshot[3]):
+            delta = board_deltas.setdefault(board, [0, 0, 0])
+            for i, value in enumerate(contribution):
+                delta[i] += sign * value
+    for board, delta in board_deltas.items():
+        if any(delta):
+            leaderboard.apply_entry_delta(board, user_id, *delta)
+            changed = True
+
+    if changed:
+        # In the same transaction, so no worker sees the new totals under the old version
+        bump_data_version()
+
+
+def stored_attempt(attempt_pk):
+    """Return (user_id, assessment_id, snapshot) of an attempt as stored, or None.
+
+    Read before the attempt is saved, under a row lock when inside a
+    transaction, so two concurrent saves of one attempt each start from the
+    state the other committed instead of both applying their delta.
+    """
+    attempts = UserAssessmentAttempt.objects.filter(pk=attempt_pk)
+    if transaction.get_connection().in_atomic_block:
+        attempts = attempts.select_for_update()
+    row = attempts.values_list(
+        'user_id', 'assessment_id', 'is_completed', 'score', 'is_passed', 'completed_at',
+    ).first()
+    return None if row is None else (row[0], row[1], row[2:])
+
+
+def record_attempt(attempt, stored=None):
+    """Update the totals after an attempt was saved.
+
+    `stored` is what stored_attempt() returned before the save, so a retake
+    or an admin edit replaces the old result instead of being counted twice,
+    and an attempt moved to another user or assessment leaves the old one.
+    """
+    before = NOT_COUNTED
+    if stored is not None:
+        user_id, assessment_id, before = stored
+        if (user_id, assessment_id) != (attempt.user_id, attempt.assessment_id):
+            apply_attempt_change(user_id, assessment_id, before, NOT_COUNTED)
+            before = NOT_COUNTED
+    apply_attempt_change(attempt.user_id, attempt.assessment_id, before, attempt_snapshot(attempt))
+
+
+def forget_attempt(attempt):
+    apply_attempt_change(attempt.user_id, attempt.assessment_id, attempt_snapshot(attempt), NOT_COUNTED)
+
+
+def dashboard_totals():
+    """Global completed/passed/failed counts summed from the per-assessment rows"""
+    totals = AssessmentStats.objects.aggregate(attempts=Sum('attempts'), passes=Sum('passes'))
+    total_attempts = totals['attempts'] or 0
+    passed_attempts = totals['passes'] or 0
+    return {
+        'total_attempts': total_attempts,
+        'passed_attempts': passed_attempts,
+        'failed_attempts': total_attempts - passed_attempts,
+        'pass_percentage': (passed_attempts / total_attempts * 100) if total_attempts > 0 else 0,
+    }
+
+
+def assessment_breakdown():
+    return AssessmentStats.objects.filter(attempts__gt=0)\
+        .select_related('assessment')\
+        .order_by('assessment__title')
+
+
+def top_users(limit=15):
+    return [
+        {
+            'username': entry.user.username,
+            'avg_score': entry.avg_score,
+            'total_attempts': entry.attempts,
+        }
+        for entry in leaderboard.top_entries('all', limit)
+    ]
+
+
+def learners():
+    """Users the overview counts as pending and reminders go to: active, non-staff, with an email address"""
+    return User.objects.filter(is_active=True, is_staff=False).exclude(email='')
+
+
+def completed_counts_by_assessment():
+    """Completed attempts per assessment, in total and by learners"""
+    by_learner = Q(user__is_active=True, user__is_staff=False) & ~Q(user__email='')
+    return UserAssessmentAttempt.objects.filter(is_completed=True)\
+        .order_by()\
+        .values('assessment')\
+        .annotate(completed_count=Count('id'), learners_completed=Count('id', filter=by_learner))
+
+
+def assessment_overview():
+    """Completed/pending counts per assessment from one grouped query.
+
+    Every completed attempt belongs to a distinct user (one attempt per user
+    and assessment), so the pending count is the learner total minus the
+    learners' completed attempts. Staff, inactive and email-less accounts
+    are never pending, the same users send_reminders leaves out.
+    """
+    total_learners = learners().count()
+    completed_counts = {row['assessment']: row for row in completed_counts_by_assessment()}
+    overview = []
+    for assessment in Assessment.objects.order_by('id').only('id', 'title', 'description'):
+        counts = completed_counts.get(assessment.id, {'completed_count': 0, 'learners_completed': 0})
+        overview.append({
+            'id': assessment.id,
+            'title': assessment.title,
+            'description': assessment.description,
+            'completed_count': counts['completed_count'],
+            'pending_count': total_learners - counts['learners_completed'],
+        })
+    return overview
+
+
+def completed_users(assessment_id):
+    return UserAssessmentAttempt.objects.filter(assessment_id=assessment_id, is_completed=True)\
+        .annotate(username=F('user__username'))\
+        .order_by('username')\
+        .values('username', 'score')
+
+
+def pending_users(assessment_id):
+    completed_user_ids = UserAssessmentAttempt.objects.filter(
+        assessment_id=assessment_id, is_completed=True
+    ).values('user_id')
+    return learners().exclude(id__in=completed_user_ids).order_by('username').values('username')
+
+
+@transaction.atomic
+def rebuild_stats():
+    """Recompute the assessment stats and leaderboards from the completed attempts"""
+    completed = UserAssessmentAttempt.objects.filter(is_completed=True).order_by()
+
+    AssessmentStats.objects.all().delete()
+    assessment_stats = AssessmentStats.objects.bulk_create([
+        AssessmentStats(
+            assessment_id=row['assessment'],
+            attempts=row['attempts'],
+            passes=row['passes'],
+            score_sum=row['score_sum'],
+        )
+        for row in completed.values('assessment').annotate(
+            attempts=Count('id'),
+            passes=Count('id', filter=Q(is_passed=True)),
+            score_sum=Sum('score'),
+        )
+    ])
+    return len(assessment_stats), leaderboard.rebuild_leaderboards()
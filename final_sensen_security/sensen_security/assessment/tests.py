@@ -1,3 +1,1560 @@
-from django.test import TestCase
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from sensen_security.settings import default_session_engine
+
+from . import heartbeats, outbox, provisioning
+from .analytics import AnalyticsRouter, analytics_reads, refresh_snapshot, snapshot_version
+from .grading import answer_key_cache_key
+from .heartbeats import WriteBehindBuffer
+from .importers import CSVImportError, import_question_bank, import_tutorials
+from .jobs import process_pending_jobs
+from .leaderboard import ranked, resolve_board, top_entries, user_rank
+from .models import Assessment, AssessmentStats, DataVersion, ImportJob, OutboxEmail, Profile, LeaderboardEntry, Question, Tutorial, TutorialProgress, UserAssessmentAttempt
+from .outbox import queue_email, send_pending
+from .progress import bump_active_assessments_version, summary_cache_key
+from .provisioning import provision_users
+from .reminders import send_reminders
+from .stats import assessment_overview, rebuild_stats
+from .timeseries import attempt_series, user_growth_series
+from .views import DASHBOARD_CHARTS
+
+
+class GradingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', 'learner@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.assessment = Assessment.objects.create(title='Phishing', description='d', pass_score=60)
+        self.questions = [
+            Question.objects.create(assessment=self.assessment, question_text='q', correct_answer=correct, order=i)
+            for i, correct in enumerate(['Yes', 'no', ' Report it ', 'B', '42'])
+        ]
+        self.client.get(reverse('take_assessment', args=[self.assessment.id]))
+
+    def submit(self, answers):
+        return self.client.post(
+            reverse('submit_assessment', args=[self.assessment.id]),
+            json.dumps({'answers': answers}), content_type='application/json',
+        )
+
+    def per_answer_grade(self, answers):
+        """The grading the view did before bulk grading: one question lookup per answer"""
+        correct_count = 0
+        for question_id, user_answer in answers.items():
+            question = Question.objects.get(id=question_id, assessment=self.assessment)
+            if str(user_answer).strip().lower() == str(question.correct_answer).strip().lower():
+                correct_count += 1
+        score = correct_count / self.assessment.questions.count() * 100
+        return round(score), correct_count, score >= self.assessment.pass_score
+
+    def test_results_match_per_answer_grading(self):
+        ids = [str(question.id) for question in self.questions]
+        for answers in [
+            dict(zip(ids, ['yes', 'NO', 'report it', 'b', '42'])),
+            dict(zip(ids, ['yes', 'no', 'report it', 'c', '41'])),
+            dict(zip(ids, ['Yes ', 'no', 'ignore it'])),
+            {ids[4]: 42, ids[0]: 'no'},
+            {},
+        ]:
+            expected = self.per_answer_grade(answers)
+            result = self.submit(answers).json()
+            attempt = UserAssessmentAttempt.objects.get(user=self.user)
+            self.assertEqual((result['score'], result['correct_answers'], result['is_passed']), expected)
+            self.assertEqual((attempt.score, attempt.correct_answers, attempt.is_passed), expected)
+            self.assertEqual(attempt.answers.count(), len(answers))
+
+    def test_query_count_does_not_depend_on_answer_count(self):
+        ids = [str(question.id) for question in self.questions]
+        self.submit({ids[0]: 'yes'})
+        with CaptureQueriesContext(connection) as one_answer:
+            self.submit({ids[0]: 'no'})
+        with CaptureQueriesContext(connection) as all_answers:
+            self.submit(dict.fromkeys(ids, 'no'))
+        self.assertEqual(len(one_answer), len(all_answers))
+        self.assertEqual(len([query for query in all_answers if 'assessment_question' in query['sql']]), 0)
+        self.assertEqual(len([query for query in all_answers if 'INSERT INTO "assessment_useranswer"' in query['sql']]), 1)
+
+    def test_unknown_question_is_rejected(self):
+        other = Assessment.objects.create(title='Passwords', description='d')
+        foreign = Question.objects.create(assessment=other, question_text='q', correct_answer='yes')
+        for question_id in [foreign.id, 999999]:
+            response = self.submit({str(self.questions[0].id): 'yes', str(question_id): 'yes'})
+            self.assertEqual(response.status_code, 400)
+        attempt = UserAssessmentAttempt.objects.get(user=self.user)
+        self.assertFalse(attempt.is_completed)
+        self.assertFalse(attempt.answers.exists())
+
+
+class AnswerKeyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', 'learner@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.assessment = Assessment.objects.create(title='Phishing', description='d', pass_score=50)
+        self.question = Question.objects.create(assessment=self.assessment, question_text='q', correct_answer='yes')
+        self.client.get(reverse('take_assessment', args=[self.assessment.id]))
+
+    def submit(self, answers):
+        return self.client.post(
+            reverse('submit_assessment', args=[self.assessment.id]),
+            json.dumps({'answers': answers}), content_type='application/json',
+        )
+
+    def test_edited_question_changes_next_grade(self):
+        self.assertEqual(self.submit({str(self.question.id): 'yes'}).json()['score'], 100)
+        stale_key = answer_key_cache_key(Assessment.objects.get(pk=self.assessment.pk))
+
+        # Edited from another process: this process's cached key stays put,
+        # but the version on the assessment row moves on
+        with mock.patch('assessment.grading.cache.delete') as delete:
+            self.question.correct_answer = 'no'
+            self.question.save()
+        delete.assert_not_called()
+        self.assertIsNotNone(cache.get(stale_key))
+
+        result = self.submit({str(self.question.id): 'yes'}).json()
+        self.assertEqual((result['score'], result['is_passed']), (0, False))
+        self.assertEqual(self.submit({str(self.question.id): 'no'}).json()['score'], 100)
+
+    def test_new_question_is_graded_and_counted(self):
+        self.submit({str(self.question.id): 'yes'})
+        added = Question.objects.create(assessment=self.assessment, question_text='q', correct_answer='b')
+        result = self.submit({str(self.question.id): 'yes', str(added.id): 'b'}).json()
+        self.assertEqual((result['score'], result['total_questions']), (100, 2))
+
+    def test_pass_score_comes_from_the_assessment(self):
+        self.submit({str(self.question.id): 'yes'})
+        Assessment.objects.filter(pk=self.assessment.pk).update(pass_score=100)
+        self.question.correct_answer = 'no'
+        self.question.save()
+        self.assertTrue(self.submit({str(self.question.id): 'no'}).json()['is_passed'])
+        Assessment.objects.filter(pk=self.assessment.pk).update(pass_score=101)
+        self.assertFalse(self.submit({str(self.question.id): 'no'}).json()['is_passed'])
+
+    def test_unknown_question_returns_400_with_cached_key(self):
+        self.submit({str(self.question.id): 'yes'})
+        response = self.submit({str(self.question.id): 'yes', '999999': 'yes'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UserAssessmentAttempt.objects.get(user=self.user).score, 100)
+
+    def test_saving_assessment_keeps_maintained_columns(self):
+        stale = Assessment.objects.get(pk=self.assessment.pk)
+        Question.objects.create(assessment=self.assessment, question_text='q', correct_answer='b')
+        stale.title = 'Phishing basics'
+        stale.save()
+        fresh = Assessment.objects.get(pk=self.assessment.pk)
+        self.assertEqual((fresh.title, fresh.question_count), ('Phishing basics', 2))
+        self.assertGreater(fresh.answer_key_version, stale.answer_key_version)
+
+
+class AssessmentsListQueryTests(TestCase):
+    # session + user + the annotated assessment query
+    EXPECTED_QUERIES = 3
+
+    def setUp(self):
+        self.user = User.objects.create_user('learner', 'learner@example.com', 'pw')
+        self.other = User.objects.create_user('other', 'other@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def create_assessments(self, count):
+        for index in range(count):
+            assessment = Assessment.objects.create(title=f'Assessment {index}', description='d')
+            for order in range(index % 3 + 1):
+                Question.objects.create(assessment=assessment, question_text='q', correct_answer='a', order=order)
+            if index % 2 == 0:
+                UserAssessmentAttempt.objects.create(
+                    user=self.user, assessment=assessment, score=80,
+                    correct_answers=1, is_completed=True, is_passed=True,
+                )
+            UserAssessmentAttempt.objects.create(user=self.other, assessment=assessment, score=10)
+
+    def test_query_count_is_constant(self):
+        self.create_assessments(1)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            self.client.get(reverse('assessments_list'))
+
+        self.create_assessments(12)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get(reverse('assessments_list'))
+        self.assertEqual(len(response.context['assessments']), 13)
+
+    def test_attempt_status_and_question_count(self):
+        self.create_assessments(3)
+        response = self.client.get(reverse('assessments_list'))
+        assessments = {a.title: a for a in response.context['assessments']}
+
+        self.assertEqual(assessments['Assessment 0'].question_count, 1)
+        self.assertEqual(assessments['Assessment 2'].question_count, 3)
+        self.assertTrue(assessments['Assessment 0'].user_attempt.is_passed)
+        self.assertEqual(assessments['Assessment 0'].user_attempt.score, 80)
+        # Another user's attempt must not leak into this user's list
+        self.assertIsNone(assessments['Assessment 1'].user_attempt)
+
+
+class QuestionCountTests(TestCase):
+    def setUp(self):
+        self.first = Assessment.objects.create(title='First', description='d')
+        self.second = Assessment.objects.create(title='Second', description='d')
+
+    def counts(self):
+        return list(Assessment.objects.order_by('id').values_list('question_count', flat=True))
+
+    def test_count_follows_question_writes(self):
+        question = Question.objects.create(assessment=self.first, question_text='q', correct_answer='a')
+        Question.objects.create(assessment=self.first, question_text='q', correct_answer='a')
+        self.assertEqual(self.counts(), [2, 0])
+
+        question.assessment = self.second
+        question.save()
+        self.assertEqual(self.counts(), [1, 1])
+
+        question.delete()
+        self.assertEqual(self.counts(), [1, 0])
+
+    def test_update_question_counts_repairs_bulk_inserts(self):
+        Question.objects.bulk_create([
+            Question(assessment=self.second, question_text='q', correct_answer='a') for _ in range(3)
+        ])
+        self.assertEqual(self.counts(), [0, 0])
+
+        Assessment.update_question_counts()
+        self.assertEqual(self.counts(), [0, 3])
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.first = Assessment.objects.create(title='Phishing', description='d', pass_score=50)
+        self.second = Assessment.objects.create(title='Passwords', description='d', pass_score=50)
+        self.question = Question.objects.create(assessment=self.first, question_text='q', correct_answer='yes')
+        self.users = [User.objects.create_user(f'user{i}', f'user{i}@example.com', 'pw') for i in range(3)]
+
+    def submit(self, user, answer):
+        self.client.force_login(user)
+        self.client.get(reverse('take_assessment', args=[self.first.id]))
+        self.client.post(
+            reverse('submit_assessment', args=[self.first.id]),
+            json.dumps({'answers': {str(self.question.id): answer}}), content_type='application/json',
+        )
+        return UserAssessmentAttempt.objects.get(user=user, assessment=self.first)
+
+    def totals(self):
+        stats = sorted(
+            AssessmentStats.objects.filter(attempts__gt=0).values_list('assessment', 'attempts', 'passes', 'score_sum')
+        )
+        boards = sorted(LeaderboardEntry.objects.values_list('board', 'user', 'attempts', 'passes', 'score_sum'))
+        return stats, boards
+
+    def assertMatchesRebuild(self):
+        incremental = self.totals()
+        rebuild_stats()
+        self.assertEqual(incremental, self.totals())
+
+    def test_incremental_path_matches_rebuild(self):
+        self.submit(self.users[0], 'yes')
+        self.submit(self.users[1], 'no')
+        self.submit(self.users[1], 'yes')  # retake
+        attempt = self.submit(self.users[2], 'yes')
+        self.assertMatchesRebuild()
+
+        attempt.score, attempt.is_passed = 40, False
+        attempt.save()
+        self.assertMatchesRebuild()
+
+        attempt.completed_at = timezone.now() - timedelta(days=40)
+        attempt.save()
+        self.assertMatchesRebuild()
+
+        attempt.assessment = self.second
+        attempt.save()
+        self.assertMatchesRebuild()
+
+        attempt.is_completed = False
+        attempt.save()
+        self.assertMatchesRebuild()
+
+        UserAssessmentAttempt.objects.filter(user=self.users[0]).delete()
+        self.assertMatchesRebuild()
+
+    def test_admin_edit_updates_stats_and_leaderboards(self):
+        attempt = self.submit(self.users[0], 'yes')
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:assessment_userassessmentattempt_change', args=[attempt.pk]), {
+            'user': attempt.user_id, 'assessment': attempt.assessment_id, 'score': 30,
+            'total_questions': 1, 'correct_answers': 0, 'is_completed': 'on',
+            'completed_at_0': '2026-01-05', 'completed_at_1': '10:00:00',
+        })
+        self.assertEqual(response.status_code, 302)
+        stats = AssessmentStats.objects.get(assessment=self.first)
+        self.assertEqual((stats.attempts, stats.passes, stats.score_sum), (1, 0, 30))
+        self.assertEqual(LeaderboardEntry.objects.get(board='all', user=self.users[0]).avg_score, 30)
+        self.assertMatchesRebuild()
+
+    def test_stale_copies_do_not_count_twice(self):
+        attempt = self.submit(self.users[0], 'no')
+        first_copy = UserAssessmentAttempt.objects.get(pk=attempt.pk)
+        second_copy = UserAssessmentAttempt.objects.get(pk=attempt.pk)
+        # Both copies were loaded before either save, like two concurrent resubmits
+        first_copy.score, first_copy.is_passed = 100, True
+        first_copy.save()
+        second_copy.score, second_copy.is_passed = 100, True
+        second_copy.save()
+        stats = AssessmentStats.objects.get(assessment=self.first)
+        self.assertEqual((stats.attempts, stats.passes, stats.score_sum), (1, 1, 100))
+        self.assertMatchesRebuild()
+
+
+class AssessmentOverviewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.assessment = Assessment.objects.create(title='Phishing', description='d')
+        other = Assessment.objects.create(title='Passwords', description='d')
+        self.users = [User.objects.create_user(f'user{i}', f'user{i}@example.com', 'pw') for i in range(5)]
+        for index, user in enumerate(self.users):
+            UserAssessmentAttempt.objects.create(
+                user=user, assessment=self.assessment, score=index * 10, is_completed=index < 3,
+            )
+            UserAssessmentAttempt.objects.create(user=user, assessment=other, is_completed=index == 0)
+        self.client.force_login(self.admin)
+
+    def page(self, status, page=None):
+        url = reverse('assessment_overview_users', args=[self.assessment.id, status])
+        return self.client.get(url, {'page': page} if page else {})
+
+    def test_overview_counts(self):
+        with self.assertNumQueries(3):
+            overview = {row['title']: row for row in assessment_overview()}
+        # The admin is never pending
+        self.assertEqual((overview['Phishing']['completed_count'], overview['Phishing']['pending_count']), (3, 2))
+        self.assertEqual((overview['Passwords']['completed_count'], overview['Passwords']['pending_count']), (1, 4))
+
+        # Nor are inactive or email-less users, though their completions still count
+        inactive = User.objects.create_user('inactive', 'inactive@example.com', 'pw', is_active=False)
+        User.objects.create_user('noemail', '', 'pw')
+        UserAssessmentAttempt.objects.create(user=inactive, assessment=self.assessment, is_completed=True)
+        overview = {row['title']: row for row in assessment_overview()}
+        self.assertEqual((overview['Phishing']['completed_count'], overview['Phishing']['pending_count']), (4, 2))
+        self.assertEqual((overview['Passwords']['completed_count'], overview['Passwords']['pending_count']), (1, 4))
+
+    @mock.patch('assessment.views.OVERVIEW_PAGE_SIZE', 2)
+    def test_completed_users_are_paged_with_scores(self):
+        first = self.page('completed').json()
+        self.assertEqual((first['count'], first['page'], first['num_pages'], first['has_next']), (3, 1, 2, True))
+        self.assertEqual(first['users'], [{'username': 'user0', 'score': 0}, {'username': 'user1', 'score': 10}])
+        last = self.page('completed', 2).json()
+        self.assertEqual((last['users'], last['has_next']), ([{'username': 'user2', 'score': 20}], False))
+
+    @mock.patch('assessment.views.OVERVIEW_PAGE_SIZE', 1)
+    def test_pending_users_are_paged(self):
+        pages = [self.page('pending', page).json() for page in (1, 2)]
+        self.assertEqual(pages[0]['count'], 2)
+        self.assertEqual(
+            [user['username'] for page in pages for user in page['users']], ['user3', 'user4'],
+        )
+        # Out of range pages fall back to the last one
+        self.assertEqual(self.page('pending', 99).json()['page'], 2)
+
+    def test_unknown_status_and_non_staff(self):
+        self.assertEqual(self.page('failed').status_code, 400)
+        self.client.force_login(self.users[0])
+        self.assertEqual(self.page('pending').status_code, 302)
+
+
+class TimeSeriesTests(TestCase):
+    def setUp(self):
+        self.assessment = Assessment.objects.create(title='Phishing', description='d', pass_score=50)
+
+    def complete(self, username, completed_at, passed=True):
+        user = User.objects.create_user(username, f'{username}@example.com', 'pw')
+        UserAssessmentAttempt.objects.create(
+            user=user, assessment=self.assessment, score=100 if passed else 0,
+            is_completed=True, is_passed=passed, completed_at=completed_at,
+        )
+
+    def utc(self, *args):
+        return datetime(*args, tzinfo=dt_timezone.utc)
+
+    def test_days_follow_the_kolkata_boundary(self):
+        # 23:30 and 00:30 in Asia/Kolkata on either side of midnight
+        self.complete('late', self.utc(2026, 3, 9, 18, 0))
+        self.complete('early', self.utc(2026, 3, 9, 19, 0), passed=False)
+        with self.assertNumQueries(1):
+            series = attempt_series(self.utc(2026, 3, 8, 12), self.utc(2026, 3, 11, 12), 'day')
+        self.assertEqual(
+            [(point['bucket'], point['attempts'], point['passes']) for point in series],
+            [(date(2026, 3, 8), 0, 0), (date(2026, 3, 9), 1, 1), (date(2026, 3, 10), 1, 0), (date(2026, 3, 11), 0, 0)],
+        )
+        self.assertEqual([point['pass_rate'] for point in series], [0, 100, 0, 0])
+        self.assertEqual(series[1]['label'], '09 Mar 2026')
+
+    def test_empty_buckets_are_zero_filled(self):
+        series = attempt_series(self.utc(2026, 1, 1), self.utc(2026, 1, 5), 'day')
+        self.assertEqual(len(series), 5)
+        self.assertTrue(all(point['attempts'] == 0 and point['pass_rate'] == 0 for point in series))
+
+    def test_week_buckets_start_on_monday(self):
+        # Sunday 11 Jan and Monday 12 Jan 2026 (local time)
+        self.complete('sunday', self.utc(2026, 1, 11, 12))
+        self.complete('monday', self.utc(2026, 1, 11, 19))
+        series = attempt_series(self.utc(2026, 1, 7), self.utc(2026, 1, 20), 'week')
+        self.assertEqual(
+            [(point['bucket'], point['attempts']) for point in series],
+            [(date(2026, 1, 5), 1), (date(2026, 1, 12), 1), (date(2026, 1, 19), 0)],
+        )
+        self.assertEqual(series[1]['label'], 'Wk 12 Jan 2026')
+
+    def test_month_buckets_use_local_months(self):
+        # 00:30 on 1 Feb in Asia/Kolkata is still January in UTC
+        self.complete('january', self.utc(2026, 1, 15))
+        self.complete('february', self.utc(2026, 1, 31, 19))
+        series = attempt_series(self.utc(2025, 12, 20), self.utc(2026, 3, 2), 'month')
+        self.assertEqual(
+            [(point['bucket'], point['attempts']) for point in series],
+            [(date(2025, 12, 1), 0), (date(2026, 1, 1), 1), (date(2026, 2, 1), 1), (date(2026, 3, 1), 0)],
+        )
+        self.assertEqual(series[2]['label'], 'Feb 2026')
+
+    def test_user_growth_running_total(self):
+        User.objects.create_user('old', 'old@example.com', 'pw')
+        User.objects.filter(username='old').update(date_joined=self.utc(2026, 1, 2))
+        series = user_growth_series(self.utc(2026, 1, 1), self.utc(2026, 1, 3), 'day')
+        self.assertEqual([point['new_users'] for point in series], [0, 1, 0])
+        self.assertEqual([point['total_users'] for point in series], [0, 1, 1])
+
+
+class DashboardChartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.assessment = Assessment.objects.create(title='Phishing', description='d', pass_score=50)
+        self.learner = User.objects.create_user('learner', 'learner@example.com', 'pw')
+        UserAssessmentAttempt.objects.create(
+            user=self.learner, assessment=self.assessment, score=80, is_completed=True, is_passed=True,
+            completed_at=timezone.now(),
+        )
+        self.client.force_login(self.admin)
+
+    def chart(self, name, **params):
+        return self.client.get(reverse('dashboard_chart', args=[name]), params)
+
+    def passed_counts(self):
+        figure = self.chart('results').json()
+        return figure['data'][0]['y']
+
+    def test_charts_are_cached_per_data_version(self):
+        self.assertEqual(self.passed_counts(), [1])
+        for name in DASHBOARD_CHARTS:
+            self.assertEqual(self.chart(name).status_code, 200)
+        # session + user + the data version; the figure comes from the cache
+        with self.assertNumQueries(3):
+            self.chart('results')
+
+    def test_new_results_rebuild_the_chart(self):
+        self.assertEqual(self.passed_counts(), [1])
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        UserAssessmentAttempt.objects.create(
+            user=other, assessment=self.assessment, score=90, is_completed=True, is_passed=True,
+            completed_at=timezone.now(),
+        )
+        self.assertEqual(self.passed_counts(), [2])
+
+    def test_version_bumped_elsewhere_is_seen(self):
+        self.assertEqual(self.passed_counts(), [1])
+        # Another worker's submission: totals and version change in the
+        # database, this process's cache is untouched
+        AssessmentStats.objects.filter(assessment=self.assessment).update(attempts=3, passes=3)
+        DataVersion.objects.filter(name='dashboard').update(value=F('value') + 1)
+        self.assertEqual(self.passed_counts(), [3])
+
+    def test_new_user_rebuilds_growth_chart(self):
+        def total_users():
+            return self.chart('user-growth', range='30d', granularity='day').json()['data'][0]['y'][-1]
+
+        self.assertEqual(total_users(), 2)
+        User.objects.create_user('newcomer', 'newcomer@example.com', 'pw')
+        self.assertEqual(total_users(), 3)
+
+    def test_unknown_chart_and_non_staff(self):
+        self.assertEqual(self.chart('pie').status_code, 404)
+        self.client.force_login(self.learner)
+        self.assertEqual(self.chart('results').status_code, 302)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.assessment = Assessment.objects.create(title='Phishing', description='d', pass_score=50)
+        self.questions = [
+            Question.objects.create(assessment=self.assessment, question_text='q', correct_answer='yes', order=i)
+            for i in range(4)
+        ]
+
+    def submit(self, username, correct):
+        user, _ = User.objects.get_or_create(username=username, email=f'{username}@example.com')
+        self.client.force_login(user)
+        self.client.get(reverse('take_assessment', args=[self.assessment.id]))
+        answers = {
+            str(question.id): 'yes' if index < correct else 'no'
+            for index, question in enumerate(self.questions)
+        }
+        self.client.post(
+            reverse('submit_assessment', args=[self.assessment.id]),
+            json.dumps({'answers': answers}), content_type='application/json',
+        )
+        return user
+
+    def boards(self):
+        return sorted(LeaderboardEntry.objects.values_list('board', 'user__username', 'attempts', 'score_sum'))
+
+    def test_incremental_updates_match_rebuild(self):
+        self.submit('alice', 4)
+        bob = self.submit('bob', 1)
+        self.submit('bob', 3)  # retake replaces the first result
+
+        incremental = self.boards()
+        rebuild_stats()
+        self.assertEqual(incremental, self.boards())
+        self.assertEqual([entry.user.username for entry in top_entries('all')], ['alice', 'bob'])
+        self.assertEqual(user_rank(bob)[0], 2)
+
+    def test_rank_follows_board_order_and_reads_one_index_range(self):
+        users = [User.objects.create_user(f'user{i}', f'user{i}@example.com', 'pw') for i in range(6)]
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(board='all', user=user, attempts=attempts, score_sum=int(avg * attempts), avg_score=avg)
+            for user, (avg, attempts) in zip(users, [(50, 2), (80, 1), (50, 3), (50, 2), (100, 1), (20, 4)])
+        ])
+        expected = [entry.user_id for entry in ranked('all')]
+        self.assertEqual([expected.index(user.pk) + 1 for user in users], [4, 2, 3, 5, 1, 6])
+        self.assertEqual([user_rank(user)[0] for user in users], [4, 2, 3, 5, 1, 6])
+
+        with CaptureQueriesContext(connection) as queries:
+            user_rank(users[0])
+        plan = connection.cursor().execute(
+            f"EXPLAIN QUERY PLAN {queries[-1]['sql']}",
+        ).fetchall()
+        self.assertIn('leaderboard_rank_idx (board=? AND avg_score>?)', str(plan))
+
+    def test_retake_in_new_week_moves_between_period_boards(self):
+        user = self.submit('carol', 2)
+        attempt = UserAssessmentAttempt.objects.get(user=user)
+        old_week = timezone.now() - timedelta(days=14)
+        UserAssessmentAttempt.objects.filter(pk=attempt.pk).update(completed_at=old_week)
+        rebuild_stats()
+
+        self.submit('carol', 4)
+        incremental = self.boards()
+        rebuild_stats()
+        self.assertEqual(incremental, self.boards())
+
+    def test_migration_backfills_every_board(self):
+        self.submit('alice', 4)
+        self.submit('bob', 1)
+        expected = self.boards()
+        # Right after the UserStats rename only the 'all' board exists
+        LeaderboardEntry.objects.exclude(board='all').delete()
+
+        migration = import_module('assessment.migrations.0010_leaderboard_entry')
+        migration.populate_boards(apps, None)
+        self.assertEqual(self.boards(), expected)
+        self.assertTrue(LeaderboardEntry.objects.filter(board=resolve_board('week')).exists())
+
+    def test_deleting_attempt_removes_entries(self):
+        user = self.submit('dave', 4)
+        UserAssessmentAttempt.objects.filter(user=user).delete()
+        self.assertEqual(self.boards(), [])
+        self.assertEqual(user_rank(user), (None, None))
+
+
+class HomeProgressCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', 'learner@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.assessment = Assessment.objects.create(title='Passwords', description='d', pass_score=50)
+        Assessment.objects.create(title='Phishing', description='d')
+        self.question = Question.objects.create(assessment=self.assessment, question_text='q', correct_answer='yes')
+
+    def get_home(self):
+        return self.client.get(reverse('home')).context
+
+    def test_repeat_visit_is_served_from_cache(self):
+        self.get_home()
+        # session + user + the versions the cache keys embed
+        with self.assertNumQueries(3):
+            context = self.get_home()
+        self.assertEqual(context['completed_assessments'], 0)
+        self.assertEqual(context['total_assessments'], 2)
+
+    def test_submission_invalidates_summary(self):
+        self.get_home()
+        self.client.get(reverse('take_assessment', args=[self.assessment.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('submit_assessment', args=[self.assessment.id]),
+                json.dumps({'answers': {str(self.question.id): 'yes'}}), content_type='application/json',
+            )
+        context = self.get_home()
+        self.assertEqual(context['completed_assessments'], 1)
+        self.assertEqual(context['progress_percentage'], 50.0)
+        self.assertEqual(context['recent_attempts'][0]['title'], 'Passwords')
+        self.assertEqual(context['my_rank'], 1)
+
+    def test_deactivating_assessment_invalidates_summary(self):
+        self.get_home()
+        phishing = Assessment.objects.get(title='Phishing')
+        phishing.is_active = False
+        phishing.save()
+        self.assertEqual(self.get_home()['total_assessments'], 1)
+
+    def test_attempt_changed_outside_the_view_invalidates_summary(self):
+        self.get_home()
+        key = summary_cache_key(self.user.pk)
+        attempt = UserAssessmentAttempt.objects.create(
+            user=self.user, assessment=self.assessment, is_completed=True, score=80, is_passed=True,
+            completed_at=timezone.now(),
+        )
+        # The key moves with a version in the database, so every worker's
+        # cache misses, not only this one's
+        self.assertNotEqual(summary_cache_key(self.user.pk), key)
+        self.assertEqual(self.get_home()['completed_assessments'], 1)
+
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        attempt.user = other
+        attempt.save()
+        self.assertEqual(self.get_home()['completed_assessments'], 0)
+
+        key = summary_cache_key(other.pk)
+        attempt.delete()
+        self.assertNotEqual(summary_cache_key(other.pk), key)
+
+    def test_versions_are_shared_between_workers(self):
+        self.get_home()
+        key = summary_cache_key(self.user.pk)
+        # Another worker deactivates an assessment; it only touches the database
+        Assessment.objects.filter(title='Phishing').update(is_active=False)
+        bump_active_assessments_version()
+        self.assertNotEqual(summary_cache_key(self.user.pk), key)
+        self.assertEqual(self.get_home()['total_assessments'], 1)
+
+
+class TutorialImportTests(TestCase):
+    def upload(self, content):
+        return SimpleUploadedFile('tutorials.csv', content.encode('utf-8'), content_type='text/csv')
+
+    def test_youtube_import_skips_duplicates_and_bad_rows(self):
+        Tutorial.objects.create(title='Old', description='d', video_url='https://youtu.be/old')
+        rows = ['name,link', 'Old again,https://youtu.be/old', ',https://youtu.be/x', 'Vimeo,https://vimeo.com/1']
+        rows += [f'Video {i},https://youtu.be/{i % 7}' for i in range(20)]
+        report = import_tutorials(self.upload('\n'.join(rows)), 'url', batch_size=5)
+
+        self.assertEqual((report.created, report.duplicates, report.invalid), (7, 14, 2))
+        self.assertEqual(report.errors, ['Line 3: missing name or link', 'Line 4: not a valid YouTube URL'])
+        self.assertEqual(Tutorial.objects.filter(video_type='youtube').count(), 8)
+
+    def test_local_import_from_temporary_upload(self):
+        upload = TemporaryUploadedFile('videos.csv', 'text/csv', 0, 'utf-8')
+        upload.write(b'\xef\xbb\xbfname,file_path,description\nIntro,/videos/intro.mp4,Welcome\nNotes,/videos/notes.txt,\n')
+        upload.seek(0)
+        report = import_tutorials(upload, 'mp4')
+
+        self.assertEqual((report.created, report.invalid), (1, 1))
+        tutorial = Tutorial.objects.get()
+        self.assertEqual((tutorial.video_type, tutorial.local_file_path, tutorial.description),
+                         ('local', '/videos/intro.mp4', 'Welcome'))
+
+    def test_missing_columns(self):
+        with self.assertRaises(CSVImportError):
+            import_tutorials(self.upload('title,url\nA,https://youtu.be/a\n'), 'url')
+
+    def test_overlong_title_is_rejected(self):
+        title = 'T' * 201
+        report = import_tutorials(self.upload(f'name,link\n{title},https://youtu.be/a\n{title[:200]},https://youtu.be/b\n'), 'url')
+        self.assertEqual((report.created, report.invalid), (1, 1))
+        self.assertEqual(report.errors, ['Line 2: name is longer than 200 characters'])
+        self.assertEqual(Tutorial.objects.get().title, title[:200])
+
+
+class QuestionBankImportTests(TestCase):
+    HEADER = 'assessment_title,question_text,correct_answer,question_type,options,explanation,pass_score\n'
+
+    def upload(self, rows):
+        return SimpleUploadedFile('bank.csv', (self.HEADER + rows).encode('utf-8'), content_type='text/csv')
+
+    def test_rows_grouped_into_assessments(self):
+        report = import_question_bank(self.upload(
+            'Phishing,What is phishing?,An attack,,A fish|An attack|A bug,Social engineering,80\n'
+            'Phishing,Links are safe,False,true_false,,,\n'
+            'Passwords,Pick one,"Long, random","","[""abc"", ""Long, random""]",,\n'
+        ))
+
+        self.assertEqual(report.created, 3)
+        phishing = Assessment.objects.get(title='Phishing')
+        self.assertEqual((phishing.pass_score, phishing.question_count), (80, 2))
+        self.assertEqual(list(phishing.questions.values_list('order', 'question_type')),
+                         [(1, 'multiple_choice'), (2, 'true_false')])
+        self.assertEqual(Question.objects.get(assessment__title='Passwords').options, ['abc', 'Long, random'])
+
+    def test_invalid_row_rolls_back_everything(self):
+        report = import_question_bank(self.upload(
+            'Phishing,What is phishing?,An attack,,A fish|An attack,,\n'
+            'Phishing,Pick one,Missing,,A|B,,\n'
+            'Phishing,True?,True,true_false,,,150\n'
+        ))
+
+        self.assertEqual(report.errors, ['Line 3: correct_answer is not one of the options'])
+        self.assertFalse(Assessment.objects.exists())
+
+    def test_assessment_name_overrides_title_column(self):
+        upload = SimpleUploadedFile('bank.csv', b'question_text,correct_answer,question_type\nSafe?,True,true_false\n')
+        report = import_question_bank(upload, assessment_name='Basics')
+        self.assertEqual([assessment.title for assessment in report.assessments], ['Basics'])
+        self.assertEqual(Assessment.objects.get().question_count, 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMPORT_JOBS_RUNNER='command')
+class ImportJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+
+    def upload(self, csv_type, content, **data):
+        csv_file = SimpleUploadedFile('upload.csv', content.encode('utf-8'), content_type='text/csv')
+        return self.client.post(reverse('upload_assessment'), {'csv_type': csv_type, 'csv_file': csv_file, **data})
+
+    def status(self, job):
+        return self.client.get(reverse('import_job_status', args=[job.pk])).json()
+
+    def test_upload_is_queued_then_processed(self):
+        response = self.upload('url', 'name,link\nA,https://youtu.be/a\nB,https://youtu.be/a\nC,https://x.com\n')
+        job = ImportJob.objects.get()
+        upload_path = job.file.path
+        self.assertRedirects(response, f"{reverse('upload_assessment')}?job={job.pk}")
+        self.assertEqual(self.status(job)['status'], 'pending')
+        self.assertFalse(Tutorial.objects.exists())
+
+        self.assertEqual(process_pending_jobs(), 1)
+        status = self.status(job)
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(
+            (status['total_rows'], status['rows_processed'], status['created'], status['skipped'], status['failed']),
+            (3, 3, 1, 1, 1),
+        )
+        self.assertEqual(process_pending_jobs(), 0)
+        # The upload is deleted once the job is finished
+        self.assertFalse(ImportJob.objects.get().file)
+        self.assertFalse(os.path.exists(upload_path))
+
+    def test_bad_columns_fail_the_job(self):
+        self.upload('assessment', 'title\nx\n', assessment_name='Bank')
+        process_pending_jobs()
+        status = self.status(ImportJob.objects.get())
+        self.assertEqual(status['status'], 'failed')
+        self.assertIn('question_text', status['message'])
+
+    def test_abandoned_job_is_claimed_again(self):
+        self.upload('url', 'name,link\nA,https://youtu.be/a\n')
+        job = ImportJob.objects.get()
+        # Its worker died: the lease ran out without any progress
+        ImportJob.objects.filter(pk=job.pk).update(
+            status='running', attempts=1, claimed_by='dead', lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(process_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.created_count), ('done', 2, 1))
+
+    def test_running_job_with_live_lease_is_left_alone(self):
+        self.upload('url', 'name,link\nA,https://youtu.be/a\n')
+        ImportJob.objects.update(status='running', attempts=1, lease_expires_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(process_pending_jobs(), 0)
+        self.assertEqual(ImportJob.objects.get().status, 'running')
+
+    def test_job_interrupted_too_often_fails(self):
+        self.upload('url', 'name,link\nA,https://youtu.be/a\n')
+        ImportJob.objects.update(status='running', attempts=3, lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(process_pending_jobs(), 0)
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('interrupted 3 times', job.message)
+        self.assertFalse(job.file)
+        self.assertFalse(Tutorial.objects.exists())
+
+    @override_settings(IMPORT_JOBS_RUNNER='thread')
+    def test_thread_runner_processes_upload_after_commit(self):
+        with mock.patch('assessment.jobs._get_executor') as executor, mock.patch('assessment.jobs._drain_queued', False):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.upload('url', 'name,link\nA,https://youtu.be/a\n')
+            self.assertEqual(ImportJob.objects.get().status, 'pending')
+            # Only one run waits in the pool however often it is woken up
+            self.status(ImportJob.objects.get())
+            executor.return_value.submit.assert_called_once()
+
+            run = executor.return_value.submit.call_args.args[0]
+            run()
+        self.assertEqual(self.status(ImportJob.objects.get())['status'], 'done')
+        self.assertTrue(Tutorial.objects.filter(video_url='https://youtu.be/a').exists())
+
+    @override_settings(IMPORT_JOBS_RUNNER='thread')
+    def test_status_poll_wakes_thread_runner_after_restart(self):
+        self.upload('url', 'name,link\nA,https://youtu.be/a\n')
+        job = ImportJob.objects.get()
+        # A new process: nothing is queued in its pool yet
+        with mock.patch('assessment.jobs._get_executor') as executor, mock.patch('assessment.jobs._drain_queued', False):
+            self.status(job)
+            executor.return_value.submit.assert_called_once()
+            executor.return_value.submit.call_args.args[0]()
+        self.assertTrue(self.status(job)['finished'])
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_users_upload_provisions_accounts(self):
+        self.upload('users', 'email,first_name\nnew@example.com,New\nadmin@example.com,Dup\n')
+        process_pending_jobs()
+        status = self.status(ImportJob.objects.get())
+        self.assertEqual((status['status'], status['created'], status['skipped']), ('done', 1, 1))
+        self.assertEqual(status['errors'], ['Line 3: a user with email admin@example.com already exists'])
+        self.assertEqual(User.objects.get(email='new@example.com').profile.user_code, 'SS-002')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserProvisioningTests(TestCase):
+    def provision(self, content, **kwargs):
+        return provision_users(io.BytesIO(content.encode('utf-8')), **kwargs)
+
+    def test_batches_number_profiles_and_report_duplicates(self):
+        existing = User.objects.create_user('old@example.com', 'old@example.com', 'pw')
+        self.assertEqual(existing.profile.user_code, 'SS-001')
+        report = self.provision(
+            'email,first_name,last_name,emp_id,password\n'
+            'a@example.com,Ann,Lee,,secret1\n'
+            'OLD@example.com,Old,User,,\n'
+            'b@example.com,Bob,,HR-7,\n'
+            'a@example.com,Ann,Again,,\n'
+            'c@example.com,Cat,,HR-7,\n'
+            'not-an-email,X,,,\n'
+            'd@example.com,Dan,,EMP003,\n'
+            'e@example.com,Eve,,,\n',
+            batch_size=3,
+        )
+        self.assertEqual((report.processed, report.created, report.duplicates, report.invalid), (8, 4, 3, 1))
+        self.assertEqual(report.errors, [
+            'Line 3: a user with email OLD@example.com already exists',
+            'Line 7: "not-an-email" is not a valid email address',
+            'Line 5: a@example.com appears earlier in the file',
+            'Line 6: emp_id HR-7 appears earlier in the file',
+        ])
+
+        profiles = dict(Profile.objects.exclude(user=existing).values_list('user__email', 'emp_id'))
+        self.assertEqual(profiles, {
+            'a@example.com': 'EMP002', 'b@example.com': 'HR-7', 'd@example.com': 'EMP003', 'e@example.com': 'EMP005',
+        })
+        self.assertEqual(
+            sorted(Profile.objects.values_list('user_code', flat=True)), ['SS-001', 'SS-002', 'SS-003', 'SS-004', 'SS-005'],
+        )
+        user = User.objects.get(email='a@example.com')
+        self.assertEqual((user.username, user.first_name, user.last_name), ('a@example.com', 'Ann', 'Lee'))
+        self.assertTrue(user.check_password('secret1'))
+        self.assertTrue(User.objects.get(email='e@example.com').has_usable_password())
+
+        # A second run finds everyone already there
+        again = self.provision('email\na@example.com\ne@example.com\n')
+        self.assertEqual((again.created, again.duplicates), (0, 2))
+
+    def test_generated_emp_ids_skip_ids_given_later_in_the_file(self):
+        report = self.provision('email,emp_id\na@example.com,\nb@example.com,EMP001\n', batch_size=1)
+        self.assertEqual((report.created, report.duplicates), (2, 0))
+        self.assertEqual(
+            dict(Profile.objects.values_list('user__email', 'emp_id')),
+            {'a@example.com': 'EMP002', 'b@example.com': 'EMP001'},
+        )
+
+    def test_existing_users_are_found_through_an_index(self):
+        User.objects.create_user('Old@Example.com', 'Old@Example.com', 'pw')
+        with CaptureQueriesContext(connection) as queries:
+            report = self.provision('email\nold@example.com\n')
+        self.assertEqual(report.duplicates, 1)
+        lookups = [query['sql'] for query in queries if 'LOWER(' in query['sql'] and 'FROM "auth_user"' in query['sql']]
+        self.assertEqual(len(lookups), 2)
+        for sql in lookups:
+            plan = str(connection.cursor().execute(f'EXPLAIN QUERY PLAN {sql}').fetchall())
+            self.assertRegex(plan, r'USING (COVERING )?INDEX auth_user_(email|username)_lower_idx')
+
+    def test_overlong_cells_are_rejected(self):
+        report = self.provision(
+            'email,first_name,emp_id,phone_number\n'
+            f'a@example.com,Ann,{"E" * 51},\n'
+            'b@example.com,Bob,,12345678901\n'
+            'c@example.com,Cat,HR-1,\n'
+        )
+        self.assertEqual((report.created, report.invalid), (1, 2))
+        self.assertEqual(report.errors, [
+            'Line 2: emp_id is longer than 50 characters',
+            'Line 3: phone_number is longer than 10 characters',
+        ])
+
+    def test_batch_is_renumbered_after_a_concurrent_writer(self):
+        User.objects.create_user('old@example.com', 'old@example.com', 'pw')
+        numbers = iter([1])
+        real = provisioning.next_profile_number
+
+        # The first read is stale, as if another job had taken SS-001 meanwhile
+        with mock.patch.object(provisioning, 'next_profile_number', lambda: next(numbers, None) or real()):
+            report = self.provision('email\na@example.com\nb@example.com\n')
+        self.assertEqual((report.created, report.duplicates), (2, 0))
+        self.assertEqual(
+            sorted(Profile.objects.values_list('user_code', flat=True)), ['SS-001', 'SS-002', 'SS-003'],
+        )
+
+    def test_rows_taken_by_a_concurrent_writer_are_reported(self):
+        real = provisioning._existing
+        checks = iter([(set(), set())])
+
+        def existing(chunk):
+            # The duplicate check runs before the user below is created
+            found = next(checks, None)
+            if found is not None:
+                User.objects.create_user('b@example.com', 'b@example.com', 'pw')
+                return found
+            return real(chunk)
+
+        with mock.patch.object(provisioning, '_existing', existing):
+            report = self.provision('email\na@example.com\nb@example.com\n')
+        self.assertEqual((report.created, report.duplicates), (1, 1))
+        self.assertEqual(report.errors, ['Line 3: a user with email b@example.com already exists'])
+        self.assertTrue(User.objects.filter(email='a@example.com').exists())
+
+
+@override_settings(TUTORIAL_PROGRESS_BUFFER=False)
+class TutorialProgressApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', 'viewer@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.first = Tutorial.objects.create(title='First', description='d', video_url='https://youtu.be/1')
+        self.second = Tutorial.objects.create(title='Second', description='d', video_url='https://youtu.be/2')
+
+    def post(self, updates, **extra):
+        response = self.client.post(
+            reverse('tutorial_progress_api'), json.dumps({'updates': updates, **extra}),
+            content_type='application/json',
+        )
+        return response.json()
+
+    def stored(self, tutorial):
+        return TutorialProgress.objects.filter(tutorial=tutorial).values_list('max_progress', 'current_position').get()
+
+    def test_batched_upserts_are_monotonic_and_coalesced(self):
+        result = self.post([
+            {'tutorial_id': self.first.id, 'progress': 40, 'current_position': 40},
+            {'tutorial_id': self.second.id, 'progress': 10, 'current_position': 10},
+            {'tutorial_id': 9999, 'progress': 50},
+        ])
+        self.assertEqual(result, {'saved': 2, 'coalesced': 0})
+
+        # Small moves are coalesced, a rewind never lowers max_progress
+        result = self.post([
+            {'tutorial_id': self.first.id, 'progress': 42, 'current_position': 42},
+            {'tutorial_id': self.second.id, 'progress': 5, 'current_position': 5},
+        ])
+        self.assertEqual(result, {'saved': 1, 'coalesced': 1})
+        self.assertEqual(self.stored(self.first), (40, 40))
+        self.assertEqual(self.stored(self.second), (10, 5))
+
+        # The final batch is always written
+        self.post([{'tutorial_id': self.first.id, 'progress': 42, 'current_position': 42}], final=True)
+        self.assertEqual(self.stored(self.first), (42, 42))
+
+    def test_non_finite_progress_is_rejected(self):
+        for body in [
+            f'{{"tutorial_id": {self.first.id}, "progress": NaN}}',
+            f'{{"tutorial_id": {self.first.id}, "progress": 50, "current_position": Infinity}}',
+            f'{{"updates": [{{"tutorial_id": {self.first.id}, "progress": "-inf"}}]}}',
+        ]:
+            response = self.client.post(reverse('tutorial_progress_api'), body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(TutorialProgress.objects.exists())
+
+    def test_completion_and_read_back(self):
+        self.post([{'tutorial_id': self.first.id, 'progress': 97, 'current_position': 97}])
+        self.post([{'tutorial_id': self.first.id, 'progress': 100, 'current_position': 100}])
+        progress = self.client.get(reverse('tutorial_progress_api')).json()
+        self.assertEqual(progress[str(self.first.id)]['maxProgress'], 100)
+        self.assertTrue(progress[str(self.first.id)]['completed'])
+
+    def test_single_update_and_bad_payload(self):
+        response = self.client.post(
+            reverse('tutorial_progress_api'),
+            json.dumps({'tutorial_id': self.first.id, 'progress': 30, 'current_position': 30, 'completed': False}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['saved'], 1)
+        response = self.client.post(
+            reverse('tutorial_progress_api'), json.dumps({'updates': [{'progress': 1}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class WriteBehindBufferTests(TestCase):
+    def setUp(self):
+        self.batches = []
+        self.fail = False
+
+    def flush_func(self, batch):
+        if self.fail:
+            raise RuntimeError('database is locked')
+        self.batches.append(batch)
+
+    def make_buffer(self, **kwargs):
+        return WriteBehindBuffer(self.flush_func, max, interval=None, **kwargs)
+
+    def test_merges_and_flushes_at_size_threshold(self):
+        buffer = self.make_buffer(max_pending=2)
+        buffer.add('a', 10)
+        buffer.add('a', 30)
+        buffer.add('a', 20)
+        self.assertEqual(self.batches, [])
+        buffer.add('b', 5)
+        self.assertEqual(self.batches, [{'a': 30, 'b': 5}])
+        self.assertEqual(buffer.stats(), {
+            'buffered': 4, 'merged': 2, 'flushed': 2, 'dropped': 0, 'flushes': 1, 'flush_errors': 0, 'pending': 0,
+        })
+
+    def test_failed_flush_is_retried_and_overflow_dropped(self):
+        buffer = self.make_buffer(max_pending=100, max_buffered=2)
+        buffer.add('a', 1)
+        buffer.add('b', 1)
+        self.assertFalse(buffer.add('c', 1))
+
+        self.fail = True
+        # The failure is logged once, with the updates kept for the retry
+        with self.assertLogs('assessment.heartbeats', 'ERROR') as logs:
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('2 update(s) kept for the next attempt', logs.records[0].getMessage())
+        buffer.add('a', 5)
+        self.fail = False
+        buffer.flush()
+        self.assertEqual(self.batches, [{'a': 5, 'b': 1}])
+        stats = buffer.stats()
+        self.assertEqual((stats['dropped'], stats['flush_errors'], stats['flushed']), (1, 1, 2))
+
+
+    def test_flusher_thread_survives_a_failed_flush(self):
+        class Stop(BaseException):
+            pass
+
+        buffer = self.make_buffer()
+        buffer.add('a', 1)
+        real_flush = buffer.flush
+        calls = []
+
+        def flush():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return real_flush()
+
+        # The first wake-up fails, the second writes, the third stops the loop
+        with mock.patch.object(buffer, 'flush', flush), \
+                mock.patch.object(buffer._wake, 'wait', side_effect=[True, True, Stop]), \
+                self.assertLogs('assessment.heartbeats', 'ERROR') as logs:
+            with self.assertRaises(Stop):
+                buffer._run()
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('flusher failed', logs.records[0].getMessage())
+        self.assertEqual(self.batches, [{'a': 1}])
+
+
+@override_settings(TUTORIAL_PROGRESS_BUFFER=True, TUTORIAL_PROGRESS_FLUSH_INTERVAL=0)
+class BufferedTutorialProgressTests(TestCase):
+    def setUp(self):
+        heartbeats._progress_buffer = None
+        self.user = User.objects.create_user('viewer', 'viewer@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.tutorial = Tutorial.objects.create(title='First', description='d', video_url='https://youtu.be/1')
+
+    def tearDown(self):
+        heartbeats._progress_buffer = None
+
+    def test_heartbeats_are_written_on_flush(self):
+        for progress in (10, 20, 15):
+            response = self.client.post(
+                reverse('tutorial_progress_api'),
+                json.dumps({'updates': [{'tutorial_id': self.tutorial.id, 'progress': progress, 'current_position': progress}]}),
+                content_type='application/json',
+            )
+            self.assertEqual(response.json(), {'buffered': 1, 'dropped': 0})
+        self.assertFalse(TutorialProgress.objects.exists())
+        # Reads include what is still buffered
+        progress = self.client.get(reverse('tutorial_progress_api')).json()
+        self.assertEqual(progress[str(self.tutorial.id)]['maxProgress'], 20)
+
+        # One transaction: tutorials, existing rows, insert (+ savepoint in tests)
+        with self.assertNumQueries(5):
+            heartbeats.get_progress_buffer().flush()
+        self.assertEqual(
+            TutorialProgress.objects.values_list('max_progress', 'current_position').get(), (20, 15)
+        )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), PROFILE_IMAGE_FORMAT='WEBP')
+class ProfileImageRenditionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('pictured', 'pictured@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def png(self, size=(1600, 900)):
+        output = io.BytesIO()
+        Image.new('RGBA', size, (200, 30, 30, 255)).save(output, 'PNG')
+        return SimpleUploadedFile('screenshot.png', output.getvalue(), content_type='image/png')
+
+    def test_upload_builds_renditions(self):
+        self.client.post(reverse('upload_profile_picture'), {'profile_pic': self.png()})
+        profile = self.user.profile
+        profile.refresh_from_db()
+
+        sizes = {}
+        for field in ('image_thumbnail', 'image_card', 'image_full'):
+            with Image.open(getattr(profile, field).path) as image:
+                sizes[field] = (image.format, image.size)
+        self.assertEqual(sizes, {
+            'image_thumbnail': ('WEBP', (96, 96)),
+            'image_card': ('WEBP', (300, 300)),
+            'image_full': ('WEBP', (1024, 576)),
+        })
+        self.assertEqual(profile.thumbnail_url, profile.image_thumbnail.url)
+
+    def test_invalid_upload_is_rejected(self):
+        upload = SimpleUploadedFile('notes.png', b'not an image', content_type='image/png')
+        self.client.post(reverse('upload_profile_picture'), {'profile_pic': upload})
+        self.assertFalse(self.user.profile.profile_image)
+
+    def test_changed_picture_drops_old_renditions(self):
+        self.client.post(reverse('upload_profile_picture'), {'profile_pic': self.png()})
+        profile = Profile.objects.get(user=self.user)
+        old_thumbnail = profile.image_thumbnail.path
+
+        profile.profile_image = self.png((200, 200))
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        profile.refresh_from_db()
+        self.assertFalse(profile.image_thumbnail)
+        self.assertEqual(profile.thumbnail_url, profile.profile_image.url)
+        self.assertFalse(os.path.exists(old_thumbnail))
+
+        # build_profile_renditions picks it up again without --force
+        call_command('build_profile_renditions', stdout=io.StringIO())
+        profile.refresh_from_db()
+        self.assertTrue(profile.image_thumbnail)
+
+    def test_admin_picture_change_rebuilds_renditions(self):
+        self.client.post(reverse('upload_profile_picture'), {'profile_pic': self.png()})
+        profile = Profile.objects.get(user=self.user)
+        old_card = profile.image_card.name
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.post(reverse('admin:assessment_profile_change', args=[profile.pk]), {
+            'user': self.user.pk, 'profile_image': self.png((400, 800)), 'phone_number': '', 'gender': '',
+            'address': '', 'emp_id': profile.emp_id, 'user_code': profile.user_code,
+        })
+        self.assertEqual(response.status_code, 302)
+        profile.refresh_from_db()
+        self.assertNotEqual(profile.image_card.name, old_card)
+        with Image.open(profile.image_full.path) as image:
+            self.assertEqual(image.size, (400, 800))
+
+    def test_edit_profile_with_invalid_picture_reports_only_the_error(self):
+        upload = SimpleUploadedFile('notes.png', b'not an image', content_type='image/png')
+        response = self.client.post(reverse('edit_profile'), {
+            'username': 'pictured', 'email': 'pictured@example.com', 'phone': '', 'gender': '', 'address': '',
+            'profile_pic': upload,
+        }, follow=True)
+        self.assertEqual(
+            [str(message) for message in response.context['messages']], ['Upload a valid image file.'],
+        )
+
+    def test_backfill_command(self):
+        profile = self.user.profile
+        profile.profile_image = self.png((200, 200))
+        profile.save()
+        self.assertEqual(profile.thumbnail_url, profile.profile_image.url)
+
+        call_command('build_profile_renditions', stdout=io.StringIO())
+        profile.refresh_from_db()
+        self.assertTrue(profile.image_thumbnail.name.endswith('-thumbnail.webp'))
+
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        for first, last in [('Asha', 'Rao'), ('Ravi', 'Kumar'), ('Ramesh', 'Iyer'), ('Meena', 'Raman')]:
+            User.objects.create_user(f'{first.lower()}@corp.example', f'{first.lower()}@corp.example', 'pw',
+                                     first_name=first, last_name=last)
+
+    def page(self, **params):
+        return self.client.get(reverse('users_data'), {'draw': 3, 'start': 0, 'length': 10, **params}).json()
+
+    def test_search_matches_name_email_and_emp_id_prefixes(self):
+        result = self.page(**{'search[value]': 'ra', 'order[0][column]': 2})
+        self.assertEqual((result['draw'], result['recordsTotal'], result['recordsFiltered']), (3, 5, 4))
+        self.assertEqual([row['name'] for row in result['data']], ['Asha Rao', 'Meena Raman', 'Ramesh Iyer', 'Ravi Kumar'])
+
+        emp_id = Profile.objects.get(user__first_name='Meena').emp_id
+        result = self.page(**{'search[value]': emp_id.lower()})
+        self.assertEqual([row['email'] for row in result['data']], ['meena@corp.example'])
+
+        # Every term has to match
+        self.assertEqual(self.page(**{'search[value]': 'ravi iyer'})['recordsFiltered'], 0)
+
+    def test_pagination_and_ordering(self):
+        result = self.page(**{'start': 1, 'length': 10, 'order[0][column]': 1, 'order[0][dir]': 'desc'})
+        self.assertEqual(len(result['data']), 4)
+        self.assertEqual(result['data'][0]['email'], 'ramesh@corp.example')
+
+        # Unknown page sizes fall back to the default
+        self.assertEqual(len(self.page(length=100000)['data']), 5)
+
+    def test_edit_form_is_loaded_on_demand(self):
+        user = User.objects.get(first_name='Ravi')
+        response = self.client.get(reverse('admin_edit_profile_form', args=[user.id]))
+        self.assertContains(response, 'value="ravi@corp.example"')
+        self.assertNotContains(self.client.get(reverse('users')), 'ravi@corp.example')
+
+
+class SQLiteProductionBackendTests(SimpleTestCase):
+    def test_pragmas_and_immediate_transactions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            connection = ConnectionHandler({'default': {
+                'ENGINE': 'sensen_security.sqlite',
+                'NAME': os.path.join(directory, 'db.sqlite3'),
+                'OPTIONS': {
+                    'timeout': 20,
+                    'transaction_mode': 'IMMEDIATE',
+                    'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL'},
+                },
+            }})['default']
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)
+                # What atomic() does when it opens a transaction
+                with CaptureQueriesContext(connection) as queries:
+                    connection.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+                    connection.rollback()
+                    connection.set_autocommit(True)
+                self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+            finally:
+                connection.close()
+
+
+class AnalyticsRoutingTests(SimpleTestCase):
+    def test_only_reads_inside_analytics_views_are_routed(self):
+        router = AnalyticsRouter()
+        with override_settings(ANALYTICS_DATABASE=''), analytics_reads():
+            self.assertIsNone(router.db_for_read(Assessment))
+
+        with override_settings(ANALYTICS_DATABASE='readonly'):
+            self.assertIsNone(router.db_for_read(Assessment))
+            with analytics_reads():
+                self.assertEqual(router.db_for_read(Assessment), 'analytics')
+                self.assertEqual(router.db_for_write(Assessment), 'default')
+            self.assertIsNone(router.db_for_read(Assessment))
+            self.assertFalse(router.allow_migrate('analytics', 'assessment'))
+
+    def test_snapshot_is_refreshed_with_the_backup_api(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, 'main.sqlite3')
+            snapshot_path = os.path.join(directory, 'snapshot.sqlite3')
+            source = sqlite3.connect(source_path)
+            source.execute('PRAGMA journal_mode = WAL')
+            source.execute('CREATE TABLE t (n INTEGER)')
+            source.execute('INSERT INTO t VALUES (1), (2)')
+            source.commit()
+
+            router = AnalyticsRouter()
+            with override_settings(ANALYTICS_DATABASE='snapshot', ANALYTICS_SNAPSHOT_PATH=snapshot_path), analytics_reads():
+                # Nothing to read before the first refresh
+                self.assertIsNone(router.db_for_read(Assessment))
+                refresh_snapshot(source_path)
+                self.assertEqual(router.db_for_read(Assessment), 'analytics')
+                self.assertNotEqual(snapshot_version(), 0)
+            source.close()
+
+            snapshot = sqlite3.connect(snapshot_path)
+            self.assertEqual(snapshot.execute('SELECT COUNT(*) FROM t').fetchone()[0], 2)
+            self.assertEqual(snapshot.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+            snapshot.close()
+
+
+@override_settings(EMAIL_OUTBOX_RUNNER='command', EMAIL_OUTBOX_BATCH_SIZE=2)
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner', 'learner@example.com', 'pw', first_name='Lee')
+
+    def test_views_queue_and_worker_sends_in_batches(self):
+        response = self.client.post(reverse('forgot_password'), {'email': 'learner@example.com'})
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin_reset_password'), json.dumps({'email': 'learner@example.com'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboxEmail.objects.filter(status='pending').count(), 2)
+
+        with self.assertNumQueries(5):
+            # Claim (update + fetch) and one bulk update for the batch, then an empty claim
+            self.assertEqual(send_pending(), (2, 0))
+        self.assertEqual(
+            sorted(message.subject for message in mail.outbox), ['New Login Credentials', 'Reset Your Password'],
+        )
+        self.assertEqual(mail.outbox[0].to, ['learner@example.com'])
+        self.assertFalse(OutboxEmail.objects.exclude(body='').exists())
+        self.assertEqual(send_pending(), (0, 0))
+
+    def test_failed_sends_back_off_then_give_up(self):
+        email = queue_email('Hi', 'Body', ['learner@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.assertEqual(send_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'down'))
+        # Kept for the retry
+        self.assertEqual(email.body, 'Body')
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # Not due yet
+        self.assertEqual(send_pending(), (0, 0))
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now(), attempts=4)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')),\
+                self.assertLogs('assessment.outbox', 'ERROR'):
+            send_pending()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 5))
+        # Credentials in the body aren't kept once the email is given up on
+        self.assertEqual((email.body, email.html_body, email.subject), ('', '', 'Hi'))
+        self.assertEqual(mail.outbox, [])
+
+    def test_migration_clears_failed_bodies(self):
+        failed = queue_email('Hi', 'Your password is hunter2', ['learner@example.com'], html_body='<p>hunter2</p>')
+        pending = queue_email('Hi', 'Body', ['learner@example.com'])
+        OutboxEmail.objects.filter(pk=failed.pk).update(status='failed')
+        migration = import_module('assessment.migrations.0022_clear_failed_outbox_bodies')
+        migration.clear_failed_bodies(apps, None)
+        self.assertEqual(OutboxEmail.objects.values_list('body', 'html_body').get(pk=failed.pk), ('', ''))
+        self.assertEqual(OutboxEmail.objects.values_list('body', flat=True).get(pk=pending.pk), 'Body')
+
+    @override_settings(EMAIL_OUTBOX_RUNNER='thread')
+    def test_thread_worker_wakes_up_for_a_retry(self):
+        with self.captureOnCommitCallbacks():
+            email = queue_email('Hi', 'Body', ['learner@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')),\
+                mock.patch('assessment.outbox.threading.Timer') as timer:
+            outbox._drain()
+        email.refresh_from_db()
+        (delay, wake), _ = timer.call_args
+        self.assertAlmostEqual(delay, (email.next_attempt_at - timezone.now()).total_seconds(), delta=5)
+        timer.return_value.start.assert_called_once()
+
+        # Nothing else is queued; the timer alone sends the retry once it is due
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('assessment.outbox._get_executor') as executor:
+            wake()
+        run, func = executor.return_value.submit.call_args.args
+        with mock.patch('assessment.outbox.threading.Timer') as timer:
+            run(func)
+        self.assertEqual([message.subject for message in mail.outbox], ['Hi'])
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+        # Nothing left to wait for
+        timer.assert_not_called()
+
+    @override_settings(EMAIL_OUTBOX_RUNNER='thread')
+    def test_thread_worker_picks_up_a_lapsed_lease(self):
+        with self.captureOnCommitCallbacks():
+            queue_email('Hi', 'Body', ['learner@example.com'])
+        # A worker claimed the email and died before sending it
+        outbox.claim_batch(1)
+        with mock.patch('assessment.outbox.threading.Timer') as timer:
+            outbox._schedule_wakeup()
+        (delay, wake), _ = timer.call_args
+        self.assertAlmostEqual(delay, outbox.LEASE.total_seconds(), delta=5)
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('assessment.outbox._get_executor') as executor:
+            wake()
+        run, func = executor.return_value.submit.call_args.args
+        run(func)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(EMAIL_OUTBOX_RUNNER='command')
+class ReminderCampaignTests(TestCase):
+    def setUp(self):
+        self.first = Assessment.objects.create(title='Phishing', description='d')
+        self.second = Assessment.objects.create(title='Passwords', description='d')
+        self.halfway = User.objects.create_user('halfway', 'halfway@example.com', 'pw', first_name='Hana')
+        self.idle = User.objects.create_user('idle', 'idle@example.com', 'pw')
+        done = User.objects.create_user('done', 'done@example.com', 'pw')
+        User.objects.create_user('inactive', 'inactive@example.com', 'pw', is_active=False)
+        User.objects.create_user('noemail', '', 'pw')
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        for user, assessment, completed in [
+            (self.halfway, self.first, True), (self.halfway, self.second, False),
+            (done, self.first, True), (done, self.second, True),
+        ]:
+            UserAssessmentAttempt.objects.create(user=user, assessment=assessment, is_completed=completed)
+
+    def test_one_personalized_email_per_pending_user(self):
+        with self.assertNumQueries(6):
+            # Assessments, then in one savepoint: recipients, one bulk insert
+            # into the outbox and one recording who was reminded
+            self.assertEqual(send_reminders([self.first.id, self.second.id], 'http://testserver/assessments/'), 2)
+
+        send_pending()
+        bodies = {message.to[0]: message.body for message in mail.outbox}
+        self.assertEqual(set(bodies), {'halfway@example.com', 'idle@example.com'})
+        self.assertIn('Hi Hana,', bodies['halfway@example.com'])
+        self.assertIn('"Passwords" is still waiting', bodies['halfway@example.com'])
+        self.assertNotIn('Phishing', bodies['halfway@example.com'])
+        self.assertIn('Hi idle,', bodies['idle@example.com'])
+        self.assertIn('  - Passwords\n  - Phishing', bodies['idle@example.com'])
+        self.assertIn('http://testserver/assessments/', bodies['idle@example.com'])
+
+    def test_overview_pending_count_matches_recipients(self):
+        # Staff, inactive and email-less users are left out of both
+        overview = {row['id']: row['pending_count'] for row in assessment_overview()}
+        self.client.force_login(self.admin)
+        for assessment, pending in [(self.first, 1), (self.second, 2)]:
+            listed = self.client.get(reverse('assessment_overview_users', args=[assessment.id, 'pending'])).json()
+            self.assertEqual(overview[assessment.id], pending)
+            self.assertEqual(listed['count'], pending)
+            self.assertEqual(send_reminders([assessment.id], 'http://testserver/assessments/'), pending)
+
+    def test_recipients_are_fetched_in_pk_ranges(self):
+        with mock.patch('assessment.reminders.RECIPIENT_CHUNK_SIZE', 1), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(send_reminders([self.first.id, self.second.id], 'http://testserver/assessments/'), 2)
+        selects = [query['sql'] for query in queries if 'FROM "auth_user"' in query['sql']]
+        # One user per chunk, the third finds nobody left
+        self.assertEqual(len(selects), 3)
+        self.assertTrue(all('LIMIT 1' in sql and '"auth_user"."id" >' in sql for sql in selects))
+        self.assertEqual(
+            sorted(to for to, in OutboxEmail.objects.values_list('to')), [['halfway@example.com'], ['idle@example.com']],
+        )
+
+    def test_campaign_is_sent_once(self):
+        url = 'http://testserver/assessments/'
+        self.assertEqual(send_reminders([self.first.id, self.second.id], url), 2)
+        # A rerun, in either order, finds everyone already reminded
+        self.assertEqual(send_reminders([self.second.id, self.first.id], url), 0)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+        # A user who becomes pending later is still reminded
+        late = User.objects.create_user('late', 'late@example.com', 'pw')
+        self.assertEqual(send_reminders([self.first.id, self.second.id], url), 1)
+        self.assertEqual(OutboxEmail.objects.filter(to=[late.email]).count(), 1)
+
+        # Another selection is another campaign
+        self.assertEqual(send_reminders([self.second.id], url), 3)
+
+    def test_dashboard_form_queues_reminders(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('send_assessment_reminders'), {'assessment_ids': [self.first.id]})
+        self.assertRedirects(response, reverse('admin_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(list(OutboxEmail.objects.values_list('to', flat=True)), [['idle@example.com']])
+        self.assertEqual(mail.outbox, [])
+
+        # Submitting the form again doesn't remind anyone twice
+        response = self.client.post(reverse('send_assessment_reminders'), {'assessment_ids': [self.first.id]})
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)][-1], 'Sending reminders to 0 user(s).',
+        )
+
+    @override_settings(EMAIL_OUTBOX_RUNNER='thread')
+    def test_dashboard_form_hands_campaign_to_outbox_thread(self):
+        self.client.force_login(self.admin)
+        with mock.patch('assessment.outbox._get_executor') as executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('send_assessment_reminders'), {'assessment_ids': [self.first.id]})
+        self.assertFalse(OutboxEmail.objects.exists())
+        run, func, *args = executor.return_value.submit.call_args.args
+        self.assertEqual(func, send_reminders)
+        run(func, *args)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+
+class LoginWriteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('login', 'login@example.com', 'pw')
+
+    def test_login_leaves_profile_alone(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'email': 'login@example.com', 'password': 'pw'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertFalse([query for query in queries if 'assessment_profile' in query['sql']])
+        writes = [
+            ' '.join(query['sql'].split()[:3]) for query in queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        # The new session, last_login, then the session data at the end of the request
+        self.assertEqual(writes, [
+            'INSERT INTO "django_session"', 'UPDATE "auth_user" SET', 'UPDATE "django_session" SET',
+        ])
+
+    def test_changed_profile_is_saved_with_user(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.profile.phone_number = '5550100'
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        profile_updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "assessment_profile"')]
+        self.assertEqual(len(profile_updates), 1)
+        self.assertNotIn('"emp_id"', profile_updates[0])
+        self.assertEqual(Profile.objects.get(user=user).phone_number, '5550100')
+
+        with self.assertNumQueries(1):
+            # Unchanged since the last save
+            user.save()
+
+    def test_logout_ends_the_session_for_every_worker(self):
+        self.client.post(reverse('login'), {'email': 'login@example.com', 'password': 'pw'})
+        session_key = self.client.session.session_key
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        # Another worker serves a request with the session
+        self.assertEqual(SessionStore(session_key).load()['_auth_user_id'], str(self.user.pk))
+
+        # The per-process cache is the default, and a logout can only clear
+        # the copy in the worker that handled it
+        self.assertEqual(settings.CACHES['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+        with mock.patch('django.core.cache.backends.locmem.LocMemCache.delete'):
+            self.client.logout()
+        self.assertEqual(SessionStore(session_key).load(), {})
+
+    def test_sessions_are_cached_only_with_a_shared_cache(self):
+        self.assertEqual(default_session_engine('locmem'), 'django.contrib.sessions.backends.db')
+        self.assertEqual(default_session_engine('file'), 'django.contrib.sessions.backends.cached_db')
@@ -0,0 +1,120 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import UserAssessmentAttempt
+
+
+TRUNCATORS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+LABEL_FORMATS = {
+    'day': '%d %b %Y',
+    'week': 'Wk %d %b %Y',
+    'month': '%b %Y',
+}
+
+RANGE_DAYS = {'d': 1, 'w': 7, 'm': 30, 'y': 365}
+MAX_RANGE_DAYS = 365 * 20
+
+RANGE_CHOICES = [
+    ('30d', 'Last 30 days'),
+    ('12w', 'Last 12 weeks'),
+    ('12m', 'Last 12 months'),
+    ('3y', 'Last 3 years'),
+    ('5y', 'Last 5 years'),
+]
+
+DEFAULT_RANGE = '12m'
+DEFAULT_GRANULARITY = 'month'
+
+
+def parse_range(value, now=None):
+    """Turn a range like '30d', '12w', '12m' or '3y' into a (start, end) pair ending now"""
+    now = now or timezone.now()
+    match = re.fullmatch(r'(\d+)([dwmy])', (value or '').strip().lower())
+    if not match:
+        match = re.fullmatch(r'(\d+)([dwmy])', DEFAULT_RANGE)
+    amount, unit = int(match.group(1)), match.group(2)
+    days = min(amount * RANGE_DAYS[unit], MAX_RANGE_DAYS)
+    return now - timedelta(days=days), now
+
+
+def parse_granularity(value):
+    return value if value in TRUNCATORS else DEFAULT_GRANULARITY
+
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def time_series(queryset, date_field, start, end, granularity=DEFAULT_GRANULARITY, **aggregates):
+    """Bucket a queryset by day/week/month with a single grouped query.
+
+    Returns one dict per bucket between start and end (empty buckets are
+    filled with zeros) holding 'bucket' (a date), 'label' and one key per
+    aggregate. Counts rows when no aggregates are given.
+    """
+    granularity = parse_granularity(granularity)
+    aggregates = aggregates or {'count': Count('id')}
+
+    rows = queryset.filter(**{f'{date_field}__gte': start, f'{date_field}__lte': end})\
+        .annotate(bucket=TRUNCATORS[granularity](date_field))\
+        .values('bucket')\
+        .annotate(**aggregates)\
+        .order_by('bucket')
+    by_bucket = {timezone.localtime(row['bucket']).date(): row for row in rows}
+
+    series = []
+    current = bucket_start(timezone.localtime(start).date(), granularity)
+    last = timezone.localtime(end).date()
+    while current <= last:
+        row = by_bucket.get(current, {})
+        point = {'bucket': current, 'label': current.strftime(LABEL_FORMATS[granularity])}
+        for name in aggregates:
+            point[name] = row.get(name) or 0
+        series.append(point)
+        current = next_bucket(current, granularity)
+    return series
+
+
+def user_growth_series(start, end, granularity=DEFAULT_GRANULARITY):
+    """New users per bucket plus the running total over the window"""
+    series = time_series(User.objects.all(), 'date_joined', start, end, granularity, new_users=Count('id'))
+    total_users = 0
+    for point in series:
+        total_users += point['new_users']
+        point['total_users'] = total_users
+        point['growth_rate'] = (point['new_users'] / total_users * 100) if total_users > 0 else 0
+    return series
+
+
+def attempt_series(start, end, granularity=DEFAULT_GRANULARITY):
+    """Completed attempts, passes and pass rate per bucket"""
+    series = time_series(
+        UserAssessmentAttempt.objects.filter(is_completed=True), 'completed_at', start, end, granularity,
+        attempts=Count('id'),
+        passes=Count('id', filter=Q(is_passed=True)),
+    )
+    for point in series:
+        point['pass_rate'] = (point['passes'] / point['attempts'] * 100) if point['attempts'] > 0 else 0
+    return series
@@ -0,0 +1,159 @@
+"""Server-side tutorial progress.
+
+The tutorials page reports progress in batches, one entry per tutorial:
+
+    {"updates": [{"tutorial_id": 3, "progress": 42.5, "current_position": 40.1}, ...]}
+
+A batch is applied with one read and at most one bulk insert and one bulk
+update. max_progress never goes down, and an entry that moved less than
+settings.TUTORIAL_PROGRESS_MIN_DELTA points (and did not complete the
+tutorial) is coalesced into the next write instead of being written now.
+The page marks the batch it sends when the player closes with
+"final": true, which is always written.
+"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Tutorial, TutorialProgress
+
+
+MAX_BATCH_SIZE = 100
+
+
+def min_delta():
+    return getattr(settings, 'TUTORIAL_PROGRESS_MIN_DELTA', 5)
+
+
+def _percentage(value):
+    value = float(value)
+    # json.loads accepts NaN and Infinity; a stored NaN would never compare as complete
+    if not math.isfinite(value):
+        raise ValueError('progress must be a finite number')
+    return min(max(value, 0.0), 100.0)
+
+
+def merge_update(old, new):
+    """Combine two (progress, current_position, final) updates for one tutorial"""
+    return (max(old[0], new[0]), new[1], old[2] or new[2])
+
+
+def parse_updates(payload):
+    """Return {tutorial_id: (progress, current_position, final)} from a request body.
+
+    Accepts a batch under "updates" or a single update at the top level.
+    Raises ValueError for malformed entries.
+    """
+    entries = payload.get('updates') if isinstance(payload, dict) and 'updates' in payload else [payload]
+    if not isinstance(entries, list):
+        raise ValueError('"updates" must be a list')
+    if len(entries) > MAX_BATCH_SIZE:
+        raise ValueError(f'At most {MAX_BATCH_SIZE} updates per request')
+
+    updates = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError('Each update must be an object')
+        try:
+            tutorial_id = int(entry['tutorial_id'])
+            progress = _percentage(entry.get('progress', 0))
+            current_position = _percentage(entry.get('current_position', progress))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Each update needs a tutorial_id and numeric progress')
+        if entry.get('completed'):
+            progress = 100.0
+        final = bool(entry.get('final') or payload.get('final'))
+        # Several entries for one tutorial collapse into the furthest one
+        update = (progress, current_position, final)
+        previous = updates.get(tutorial_id)
+        updates[tutorial_id] = update if previous is None else merge_update(previous, update)
+    return updates
+
+
+def _needs_write(row, progress, current_position, final):
+    threshold = min_delta()
+    if final:
+        return progress > row.max_progress or current_position != row.current_position
+    return (
+        progress - row.max_progress >= threshold
+        or (progress >= 100 and row.completed_at is None)
+        or abs(current_position - row.current_position) >= threshold
+    )
+
+
+@transaction.atomic
+def apply_progress(updates):
+    """Apply {(user_id, tutorial_id): (progress, current_position, final)} in one transaction.
+
+    Returns (written, coalesced); unknown tutorials are ignored.
+    """
+    now = timezone.now()
+    user_ids = {user_id for user_id, _ in updates}
+    tutorial_ids = set(
+        Tutorial.objects.filter(pk__in={tutorial_id for _, tutorial_id in updates}).values_list('pk', flat=True)
+    )
+    existing = {
+        (row.user_id, row.tutorial_id): row
+        for row in TutorialProgress.objects.filter(user_id__in=user_ids, tutorial_id__in=tutorial_ids)
+    }
+
+    new_rows, changed_rows, coalesced = [], [], 0
+    for (user_id, tutorial_id), (progress, current_position, final) in updates.items():
+        if tutorial_id not in tutorial_ids:
+            continue
+        row = existing.get((user_id, tutorial_id))
+        if row is None:
+            new_rows.append(TutorialProgress(
+                user_id=user_id, tutorial_id=tutorial_id,
+                max_progress=progress, current_position=current_position,
+                completed_at=now if progress >= 100 else None,
+            ))
+        elif _needs_write(row, progress, current_position, final):
+            row.max_progress = max(row.max_progress, progress)
+            row.current_position = current_position
+            if row.max_progress >= 100 and row.completed_at is None:
+                row.completed_at = now
+            row.updated_at = now
+            changed_rows.append(row)
+        else:
+            coalesced += 1
+
+    # A concurrent first write for the same tutorial wins; ours is coalesced
+    TutorialProgress.objects.bulk_create(new_rows, ignore_conflicts=True)
+    TutorialProgress.objects.bulk_update(
+        changed_rows, ['max_progress', 'current_position', 'completed_at', 'updated_at']
+    )
+    return len(new_rows) + len(changed_rows), coalesced
+
+
+def record_progress(user_id, updates):
+    """Apply one user's {tutorial_id: (progress, current_position, final)}"""
+    return apply_progress({(user_id, tutorial_id): update for tutorial_id, update in updates.items()})
+
+
+def progress_for_user(user_id, pending=None):
+    """The user's progress in the shape the tutorials page keeps in its cookie.
+
+    `pending` holds {tutorial_id: (progress, current_position, final)} not yet
+    written (see heartbeats.py) and is layered over the stored rows.
+    """
+    progress = {
+        row.tutorial_id: (row.max_progress, row.current_position, row.completed_at is not None)
+        for row in TutorialProgress.objects.filter(user_id=user_id)
+    }
+    for tutorial_id, (max_progress, current_position, _) in (pending or {}).items():
+        stored = progress.get(tutorial_id, (0, 0, False))
+        max_progress = max(stored[0], max_progress)
+        progress[tutorial_id] = (max_progress, current_position, stored[2] or max_progress >= 100)
+
+    return {
+        str(tutorial_id): {
+            'progress': max_progress,
+            'maxProgress': max_progress,
+            'currentPosition': current_position,
+            'completed': completed,
+        }
+        for tutorial_id, (max_progress, current_position, completed) in progress.items()
+    }
@@ -13,13 +13,20 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     
     path('assessments/', views.assessments_list, name='assessments_list'),
+    path('leaderboard/', views.leaderboard_view, name='leaderboard'),
     path('assessment/<int:assessment_id>/', views.take_assessment, name='take_assessment'),
     path('assessment/<int:assessment_id>/submit/', views.submit_assessment, name='submit_assessment'),
     path('assessment/<int:assessment_id>/result/', views.assessment_result, name='assessment_result'),
     
     path('tutorials/', views.tutorials, name='tutorials'),
+    path('api/tutorial-progress/', views.tutorial_progress_api, name='tutorial_progress_api'),
+    path('api/tutorial-progress/buffer-stats/', views.tutorial_progress_buffer_stats, name='tutorial_progress_buffer_stats'),
     path('upload/', views.upload_assessment, name='upload_assessment'),
+    path('upload/jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/charts/<str:name>/', views.dashboard_chart, name='dashboard_chart'),
+    path('admin-dashboard/overview/<int:assessment_id>/<str:status>/', views.assessment_overview_users, name='assessment_overview_users'),
+    path('admin-dashboard/reminders/', views.send_assessment_reminders, name='send_assessment_reminders'),
 
     path('profile/', views.profile, name='profile'),
     path('profile/edit/', edit_profile, name='edit_profile'),
@@ -40,7 +47,9 @@ urlpatterns = [
     path('reset-password/<uidb64>/<token>/', views.custom_reset_password_view, name='custom_reset_password'),
  
     path('users/',views.all_profiles,name='users'),
+    path('users/data/', views.users_data, name='users_data'),
     path('edit-profile/<int:user_id>/', views.admin_edit_profile, name='admin_edit_profile'),
+    path('edit-profile/<int:user_id>/form/', views.admin_edit_profile_form, name='admin_edit_profile_form'),
     path('custom-admin/reset-password/', send_password_reset_email_by_admin, name='admin_reset_password'),
 
     path('custom-admin/add-user/', views.add_user, name='admin_add_user'),
@@ -4,17 +4,18 @@ import io
 import random
 import string
 import logging
-import pandas as pd
-from io import StringIO
 from django.conf import settings
 from django.urls import reverse
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Avg, Count, Q
+from django.db.models import F, FilteredRelation, Q
 from django.utils import timezone
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.views.decorators.http import require_POST
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.core.mail import send_mail
@@ -26,11 +27,26 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.admin.views.decorators import staff_member_required
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.offline import plot
-from .models import Assessment, Question, UserAssessmentAttempt, UserAnswer, Tutorial, Profile, AdminProfile
+from .models import Assessment, Question, UserAssessmentAttempt, UserAnswer, Tutorial, Profile, AdminProfile, ImportJob
 from .forms import CustomLoginForm, CustomPasswordChangeForm
+from .grading import grade_attempt
+from .analytics import analytics_reads, snapshot_version
+from .directory import directory_page
+from .images import InvalidImage, set_profile_image
+from .heartbeats import get_progress_buffer, progress_buffer_enabled
+from .jobs import enqueue_import, schedule_jobs
+from .outbox import queue_email
+from .reminders import start_reminders
+from .tutorial_progress import parse_updates, progress_for_user, record_progress
+from .leaderboard import resolve_board, top_entries, user_rank
+from .progress import get_progress_summary, home_leaderboard, home_rank, home_versions
+from .timeseries import (
+    DEFAULT_RANGE, RANGE_CHOICES, TRUNCATORS, parse_range, parse_granularity, user_growth_series,
+)
+from .stats import (
+    data_version, dashboard_totals, assessment_breakdown, top_users,
+    assessment_overview, completed_users, pending_users,
+)
 
 
 UserAssessmentAttempt.completed_at=timezone.now()
@@ -49,45 +65,80 @@ def home(request):
         return redirect('user_login')
     
     
-    # User progress
-    user_attempts = UserAssessmentAttempt.objects.filter(user=request.user)
-    completed_assessments = user_attempts.filter(is_completed=True).count()
-    total_assessments = Assessment.objects.filter(is_active=True).count()
-    
-    # Progress calculation
-    progress_percentage = (completed_assessments / total_assessments * 100) if total_assessments > 0 else 0
-    
-    # Leaderboard
-    leaderboard = UserAssessmentAttempt.objects.filter(is_completed=True)\
-        .values('user__username', 'user__first_name', 'user__last_name')\
-        .annotate(avg_score=Avg('score'), total_completed=Count('id'))\
-        .order_by('-avg_score', '-total_completed')[:10]
-    
-    # Recent attempts
-    recent_attempts = user_attempts.filter(is_completed=True).order_by('-completed_at')[:5]
+    # Progress summary, leaderboard and rank are served from the cache
+    version, summary_version = home_versions(request.user.pk)
+    summary = get_progress_summary(request.user, summary_version)
     
     context = {
         'user': request.user,
-        'completed_assessments': completed_assessments,
-        'total_assessments': total_assessments,
-        'progress_percentage': round(progress_percentage, 1),
-        'leaderboard': leaderboard,
-        'recent_attempts': recent_attempts,
+        'completed_assessments': summary['completed_assessments'],
+        'total_assessments': summary['total_assessments'],
+        'progress_percentage': summary['progress_percentage'],
+        'leaderboard': home_leaderboard(version),
+        'my_rank': home_rank(request.user, version),
+        'recent_attempts': summary['recent_attempts'],
     }
     return render(request, 'assessment/home.html', context)
 
+LEADERBOARD_MAX_LIMIT = 100
+
+
+@login_required
+@analytics_reads()
+def leaderboard_view(request):
+    """Top entries of a board plus the current user's rank on it"""
+    board = resolve_board(request.GET.get('board'))
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), LEADERBOARD_MAX_LIMIT)
+    except ValueError:
+        limit = 10
+    
+    rank, entry = user_rank(request.user, board)
+    return JsonResponse({
+        'board': board,
+        'entries': [
+            {
+                'rank': position,
+                'username': top.user.username,
+                'avg_score': round(top.avg_score, 1),
+                'attempts': top.attempts,
+            }
+            for position, top in enumerate(top_entries(board, limit), start=1)
+        ],
+        'me': {'rank': rank, 'avg_score': round(entry.avg_score, 1), 'attempts': entry.attempts} if entry else None,
+    })
+
 @login_required
 def assessments_list(request):
-    assessments = Assessment.objects.filter(is_active=True)
-    user_attempts = UserAssessmentAttempt.objects.filter(user=request.user)
+    # One query: the current user's attempt (at most one per assessment) is
+    # joined in through a filtered relation; question_count is a stored column
+    assessments = Assessment.objects.filter(is_active=True)\
+        .annotate(
+            my_attempt=FilteredRelation(
+                'userassessmentattempt',
+                condition=Q(userassessmentattempt__user=request.user),
+            ),
+            attempt_id=F('my_attempt__id'),
+            attempt_score=F('my_attempt__score'),
+            attempt_correct_answers=F('my_attempt__correct_answers'),
+            attempt_is_completed=F('my_attempt__is_completed'),
+            attempt_is_passed=F('my_attempt__is_passed'),
+        )
     
     # Add attempt status to each assessment
     for assessment in assessments:
-        try:
-            attempt = user_attempts.get(assessment=assessment)
-            assessment.user_attempt = attempt
-        except UserAssessmentAttempt.DoesNotExist:
+        if assessment.attempt_id is None:
             assessment.user_attempt = None
+        else:
+            assessment.user_attempt = UserAssessmentAttempt(
+                id=assessment.attempt_id,
+                user=request.user,
+                assessment=assessment,
+                score=assessment.attempt_score,
+                correct_answers=assessment.attempt_correct_answers,
+                is_completed=assessment.attempt_is_completed,
+                is_passed=assessment.attempt_is_passed,
+            )
     
     return render(request, 'assessment/assessments_list.html', {'assessments': assessments})
 
@@ -100,7 +151,7 @@ def take_assessment(request, assessment_id):
         user=request.user,
         assessment=assessment,
         defaults={
-            'total_questions': assessment.total_questions,
+            'total_questions': assessment.question_count,
         }
     )
     
@@ -131,34 +182,10 @@ def submit_assessment(request, assessment_id):
         answers = data.get('answers', {})
         
         with transaction.atomic():
-            # Clear existing answers
-            UserAnswer.objects.filter(attempt=attempt).delete()
-            
-            correct_count = 0
-            total_questions = assessment.questions.count()
-            
-            for question_id, user_answer in answers.items():
-                question = Question.objects.get(id=question_id, assessment=assessment)
-                is_correct = str(user_answer).strip().lower() == str(question.correct_answer).strip().lower()
-                
-                UserAnswer.objects.create(
-                    attempt=attempt,
-                    question=question,
-                    user_answer=user_answer,
-                    is_correct=is_correct
-                )
-                
-                if is_correct:
-                    correct_count += 1
-            
-            # Update attempt
-            score = (correct_count / total_questions * 100) if total_questions > 0 else 0
-            attempt.score = round(score)
-            attempt.correct_answers = correct_count
-            attempt.is_completed = True
-            attempt.is_passed = score >= assessment.pass_score
-            attempt.completed_at = timezone.now()
-            attempt.save()
+            # The attempt's post_save signals update the stats, leaderboards
+            # and the user's progress summary version
+            total_questions = grade_attempt(attempt, assessment, answers)
+            correct_count = attempt.correct_answers
             
             return JsonResponse({
                 'success': True,
@@ -180,8 +207,8 @@ def assessment_result(request, assessment_id):
     if not attempt.is_completed:
         return redirect('take_assessment', assessment_id=assessment_id)
     
-    # Get detailed answers
-    user_answers = UserAnswer.objects.filter(attempt=attempt).select_related('question')
+    # Get detailed answers (lazy, without joining the question table)
+    user_answers = attempt.answers.all()
     
     context = {
         'assessment': assessment,
@@ -191,11 +218,47 @@ def assessment_result(request, assessment_id):
     return render(request, 'assessment/assessment_result.html', context)
 
 @login_required
+@ensure_csrf_cookie
 def tutorials(request):
     tutorials = Tutorial.objects.filter(is_active=True).order_by('-created_at')
     return render(request, 'assessment/tutorials.html', {'tutorials': tutorials})
 
 
+@login_required
+def tutorial_progress_api(request):
+    """GET the user's tutorial progress, or POST a batch of progress updates"""
+    user_id = request.user.pk
+    if request.method == 'GET':
+        pending = None
+        if progress_buffer_enabled():
+            pending = {
+                tutorial_id: update
+                for (_, tutorial_id), update in get_progress_buffer().pending(lambda key: key[0] == user_id).items()
+            }
+        return JsonResponse(progress_for_user(user_id, pending))
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        updates = parse_updates(json.loads(request.body))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    # Heartbeats are buffered in memory and written in batches
+    if progress_buffer_enabled():
+        buffer = get_progress_buffer()
+        accepted = sum(buffer.add((user_id, tutorial_id), update) for tutorial_id, update in updates.items())
+        return JsonResponse({'buffered': accepted, 'dropped': len(updates) - accepted})
+    saved, coalesced = record_progress(user_id, updates)
+    return JsonResponse({'saved': saved, 'coalesced': coalesced})
+
+
+@staff_member_required
+def tutorial_progress_buffer_stats(request):
+    """Counters of this process's tutorial progress write-behind buffer"""
+    return JsonResponse(get_progress_buffer().stats())
+
+
 @staff_member_required
 def upload_csv(request):
     if request.method == 'POST':
@@ -249,379 +312,74 @@ def upload_csv(request):
 @staff_member_required
 def upload_assessment(request):
     if request.method == 'POST' and request.FILES.get('csv_file'):
-        csv_file = request.FILES['csv_file']
         csv_type = request.POST.get('csv_type')
+        if csv_type not in dict(ImportJob.KINDS):
+            messages.error(request, 'Invalid CSV type selected.')
+            return render(request, 'assessment/upload_assessment.html')
 
-        try:
-            csv_content = csv_file.read().decode('utf-8')
-            csv_reader = csv.DictReader(StringIO(csv_content))
-            fieldnames = csv_reader.fieldnames
-
-            if csv_type == 'url':  # YouTube URL CSV upload
-                required_columns = ['name', 'link']
-                
-                if not fieldnames or not all(col in fieldnames for col in required_columns):
-                    messages.error(request, f'CSV must contain columns: {", ".join(required_columns)}')
-                    return render(request, 'assessment/upload_assessment.html')
-
-                tutorials_created = 0
-                tutorials_skipped = 0  # Track duplicates
-                
-                for row_num, row in enumerate(csv_reader, start=1):
-                    if not any(row.values()):
-                        continue
-
-                    name = row.get('name', '').strip()
-                    link = row.get('link', '').strip()
-
-                    if not name or not link:
-                        messages.warning(request, f'Skipping row {row_num}: missing name or link.')
-                        continue
-
-                    if 'youtube.com' not in link and 'youtu.be' not in link:
-                        messages.warning(request, f'Skipping row {row_num}: not a valid YouTube URL.')
-                        continue
-
-                    # Use get_or_create to handle duplicates
-                    tutorial, created = Tutorial.objects.get_or_create(
-                        video_url=link,  # Check for duplicate URLs
-                        defaults={
-                            'title': name,
-                            'description': f'YouTube tutorial: {name}',
-                            'video_type': 'youtube',
-                            'category': 'Security Awareness',
-                            'is_active': True
-                        }
-                    )
-                    
-                    if created:
-                        tutorials_created += 1
-                    else:
-                        tutorials_skipped += 1
-
-                # Provide comprehensive feedback
-                if tutorials_created > 0:
-                    messages.success(request, f'Successfully uploaded {tutorials_created} new YouTube tutorial(s)!')
-                if tutorials_skipped > 0:
-                    messages.info(request, f'Skipped {tutorials_skipped} duplicate video(s) that already exist.')
-                if tutorials_created == 0 and tutorials_skipped == 0:
-                    messages.warning(request, 'No valid YouTube tutorials found in CSV.')
-
-            elif csv_type == 'mp4':  # Local MP4 CSV upload
-                required_columns = ['name', 'file_path']
-                
-                if not fieldnames or not all(col in fieldnames for col in required_columns):
-                    messages.error(request, f'CSV must contain columns: {", ".join(required_columns)}')
-                    return render(request, 'assessment/upload_assessment.html')
-
-                tutorials_created = 0
-                tutorials_skipped = 0
-                skipped_files = []
-                
-                for row_num, row in enumerate(csv_reader, start=1):
-                    if not any(row.values()):
-                        continue
-
-                    name = row.get('name', '').strip()
-                    file_path = row.get('file_path', '').strip()
-                    description = row.get('description', '').strip()
-
-                    if not name or not file_path:
-                        messages.warning(request, f'Skipping row {row_num}: missing name or file path.')
-                        continue
-
-                    # Validate that it's an MP4 file
-                    if not file_path.lower().endswith(('.mp4', '.MP4')):
-                        messages.warning(request, f'Skipping row {row_num}: file must be an MP4.')
-                        skipped_files.append(f"Row {row_num}: {file_path}")
-                        continue
-
-                    # Use get_or_create to handle duplicates for local files too
-                    tutorial, created = Tutorial.objects.get_or_create(
-                        local_file_path=file_path,  # Check for duplicate file paths
-                        defaults={
-                            'title': name,
-                            'description': description or f'Local MP4 tutorial: {name}',
-                            'video_type': 'local',
-                            'category': 'Security Awareness',
-                            'is_active': True
-                        }
-                    )
-                    
-                    if created:
-                        tutorials_created += 1
-                    else:
-                        tutorials_skipped += 1
-
-                # Provide comprehensive feedback
-                if tutorials_created > 0:
-                    messages.success(request, f'Successfully uploaded {tutorials_created} new local MP4 tutorial(s)!')
-                if tutorials_skipped > 0:
-                    messages.info(request, f'Skipped {tutorials_skipped} duplicate file(s) that already exist.')
-                if skipped_files:
-                    messages.warning(request, f'Skipped {len(skipped_files)} files due to invalid format or missing files.')
-
-            else:
-                messages.error(request, 'Invalid CSV type selected.')
-                return render(request, 'assessment/upload_assessment.html')
+        # The import itself runs in the background; the page polls its status
+        options = {}
+        if csv_type == 'assessment':
+            options['assessment_name'] = request.POST.get('assessment_name', '')
+        job = enqueue_import(request.FILES['csv_file'], csv_type, request.user, **options)
+        return redirect(f"{reverse('upload_assessment')}?job={job.pk}")
 
-            return redirect('admin_dashboard')
+    job = None
+    job_id = request.GET.get('job')
+    if job_id and job_id.isdigit():
+        job = ImportJob.objects.filter(pk=job_id).first()
+    return render(request, 'assessment/upload_assessment.html', {'job': job})
 
-        except UnicodeDecodeError:
-            messages.error(request, 'CSV file must be UTF-8 encoded.')
-        except Exception as e:
-            messages.error(request, f'Error processing CSV file: {str(e)}')
 
-    return render(request, 'assessment/upload_assessment.html')
+@staff_member_required
+def import_job_status(request, job_id):
+    job = get_object_or_404(ImportJob, pk=job_id)
+    if not job.is_finished:
+        # Wakes the thread worker up for jobs left behind by a restart
+        schedule_jobs()
+    return JsonResponse({
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'finished': job.is_finished,
+        'total_rows': job.total_rows,
+        'rows_processed': job.rows_processed,
+        'created': job.created_count,
+        'skipped': job.skipped_count,
+        'failed': job.failed_count,
+        'errors': job.errors,
+        'message': job.message,
+    })
 
 
+@analytics_reads()
 def admin_dashboard(request):
     # Basic statistics
     total_users = User.objects.count()
     total_assessments = Assessment.objects.count()
-    total_attempts = UserAssessmentAttempt.objects.filter(is_completed=True).count()
     
-    # Pass/Fail statistics
-    passed_attempts = UserAssessmentAttempt.objects.filter(is_completed=True, is_passed=True).count()
-    failed_attempts = total_attempts - passed_attempts
-    pass_percentage = (passed_attempts / total_attempts * 100) if total_attempts > 0 else 0
+    # Pass/Fail statistics, kept up to date by submit_assessment
+    totals = dashboard_totals()
+    total_attempts = totals['total_attempts']
+    passed_attempts = totals['passed_attempts']
+    failed_attempts = totals['failed_attempts']
+    pass_percentage = totals['pass_percentage']
     
-    # Assessment results for visualization
+    # Most recent results for the table
     assessment_results = UserAssessmentAttempt.objects.filter(is_completed=True)\
         .select_related('user', 'assessment')\
         .order_by('-completed_at')
     
-    # Leaderboard data - Top 10 users by average score
-    from django.db.models import Avg, Count
-    leaderboard_data = UserAssessmentAttempt.objects.filter(is_completed=True)\
-        .values('user__username')\
-        .annotate(
-            avg_score=Avg('score'),
-            total_attempts=Count('id')
-        )\
-        .filter(total_attempts__gte=1)\
-        .order_by('-avg_score')\
-        [:15]  # Top 15 users for better scrolling
+    # Leaderboard data - Top 15 users by average score
+    leaderboard_list = top_users(limit=15)
     
-    # Convert to list and add username field
-    leaderboard_list = []
-    for user_data in leaderboard_data:
-        leaderboard_list.append({
-            'username': user_data['user__username'],
-            'avg_score': user_data['avg_score'],
-            'total_attempts': user_data['total_attempts']
-        })
-    
-    # ADD THIS: Assessment Overview Data
-    assessment_overview = []
-    assessments = Assessment.objects.all()
-    
-    for assessment in assessments:
-        # Get all users
-        all_users = User.objects.all()
-        
-        # Get users who completed this assessment
-        completed_attempts = UserAssessmentAttempt.objects.filter(
-            assessment=assessment,
-            is_completed=True
-        ).select_related('user')
-        
-        # Get completed users with their scores
-        completed_users = []
-        completed_user_ids = []
-        for attempt in completed_attempts:
-            completed_users.append({
-                'username': attempt.user.username,
-                'score': attempt.score
-            })
-            completed_user_ids.append(attempt.user.id)
-        
-        # Get pending users (users who haven't completed this assessment)
-        pending_users = []
-        for user in all_users:
-            if user.id not in completed_user_ids:
-                pending_users.append({
-                    'username': user.username
-                })
-        
-        assessment_overview.append({
-            'id': assessment.id,
-            'title': assessment.title,
-            'description': assessment.description,
-            'completed_count': len(completed_users),
-            'pending_count': len(pending_users),
-            'completed_users': completed_users,
-            'pending_users': pending_users
-        })
-    
-    # Initialize chart variables
-    score_chart = ""
-    performance_chart = ""
-    timeline_chart = ""
-    
-    try:
-        if assessment_results.exists():
-            # 1. Assessment-wise Pass/Fail Stacked Bar Chart with reduced bar width
-            assessment_performance = {}
-            for attempt in assessment_results:
-                assessment_name = attempt.assessment.title
-                if assessment_name not in assessment_performance:
-                    assessment_performance[assessment_name] = {'passed': 0, 'failed': 0, 'total': 0}
-                
-                if attempt.is_passed:
-                    assessment_performance[assessment_name]['passed'] += 1
-                else:
-                    assessment_performance[assessment_name]['failed'] += 1
-                assessment_performance[assessment_name]['total'] += 1
-            
-            if assessment_performance:
-                assessment_names = list(assessment_performance.keys())
-                passed_counts = [data['passed'] for data in assessment_performance.values()]
-                failed_counts = [data['failed'] for data in assessment_performance.values()]
-                
-                fig_stacked = go.Figure()
-                fig_stacked.add_trace(go.Bar(
-                    name='Passed',
-                    x=assessment_names,
-                    y=passed_counts,
-                    marker_color='#28a745',
-                    width=0.4  # Reduced bar width from default (0.8) to 0.4
-                ))
-                fig_stacked.add_trace(go.Bar(
-                    name='Failed',
-                    x=assessment_names,
-                    y=failed_counts,
-                    marker_color='#dc3545',
-                    width=0.4  # Reduced bar width from default (0.8) to 0.4
-                ))
-                
-                fig_stacked.update_layout(
-                    title='Assessment Results - Pass/Fail Distribution',
-                    xaxis_title='Assessment',
-                    yaxis_title='Number of Attempts',
-                    barmode='stack',
-                    plot_bgcolor='white',
-                    paper_bgcolor='white',
-                    xaxis_tickangle=-45,
-                    showlegend=True,
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                    bargap=0.3  # Add gap between bars for better separation
-                )
-                score_chart = plot(fig_stacked, output_type='div', include_plotlyjs=False)
-            
-            # 2. Assessment performance chart (keeping the existing one)
-            assessment_performance_avg = {}
-            for attempt in assessment_results:
-                assessment_name = attempt.assessment.title
-                if assessment_name not in assessment_performance_avg:
-                    assessment_performance_avg[assessment_name] = {'scores': [], 'attempts': 0}
-                assessment_performance_avg[assessment_name]['scores'].append(attempt.score)
-                assessment_performance_avg[assessment_name]['attempts'] += 1
-            
-            if assessment_performance_avg:
-                assessment_names = list(assessment_performance_avg.keys())
-                avg_scores = [
-                    sum(data['scores']) / len(data['scores']) if data['scores'] else 0
-                    for data in assessment_performance_avg.values()
-                ]
-                
-                performance_df = pd.DataFrame({
-                    'Assessment': assessment_names,
-                    'Average Score': avg_scores
-                })
-                
-                fig_performance = px.bar(performance_df, x='Assessment', y='Average Score',
-                                         title='Average Score by Assessment')
-                fig_performance.update_layout(
-                    xaxis_title='Assessment', 
-                    yaxis_title='Average Score (%)',
-                    xaxis_tickangle=-45,
-                    plot_bgcolor='white',
-                    paper_bgcolor='white'
-                )
-                performance_chart = plot(fig_performance, output_type='div', include_plotlyjs=False)
-            
-            # 3. User Percentage Growth Over Time
-            from django.db.models import Count
-            from datetime import datetime, timedelta
-            
-            # Get user registration data over time (last 12 months)
-            twelve_months_ago = timezone.now() - timedelta(days=365)
-            
-            # Group users by month
-            user_growth_data = []
-            current_date = twelve_months_ago
-            total_users_cumulative = 0
-            
-            while current_date <= timezone.now():
-                month_end = current_date.replace(day=28) + timedelta(days=4)
-                month_end = month_end - timedelta(days=month_end.day-1) + timedelta(days=32)
-                month_end = month_end.replace(day=1) - timedelta(days=1)
-                
-                users_this_month = User.objects.filter(
-                    date_joined__gte=current_date,
-                    date_joined__lte=month_end
-                ).count()
-                
-                total_users_cumulative += users_this_month
-                
-                user_growth_data.append({
-                    'month': current_date.strftime('%b %Y'),
-                    'new_users': users_this_month,
-                    'total_users': total_users_cumulative,
-                    'growth_rate': ((users_this_month / total_users_cumulative * 100) if total_users_cumulative > 0 else 0)
-                })
-                
-                # Move to next month
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1)
-            
-            if user_growth_data:
-                months = [data['month'] for data in user_growth_data]
-                total_users_data = [data['total_users'] for data in user_growth_data]
-                new_users_data = [data['new_users'] for data in user_growth_data]
-                
-                fig_growth = go.Figure()
-                
-                # Add cumulative users line
-                fig_growth.add_trace(go.Scatter(
-                    x=months,
-                    y=total_users_data,
-                    mode='lines+markers',
-                    name='Total Users',
-                    line=dict(color='#007bff', width=3),
-                    marker=dict(size=8)
-                ))
-                
-                # Add new users bar
-                fig_growth.add_trace(go.Bar(
-                    x=months,
-                    y=new_users_data,
-                    name='New Users',
-                    marker_color='#28a745',
-                    opacity=0.7,
-                    yaxis='y2'
-                ))
-                
-                fig_growth.update_layout(
-                    title='User Growth Over Time',
-                    xaxis_title='Month',
-                    yaxis=dict(title='Total Users', side='left'),
-                    yaxis2=dict(title='New Users', side='right', overlaying='y'),
-                    plot_bgcolor='white',
-                    paper_bgcolor='white',
-                    xaxis_tickangle=-45,
-                    showlegend=True,
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-                )
-                timeline_chart = plot(fig_growth, output_type='div', include_plotlyjs=False)
+    # Assessment Overview Data - user lists are fetched on demand
+    assessment_overview_data = assessment_overview()
     
-    except Exception as e:
-        print(f"Chart generation error: {e}")
-        # Continue without charts if there's an error
-        pass
+    # Timeline range and granularity picked on the dashboard; the charts
+    # themselves are fetched from dashboard_chart after the page loads
+    timeline_range = request.GET.get('range') or DEFAULT_RANGE
+    granularity = parse_granularity(request.GET.get('granularity'))
     
     context = {
         'total_users': total_users,
@@ -632,15 +390,94 @@ def admin_dashboard(request):
         'pass_percentage': round(pass_percentage, 1),
         'assessment_results': assessment_results[:20],
         'leaderboard_data': leaderboard_list,
-        'assessment_overview': assessment_overview,  # ADD THIS LINE
-        'score_chart': score_chart,
-        'performance_chart': performance_chart,
-        'timeline_chart': timeline_chart,
+        'assessment_overview': assessment_overview_data,
+        'timeline_ranges': RANGE_CHOICES,
+        'timeline_range': timeline_range,
+        'timeline_granularities': list(TRUNCATORS),
+        'timeline_granularity': granularity,
     }
     
     return render(request, 'assessment/admin_dashboard.html', context)
 
 
+DASHBOARD_CHARTS = ('results', 'performance', 'user-growth')
+CHART_CACHE_TIMEOUT = 60 * 60
+
+
+@staff_member_required
+@analytics_reads()
+def dashboard_chart(request, name):
+    """Plotly figure spec for one dashboard chart, cached per data version"""
+    if name not in DASHBOARD_CHARTS:
+        return JsonResponse({'error': 'Unknown chart'}, status=404)
+    
+    timeline_range = request.GET.get('range') or DEFAULT_RANGE
+    granularity = parse_granularity(request.GET.get('granularity'))
+    cache_key = f'dashboard:chart:{name}:{data_version()}:{snapshot_version()}'
+    if name == 'user-growth':
+        # Day buckets roll over at midnight, so the date is part of the key
+        cache_key += f':{timeline_range}:{granularity}:{timezone.localdate().isoformat()}'
+    
+    figure_json = cache.get(cache_key)
+    if figure_json is None:
+        # Plotly is only imported by the first chart request in a worker
+        from . import charts
+        
+        if name == 'user-growth':
+            start, end = parse_range(timeline_range)
+            figure = charts.build_user_growth_figure(user_growth_series(start, end, granularity), granularity)
+        else:
+            assessment_stats = list(assessment_breakdown())
+            if name == 'results':
+                figure = charts.build_results_figure(assessment_stats)
+            else:
+                figure = charts.build_performance_figure(assessment_stats)
+        figure_json = figure.to_json()
+        cache.set(cache_key, figure_json, CHART_CACHE_TIMEOUT)
+    
+    return HttpResponse(figure_json, content_type='application/json')
+
+
+OVERVIEW_PAGE_SIZE = 25
+
+
+@staff_member_required
+@analytics_reads()
+def assessment_overview_users(request, assessment_id, status):
+    """One page of completed or pending users for an assessment overview row"""
+    assessment = get_object_or_404(Assessment, id=assessment_id)
+    if status == 'completed':
+        users = completed_users(assessment.id)
+    elif status == 'pending':
+        users = pending_users(assessment.id)
+    else:
+        return JsonResponse({'error': 'Unknown status'}, status=400)
+    
+    page = Paginator(users, OVERVIEW_PAGE_SIZE).get_page(request.GET.get('page'))
+    return JsonResponse({
+        'status': status,
+        'count': page.paginator.count,
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'has_next': page.has_next(),
+        'users': list(page.object_list),
+    })
+
+
+@staff_member_required
+@require_POST
+def send_assessment_reminders(request):
+    """Email every user who hasn't completed the selected assessments"""
+    assessment_ids = [int(value) for value in request.POST.getlist('assessment_ids') if value.isdigit()]
+    if not assessment_ids:
+        messages.error(request, 'Select at least one assessment to send reminders for.')
+        return redirect('admin_dashboard')
+
+    recipients = start_reminders(assessment_ids, request.build_absolute_uri(reverse('assessments_list')))
+    messages.success(request, f'Sending reminders to {recipients} user(s).')
+    return redirect('admin_dashboard')
+
+
 @login_required
 def profile(request):
     user = request.user
@@ -657,8 +494,10 @@ from django.contrib.auth.decorators import login_required
 def upload_profile_picture(request):
     if request.method == 'POST' and request.FILES.get('profile_pic'):
         profile = request.user.profile
-        profile.profile_image = request.FILES['profile_pic']
-        profile.save()
+        try:
+            set_profile_image(profile, request.FILES['profile_pic'])
+        except InvalidImage as e:
+            messages.error(request, str(e))
     return redirect('profile')  
 
 
@@ -679,9 +518,13 @@ def edit_profile(request):
         profile.phone_number = request.POST.get('phone')
         profile.gender = request.POST.get('gender')
         profile.address = request.POST.get('address')
-        if request.FILES.get('profile_pic'):
-            profile.profile_image = request.FILES['profile_pic']
         profile.save()
+        if request.FILES.get('profile_pic'):
+            try:
+                set_profile_image(profile, request.FILES['profile_pic'])
+            except InvalidImage as e:
+                messages.error(request, str(e))
+                return redirect('edit_profile')
 
         messages.success(request, "Profile updated successfully.")
         return redirect('profile')  # or 'profile_view' depending on your URL name
@@ -718,7 +561,7 @@ def send_password_reset_email(request):
         recipient_list = [email]
 
         try:
-            send_mail(subject, message, from_email, recipient_list, fail_silently=False)
+            queue_email(subject, message, recipient_list, from_email)
             messages.success(request, f"Password reset link has been sent to {email}. You have been logged out for security reasons.")
             logout(request)  # Log out the user immediately after sending the email
         except Exception as e:
@@ -790,13 +633,12 @@ def forgot_password_view(request):
             token = default_token_generator.make_token(user)
             reset_link = request.build_absolute_uri(f'/reset-password/{uid}/{token}/')
 
-            # Send email
-            send_mail(
+            # Queued; the outbox worker sends it
+            queue_email(
                 subject='Reset Your Password',
-                message=f'Click the link to reset your password:\n{reset_link}',
+                body=f'Click the link to reset your password:\n{reset_link}',
+                recipients=[user.email],
                 from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                fail_silently=False
             )
 
             messages.success(request, 'Password reset link has been sent to your email.')
@@ -890,8 +732,20 @@ def custom_reset_password_view(request, uidb64, token):
 
 @login_required
 def all_profiles(request):
-    profiles = Profile.objects.select_related('user').all()
-    return render(request, 'assessment/users.html', {'profiles': profiles})
+    # Rows are fetched page by page from users_data
+    return render(request, 'assessment/users.html')
+
+
+@staff_member_required
+def users_data(request):
+    """One page of the user directory in DataTables server-side format"""
+    return JsonResponse(directory_page(request.GET))
+
+
+@staff_member_required
+def admin_edit_profile_form(request, user_id):
+    profile = get_object_or_404(Profile.objects.select_related('user'), user_id=user_id)
+    return render(request, 'assessment/user_edit_form.html', {'profile': profile})
 
 def is_admin(user):
     return user.is_staff  # or user.is_superuser depending on your setup
@@ -907,11 +761,13 @@ def admin_edit_profile(request, user_id):
         user.last_name = request.POST.get('last_name')
         profile.phone_number = request.POST.get('phone_number')
 
-        if 'profile_image' in request.FILES:
-            profile.profile_image = request.FILES['profile_image']
-
         user.save()
         profile.save()
+        if 'profile_image' in request.FILES:
+            try:
+                set_profile_image(profile, request.FILES['profile_image'])
+            except InvalidImage as e:
+                messages.error(request, str(e))
 
         return redirect('users')  # Redirect to the user list page
 
@@ -932,11 +788,11 @@ def send_password_reset_email_by_admin(request):
             user.set_password(new_password)
             user.save()
 
-            # Send email
-            send_mail(               
+            # Queued; the outbox worker sends it
+            queue_email(
 
     subject="New Login Credentials",
-    message=f"""Hello {user.first_name} {user.last_name},
+    body=f"""Hello {user.first_name} {user.last_name},
 
 Your password has been successfully reset. You can now log in with the following temporary password:
 
@@ -947,12 +803,11 @@ We recommend changing this password after logging in.
 Regards,  
 Your Admin Team
 """,
+    recipients=[user.email],
     from_email="keerthanaperavali9@example.com",
-    recipient_list=[user.email],
-    fail_silently=False,
 )
 
-            logger.info(f"Password reset email sent to {user.email}")
+            logger.info(f"Password reset email queued for {user.email}")
             return JsonResponse({'status': 'success', 'message': f'Reset password sent to {user.email}'})
         except User.DoesNotExist:
             logger.warning("User with this email does not exist.")
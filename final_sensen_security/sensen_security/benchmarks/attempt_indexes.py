@@ -0,0 +1,161 @@
+"""Query plans and timings for the attempt/question hot paths.
+
+Seeds a throwaway SQLite database (100k attempts by default), then runs
+the queries behind home, admin_dashboard, assessment_result and
+take_assessment twice: once with the indexes from migration 0009
+dropped ("before") and once with them in place ("after").
+
+Usage (from the project directory):
+    python benchmarks/attempt_indexes.py [--users 5000] [--assessments 20] [--questions 50] [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensen_security.settings')
+
+
+def setup_database(path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed(users, assessments, questions_per_assessment):
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from django.utils import timezone
+    from assessment.models import Assessment, Question, UserAssessmentAttempt
+
+    now = timezone.now()
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [User(username=f'user{i}', email=f'user{i}@example.com') for i in range(users)],
+            batch_size=2000,
+        )
+        Assessment.objects.bulk_create(
+            [Assessment(title=f'Assessment {i}', description='seed') for i in range(assessments)]
+        )
+        assessment_ids = list(Assessment.objects.values_list('id', flat=True))
+        Question.objects.bulk_create([
+            Question(assessment_id=assessment_id, question_text='q', correct_answer='a', order=order)
+            for assessment_id in assessment_ids
+            for order in range(questions_per_assessment)
+        ], batch_size=2000)
+
+        user_ids = list(User.objects.values_list('id', flat=True))
+        batch = []
+        for n, user_id in enumerate(user_ids):
+            for m, assessment_id in enumerate(assessment_ids):
+                completed = (n + m) % 5 != 0
+                score = (n * 7 + m * 13) % 101
+                batch.append(UserAssessmentAttempt(
+                    user_id=user_id, assessment_id=assessment_id, score=score,
+                    is_completed=completed, is_passed=completed and score >= 70,
+                    completed_at=now - timedelta(minutes=n * len(assessment_ids) + m) if completed else None,
+                ))
+            if len(batch) >= 10000:
+                UserAssessmentAttempt.objects.bulk_create(batch)
+                batch = []
+        UserAssessmentAttempt.objects.bulk_create(batch)
+    Assessment.update_question_counts()
+
+
+def hot_queries():
+    from django.contrib.auth.models import User
+    from assessment.models import Assessment, Question, UserAssessmentAttempt
+    from assessment.stats import completed_counts_by_assessment, pending_users
+
+    user = User.objects.order_by('id')[User.objects.count() // 2]
+    assessment = Assessment.objects.order_by('id').first()
+    attempts = UserAssessmentAttempt.objects
+
+    return [
+        ('home: completed count', attempts.filter(user=user, is_completed=True),
+         lambda qs: qs.count()),
+        ('home: recent attempts', attempts.filter(user=user, is_completed=True).order_by('-completed_at')[:5],
+         list),
+        ('dashboard: passed count', attempts.filter(is_completed=True, is_passed=True),
+         lambda qs: qs.count()),
+        ('dashboard: latest results', attempts.filter(is_completed=True).order_by('-completed_at')[:20],
+         list),
+        ('dashboard: overview counts', completed_counts_by_assessment(),
+         list),
+        ('dashboard: pending users', pending_users(assessment.id)[:25],
+         list),
+        ('result: attempt lookup', attempts.filter(user=user, assessment=assessment),
+         lambda qs: qs.get()),
+        ('take: ordered questions', Question.objects.filter(assessment=assessment).order_by('order'),
+         list),
+    ]
+
+
+def measure(runs):
+    results = {}
+    for label, queryset, execute in hot_queries():
+        plan = queryset.explain()
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            execute(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[label] = (statistics.median(timings), plan)
+    return results
+
+
+def set_indexes(enabled):
+    from django.db import connection
+    from assessment.models import Question, UserAssessmentAttempt
+
+    with connection.schema_editor() as editor:
+        for model in (Question, UserAssessmentAttempt):
+            for index in model._meta.indexes:
+                if enabled:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--assessments', type=int, default=20)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_database(os.path.join(directory, 'bench.sqlite3'))
+        started = time.perf_counter()
+        seed(args.users, args.assessments, args.questions)
+        print(f"Seeded {args.users * args.assessments} attempts in {time.perf_counter() - started:.1f}s\n")
+
+        set_indexes(False)
+        before = measure(args.runs)
+        set_indexes(True)
+        after = measure(args.runs)
+
+    print(f"{'query':<28} {'before ms':>10} {'after ms':>10}")
+    for label in before:
+        print(f"{label:<28} {before[label][0]:>10.2f} {after[label][0]:>10.2f}")
+
+    print("\nQuery plans")
+    for label in before:
+        print(f"\n{label}\n  before: {before[label][1]}\n  after:  {after[label][1]}")
+
+
+if __name__ == '__main__':
+    main()
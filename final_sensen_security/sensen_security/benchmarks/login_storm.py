@@ -0,0 +1,164 @@
+"""Database writes and latency of a burst of logins, per session setup.
+
+Seeds a throwaway SQLite database with --users accounts, then POSTs
+--logins times to the login view through the test client, each time with
+a fresh client (a new browser signing in), followed by one page view as
+the logged-in user. Every INSERT/UPDATE/DELETE is counted. This is
+repeated for:
+
+    legacy          database sessions, and the old post_save signal that
+                    saved the profile on every user save (so on every
+                    last_login update)
+    db              database sessions, profile saved only when it changed
+                    (the default from settings.py)
+    cached_db       sessions read from the cache, the default with the
+                    shared CACHE_BACKEND=file
+    signed_cookies  no session rows at all
+
+Passwords use the MD5 hasher so that hashing, which costs the same in
+every setup, doesn't hide the difference.
+
+Usage (from the project directory):
+    python benchmarks/login_storm.py [--logins 1000] [--users 1000]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensen_security.settings')
+
+SETUPS = {
+    'legacy': 'django.contrib.sessions.backends.db',
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def setup_django(setup, path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+    settings.SESSION_ENGINE = SETUPS[setup]
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    django.setup()
+
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+
+    if setup == 'legacy':
+        from django.contrib.auth.models import User
+        from django.db.models.signals import post_save
+        from assessment.models import create_or_update_profile
+
+        def legacy_profile_signal(sender, instance, created, **kwargs):
+            if created:
+                create_or_update_profile(sender, instance, created, **kwargs)
+            elif hasattr(instance, 'profile'):
+                instance.profile.save()
+
+        post_save.disconnect(create_or_update_profile, sender=User)
+        post_save.connect(legacy_profile_signal, sender=User, weak=False)
+
+
+def seed(users):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import transaction
+    from assessment.models import Profile
+
+    call_command('migrate', verbosity=0)
+    password = make_password('password')
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [User(username=f'user{i}', email=f'user{i}@example.com', password=password) for i in range(users)],
+            batch_size=2000,
+        )
+        Profile.objects.bulk_create([
+            Profile(user_id=user_id, emp_id=f'EMP{user_id:05}', user_code=f'SS-{user_id:05}')
+            for user_id in User.objects.values_list('id', flat=True)
+        ], batch_size=2000)
+
+
+def run_setup(setup, path, args, results):
+    setup_django(setup, path)
+    from django.db import connection
+    from django.test import Client
+
+    writes = []
+
+    def count_writes(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(WRITES):
+            writes.append(sql)
+        return execute(sql, params, many, context)
+
+    latencies = []
+    failed = 0
+    with connection.execute_wrapper(count_writes):
+        for n in range(args.logins):
+            client = Client()
+            started = time.perf_counter()
+            response = client.post('/login/', {'email': f'user{n % args.users}@example.com', 'password': 'password'})
+            if response.status_code != 302:
+                failed += 1
+            client.get('/')
+            latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    results.put({
+        'writes': len(writes),
+        'profile_writes': sum('assessment_profile' in sql for sql in writes),
+        'session_writes': sum('django_session' in sql for sql in writes),
+        'failed': failed,
+        'median_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'seconds': sum(latencies),
+    })
+
+
+def seed_process(path, users):
+    setup_django('cached_db', path)
+    seed(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{args.logins} logins (login + one page view each), {args.users} users\n")
+    print(f"{'setup':<15} {'writes':>7} {'/login':>7} {'profile':>8} {'session':>8} "
+          f"{'median ms':>10} {'p95 ms':>8} {'logins/s':>9}")
+    for setup in SETUPS:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            seeder = context.Process(target=seed_process, args=(path, args.users))
+            seeder.start()
+            seeder.join()
+
+            results = context.Queue()
+            process = context.Process(target=run_setup, args=(setup, path, args, results))
+            process.start()
+            result = results.get()
+            process.join()
+
+        if result['failed']:
+            print(f"{setup}: {result['failed']} login(s) failed")
+        print(f"{setup:<15} {result['writes']:>7} {result['writes'] / args.logins:>7.1f} "
+              f"{result['profile_writes']:>8} {result['session_writes']:>8} {result['median_ms']:>10.1f} "
+              f"{result['p95_ms']:>8.1f} {args.logins / result['seconds']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
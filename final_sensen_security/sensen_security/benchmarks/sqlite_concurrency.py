@@ -0,0 +1,197 @@
+"""Submission throughput with parallel writers, per database profile.
+
+Seeds a throwaway SQLite database, then starts --writers processes that
+each POST to submit_assessment through the test client for --seconds,
+while --readers processes run the admin dashboard aggregates in a loop.
+This is repeated for the "development" profile (stock backend, rollback
+journal, deferred transactions) and the "production" profile from
+settings.py (WAL, busy timeout, immediate transactions, tuned pragmas).
+
+Usage (from the project directory):
+    python benchmarks/sqlite_concurrency.py [--writers 8] [--readers 1] [--seconds 10] [--users 2000]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensen_security.settings')
+
+PROFILES = ('development', 'production')
+QUESTIONS = 20
+
+
+def setup_django(profile, path):
+    # Read by settings.py, so it has to be set before Django is configured
+    os.environ['DATABASE_PROFILE'] = profile
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    # Failed submissions are counted, not logged
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+
+def seed(users):
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import transaction
+    from django.utils import timezone
+    from assessment.models import Assessment, Question, UserAssessmentAttempt
+    from assessment.stats import rebuild_stats
+
+    call_command('migrate', verbosity=0)
+    now = timezone.now()
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [User(username=f'user{i}', email=f'user{i}@example.com') for i in range(users)], batch_size=2000,
+        )
+        assessments = Assessment.objects.bulk_create(
+            [Assessment(title=f'Assessment {i}', description='seed') for i in range(10)]
+        )
+        Question.objects.bulk_create([
+            Question(assessment=assessment, question_text='q', correct_answer='a', order=order)
+            for assessment in assessments
+            for order in range(QUESTIONS)
+        ])
+        user_ids = list(User.objects.values_list('id', flat=True))
+        UserAssessmentAttempt.objects.bulk_create([
+            UserAssessmentAttempt(
+                user_id=user_id, assessment=assessment, score=(n * 7) % 101, is_completed=True,
+                is_passed=(n * 7) % 101 >= 70, completed_at=now - timedelta(minutes=n),
+            )
+            for n, user_id in enumerate(user_ids)
+            for assessment in assessments
+        ], batch_size=5000)
+    Assessment.update_question_counts()
+    rebuild_stats()
+
+
+def seed_process(profile, path, users):
+    setup_django(profile, path)
+    seed(users)
+
+
+def writer(profile, path, user_ids, seconds, results):
+    setup_django(profile, path)
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from assessment.models import Assessment, Question
+
+    assessment = Assessment.objects.order_by('id').first()
+    question_ids = list(Question.objects.filter(assessment=assessment).values_list('id', flat=True))
+    url = f'/assessment/{assessment.id}/submit/'
+    clients = {}
+
+    ok = locked = failed = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        user_id = user_ids[n % len(user_ids)]
+        if user_id not in clients:
+            clients[user_id] = Client()
+            clients[user_id].force_login(User.objects.get(pk=user_id))
+        client = clients[user_id]
+        answers = {str(question_id): 'a' if (n + i) % 3 else 'b' for i, question_id in enumerate(question_ids)}
+        started = time.perf_counter()
+        response = client.post(url, {'answers': answers}, content_type='application/json')
+        latencies.append(time.perf_counter() - started)
+        if response.status_code == 200:
+            ok += 1
+        elif b'locked' in response.content:
+            locked += 1
+        else:
+            failed += 1
+        n += 1
+    results.put(('writer', ok, locked, failed, latencies))
+
+
+def reader(profile, path, seconds, results):
+    setup_django(profile, path)
+    from django.db.models import Avg, Count
+    from assessment.models import UserAssessmentAttempt
+    from assessment.stats import assessment_overview, dashboard_totals, top_users
+
+    reads = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            dashboard_totals()
+            assessment_overview()
+            top_users()
+            # The kind of long report that holds a read lock for a while
+            list(UserAssessmentAttempt.objects.values('user__email').annotate(Avg('score'), Count('id')))
+            reads += 1
+        except Exception:
+            errors += 1
+    results.put(('reader', reads, errors, 0, []))
+
+
+def run_profile(profile, args):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        seeder = context.Process(target=seed_process, args=(profile, path, args.users))
+        seeder.start()
+        seeder.join()
+
+        results = context.Queue()
+        user_ids = list(range(1, args.users + 1))
+        processes = [
+            context.Process(target=writer, args=(profile, path, user_ids[i::args.writers], args.seconds, results))
+            for i in range(args.writers)
+        ] + [
+            context.Process(target=reader, args=(profile, path, args.seconds, results))
+            for _ in range(args.readers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    writers = [outcome for outcome in outcomes if outcome[0] == 'writer']
+    readers = [outcome for outcome in outcomes if outcome[0] == 'reader']
+    latencies = sorted(latency for outcome in writers for latency in outcome[4])
+    return {
+        'ok': sum(outcome[1] for outcome in writers),
+        'locked': sum(outcome[2] for outcome in writers),
+        'failed': sum(outcome[3] for outcome in writers),
+        'median_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        'reads': sum(outcome[1] for outcome in readers),
+        'read_errors': sum(outcome[2] for outcome in readers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--users', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writer(s), {args.readers} dashboard reader(s), {args.seconds:g}s per profile\n")
+    print(f"{'profile':<12} {'submits/s':>10} {'ok':>7} {'locked':>7} {'failed':>7} "
+          f"{'median ms':>10} {'p95 ms':>8} {'reports':>8}")
+    for profile in PROFILES:
+        result = run_profile(profile, args)
+        print(f"{profile:<12} {result['ok'] / args.seconds:>10.1f} {result['ok']:>7} {result['locked']:>7} "
+              f"{result['failed']:>7} {result['median_ms']:>10.1f} {result['p95_ms']:>8.1f} {result['reads']:>8}")
+
+
+if __name__ == '__main__':
+    main()
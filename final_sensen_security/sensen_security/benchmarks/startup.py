@@ -0,0 +1,65 @@
+"""Cold-start benchmark for the WSGI application.
+
+Starts fresh interpreters that load the WSGI app and resolve the URLconf
+(which imports assessment.views), then reports wall time and peak RSS.
+
+The "eager" scenario also imports pandas and plotly up front, which is
+what every worker paid before the charting code moved to
+assessment/charts.py; "lazy" is the current behaviour.
+
+Usage (from the project directory):
+    python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, os, resource, sys, time
+sys.path.insert(0, {project_dir!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensen_security.settings')
+started = time.perf_counter()
+if {eager!r}:
+    import pandas, plotly.express, plotly.graph_objects, plotly.offline
+from sensen_security.wsgi import application
+from django.urls import resolve
+resolve('/')
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'seconds': elapsed,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'plotly_loaded': 'plotly' in sys.modules,
+}}))
+"""
+
+
+def run_once(eager):
+    code = CHILD.format(project_dir=str(PROJECT_DIR), eager=eager)
+    output = subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True, text=True, cwd=PROJECT_DIR,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<8} {'median s':>9} {'min s':>7} {'RSS MB':>7}  plotly loaded")
+    for label, eager in (('eager', True), ('lazy', False)):
+        results = [run_once(eager) for _ in range(args.runs)]
+        seconds = [r['seconds'] for r in results]
+        rss = statistics.median(r['rss_mb'] for r in results)
+        print(f"{label:<8} {statistics.median(seconds):>9.3f} {min(seconds):>7.3f} {rss:>7.1f}  {results[0]['plotly_loaded']}")
+
+
+if __name__ == '__main__':
+    main()
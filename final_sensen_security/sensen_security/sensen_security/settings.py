@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -56,6 +57,54 @@ DATABASES = {
     }
 }
 
+# DATABASE_PROFILE=production tunes SQLite for concurrent requests (see
+# sensen_security/sqlite/base.py and benchmarks/sqlite_concurrency.py):
+# WAL journaling so dashboard reads don't block submissions, a busy
+# timeout and immediate transactions so writers queue instead of failing
+# with "database is locked", and connections kept open between requests.
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'development')
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'sensen_security.sqlite',
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                # Durable at checkpoints rather than every commit; safe with WAL
+                'synchronous': 'NORMAL',
+                'cache_size': -64000,  # KiB, i.e. 64 MB per connection
+                'mmap_size': 256 * 1024 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    })
+
+# Reads of the admin dashboard and leaderboards can go to a separate
+# 'analytics' connection (see assessment/analytics.py): 'readonly' opens the
+# main file read-only, 'snapshot' reads a copy refreshed by
+# "manage.py refresh_analytics_snapshot --loop". Empty keeps them on 'default'.
+ANALYTICS_DATABASE = os.getenv('ANALYTICS_DATABASE', '')
+ANALYTICS_SNAPSHOT_PATH = os.getenv(
+    'ANALYTICS_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'sensen_security_analytics.sqlite3'),
+)
+if ANALYTICS_DATABASE in ('readonly', 'snapshot'):
+    DATABASES['analytics'] = {
+        'ENGINE': 'sensen_security.sqlite',
+        # mode=ro: opening the snapshot before its first refresh must not create an empty file
+        'NAME': DATABASES['default']['NAME'] if ANALYTICS_DATABASE == 'readonly'
+        else f'{Path(ANALYTICS_SNAPSHOT_PATH).absolute().as_uri()}?mode=ro',
+        'OPTIONS': {
+            'timeout': 20,
+            'pragmas': {'query_only': 'ON', 'cache_size': -64000, 'mmap_size': 256 * 1024 * 1024},
+        },
+        # Tests read through the default connection
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['assessment.analytics.AnalyticsRouter']
+
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
@@ -82,3 +131,74 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 
+# Cache: 'locmem' keeps entries per process, 'file' shares them between
+# the workers on one host (CACHE_LOCATION must be a writable directory)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'sensen_security_cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sensen-security',
+        }
+    }
+
+# With the shared file cache, sessions are read from the cache and only fall
+# back to the database on a miss. The per-process locmem cache would let
+# another worker keep serving a session after a logout, so sessions then come
+# straight from the database. 'signed_cookies' keeps no session rows at all,
+# but a copied cookie stays valid until it expires.
+def default_session_engine(cache_backend):
+    if cache_backend == 'file':
+        return 'django.contrib.sessions.backends.cached_db'
+    return 'django.contrib.sessions.backends.db'
+
+
+SESSION_ENGINE = os.getenv('SESSION_ENGINE') or default_session_engine(CACHE_BACKEND)
+
+# Seconds a learner's home page progress summary is kept in the cache
+PROGRESS_SUMMARY_TIMEOUT = int(os.getenv('PROGRESS_SUMMARY_TIMEOUT', 300))
+
+
+# Leaderboards kept up to date on every submission (see assessment/leaderboard.py);
+# run "manage.py rebuild_dashboard_stats" after changing this
+LEADERBOARD_BOARDS = ('all', 'assessment', 'week', 'month')
+
+# CSV imports run in the background (see assessment/jobs.py): 'thread' runs
+# them in a pool inside the web process, 'command' leaves them to
+# "manage.py process_import_jobs --loop"
+IMPORT_JOBS_RUNNER = os.getenv('IMPORT_JOBS_RUNNER', 'thread')
+IMPORT_WORKER_THREADS = int(os.getenv('IMPORT_WORKER_THREADS', 1))
+
+# Tutorial progress changes smaller than this many percentage points are
+# coalesced into the next write (see assessment/tutorial_progress.py)
+TUTORIAL_PROGRESS_MIN_DELTA = 5
+
+# Progress heartbeats are buffered per process and flushed in one
+# transaction every FLUSH_INTERVAL seconds or once FLUSH_SIZE tutorials
+# are waiting (see assessment/heartbeats.py)
+TUTORIAL_PROGRESS_BUFFER = os.getenv('TUTORIAL_PROGRESS_BUFFER', 'True') == 'True'
+TUTORIAL_PROGRESS_FLUSH_INTERVAL = float(os.getenv('TUTORIAL_PROGRESS_FLUSH_INTERVAL', 5))
+TUTORIAL_PROGRESS_FLUSH_SIZE = 500
+TUTORIAL_PROGRESS_MAX_BUFFERED = 5000
+
+# Threads hashing passwords during bulk user provisioning
+# (see assessment/provisioning.py); defaults to one per CPU
+PROVISIONING_HASH_WORKERS = int(os.getenv('PROVISIONING_HASH_WORKERS', 0)) or None
+
+# Emails are queued in the outbox and sent in batches over one connection
+# (see assessment/outbox.py): 'thread' sends them from a background thread
+# in the web process, 'command' leaves them to "manage.py send_outbox --loop".
+# Failed sends are retried after RETRY_DELAY seconds, doubling each time. The
+# thread worker's retry timers don't survive a restart, so use 'command' when
+# running several processes or restarting often.
+EMAIL_OUTBOX_RUNNER = os.getenv('EMAIL_OUTBOX_RUNNER', 'thread')
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
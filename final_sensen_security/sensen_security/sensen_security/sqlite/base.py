@@ -0,0 +1,36 @@
+"""SQLite backend for the production database profile.
+
+Two extra OPTIONS are understood on top of the stock backend:
+
+    pragmas            {name: value} run on every new connection, e.g.
+                       journal_mode=WAL so readers don't block the writer
+    transaction_mode   'IMMEDIATE' makes atomic() take the write lock when
+                       the transaction starts. With the default (DEFERRED)
+                       a transaction that reads first and writes later
+                       cannot wait for a concurrent writer: SQLite fails
+                       it with "database is locked" at once instead of
+                       honouring the busy timeout.
+
+The busy timeout itself is the stock 'timeout' option (in seconds).
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()